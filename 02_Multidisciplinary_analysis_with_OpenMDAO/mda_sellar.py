@@ -5,9 +5,16 @@ Created on Mon Sep 16 19:21:01 2019
 """
 
 # Part 1: Import required packages
+import os
+import sys
+
 import openmdao.api as om
 import numpy as np
 
+# mdao_tools lives in the root of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.solvers import FIXED_POINT_METHODS, fixed_point_solver
+
 # Part 2: Create new components for Discipline1 and 2
 class SellarDis1(om.ExplicitComponent):
     """
@@ -80,6 +87,13 @@ class SellarMDA(om.Group):
     """
     Group containing the Sellar MDA. 
     """
+    def initialize(self):
+        # 'nlbgs', 'aitken' or 'anderson', see mdao_tools/solvers.py
+        self.options.declare('solver', default='nlbgs', values=FIXED_POINT_METHODS,
+                             desc='Fixed-point solver of the cycle')
+        self.options.declare('anderson_depth', types=int, default=5,
+                             desc="History depth of the 'anderson' solver")
+
     def setup(self):
         indeps = self.add_subsystem('indeps', om.IndepVarComp(), promotes=['*'])
         indeps.add_output('x', 1.0)
@@ -91,8 +105,11 @@ class SellarMDA(om.Group):
         cycle.add_subsystem('d2', SellarDis2(), promotes_inputs=['z', 'y1'],
                             promotes_outputs=['y2'])
 
-        # Nonlinear Block Gauss Seidel is a gradient free solver
-        cycle.nonlinear_solver = om.NonlinearBlockGS(iprint=1)  # try iprint=2
+        # Nonlinear Block Gauss Seidel is a gradient free solver. Aitken
+        # relaxation or Anderson mixing accelerate its linear convergence.
+        cycle.nonlinear_solver = fixed_point_solver(self.options['solver'],
+                                                    self.options['anderson_depth'],
+                                                    iprint=1)  # try iprint=2
 
         self.add_subsystem('obj_cmp', om.ExecComp('obj = x**2 + z[1] + y1 + exp(-y2)',
                                                   z=np.array([0.0, 0.0]), x=0.0),
@@ -102,31 +119,40 @@ class SellarMDA(om.Group):
         self.add_subsystem('con_cmp2', om.ExecComp('con2 = y2 - 24.0'), promotes=['con2', 'y2'])
         
         
-# Part 4: Setup model and problem 
-prob = om.Problem()
-prob.model = SellarMDA()
-prob.setup()
+def run(visualize=False, solver='nlbgs'):
+    """
+    Run the Sellar MDA at x=2, z=(-1, -1) with the given fixed-point solver
+    and return the coupling variables, the objective and the constraints.
+    There is nothing to visualize here.
+    """
+    # Part 4: Setup model and problem 
+    prob = om.Problem()
+    prob.model = SellarMDA(solver=solver)
+    prob.setup()
 
-# Part 5: Provide input to the problem 
-prob['x'] = 2.
-prob['z'] = [-1., -1.]
+    # Part 5: Provide input to the problem 
+    prob['x'] = 2.
+    prob['z'] = [-1., -1.]
 
-prob.run_model()
+    prob.run_model()
 
-#  Part 6:  print details
-print('\nInput ---')
-print('x :',prob['x'])
-print('z1 :',prob['z'][0])
-print('z2 :',prob['z'][1])
+    #  Part 6:  print details
+    print('\nInput ---')
+    print('x :',prob['x'])
+    print('z1 :',prob['z'][0])
+    print('z2 :',prob['z'][1])
 
-print('\nDiscipline output ---')
-print('y1 :',prob['y1'])
-print('y2 :',prob['y2'])
+    print('\nDiscipline output ---')
+    print('y1 :',prob['y1'])
+    print('y2 :',prob['y2'])
 
-print('\nObjective and constraints---')
-print('obj :',prob['obj'])
-print('con1 :',prob['con1'])
-print('con2 :',prob['con2'])
+    print('\nObjective and constraints---')
+    print('obj :',prob['obj'])
+    print('con1 :',prob['con1'])
+    print('con2 :',prob['con2'])
 
+    return {name : prob.get_val(name).copy() for name in ('y1', 'y2', 'obj', 'con1', 'con2')}
 
 
+if __name__ == "__main__":
+    run()
@@ -34,7 +34,11 @@ class Paraboloid(om.ExplicitComponent):
         outputs['f_xy'] = (x - 3.0)**2 + x * y + (y + 4.0)**2 - 3.0
 
 
-if __name__ == "__main__":    
+def run(visualize=False):
+    """
+    Evaluate the Paraboloid at (3, -4) and (5, -2) and return both values of
+    f_xy. There is nothing to visualize here.
+    """
     # Part 2: Create a group and Paraboloid as subsystem of group
     model = om.Group()
     model.add_subsystem('parab_comp', Paraboloid())
@@ -42,19 +46,20 @@ if __name__ == "__main__":
     # Part 3: Create problem from the group and setup the problem
     prob = om.Problem(model)
     prob.setup()
-    
+
     # Part 4: Provide x and y input to the problem
     prob.set_val('parab_comp.x', 3.0)
     prob.set_val('parab_comp.y', -4.0)
 
     # Part 5: Run the problem
     prob.run_model()
-    
+
     # Part 6: Print the input and output of the problem
     print('x =',prob['parab_comp.x'])
     print('y =',prob['parab_comp.y'])
     print('f_xy =',prob.get_val('parab_comp.f_xy'))
-    
+    f_xy = [prob.get_val('parab_comp.f_xy')[0]]
+
     print('\n----------------\n')
     # Part 7: Provide new input variables and print output
     prob.set_val('parab_comp.x', 5.0)
@@ -62,4 +67,11 @@ if __name__ == "__main__":
     prob.run_model()
     print('x =',prob['parab_comp.x'])
     print('y =',prob['parab_comp.y'])
-    print('f_xy =', prob.get_val('parab_comp.f_xy'))
\ No newline at end of file
+    print('f_xy =', prob.get_val('parab_comp.f_xy'))
+    f_xy.append(prob.get_val('parab_comp.f_xy')[0])
+
+    return {'f_xy' : f_xy}
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized airflow sensor MDA.
+
+Structures and Aerodynamics of mdo_airflow_senor_mdf.py work on scalars with
+finite-difference partials, so every (l, w) sensor design needs its own Newton
+solve. Here l, w, theta and F are arrays of length num_nodes. Each design only
+couples with itself, so all partials are diagonal and are declared sparse with
+rows/cols; a single Newton solve with a sparse DirectSolver converges all
+num_nodes sensor designs at once.
+"""
+# Part 1: Import required packages
+import time
+
+import numpy as np
+import openmdao.api as om
+
+
+# Part 2: Create new components
+class Structures(om.ImplicitComponent):
+    """
+    Structures Component -- vectorized, with analytic partials
+    """
+    def initialize(self):
+        self.options.declare('num_nodes', types=int, default=1,
+                             desc='Number of sensor designs solved at once')
+
+    def setup(self):
+        n = self.options['num_nodes']
+
+        # Global Design Variable
+        self.add_input('l', val=0.1*np.ones(n))
+
+        # Coupling parameter
+        self.add_input('F', val=0.1*np.ones(n))
+
+        # Coupling output
+        self.add_output('theta', val=0.1*np.ones(n))
+
+    def setup_partials(self):
+        arange = np.arange(self.options['num_nodes'])
+        self.declare_partials('theta', ['l', 'F', 'theta'], rows=arange, cols=arange)
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        """
+        Evaluates theta
+        """
+        l = inputs['l']
+        F = inputs['F']
+        theta = outputs['theta']
+        k = 0.05  #constant
+        residuals['theta'] = k*theta - 1/2*F*l*np.cos(theta)
+
+    def linearize(self, inputs, outputs, partials):
+        l = inputs['l']
+        F = inputs['F']
+        theta = outputs['theta']
+        k = 0.05  #constant
+
+        partials['theta', 'theta'] = k + 1/2*F*l*np.sin(theta)
+        partials['theta', 'F'] = -1/2*l*np.cos(theta)
+        partials['theta', 'l'] = -1/2*F*np.cos(theta)
+
+
+class Aerodynamics(om.ExplicitComponent):
+    """
+    Aerodynamics Component -- vectorized, with analytic partials
+    """
+    def initialize(self):
+        self.options.declare('num_nodes', types=int, default=1,
+                             desc='Number of sensor designs solved at once')
+
+    def setup(self):
+        n = self.options['num_nodes']
+
+        # Global Design Variable
+        self.add_input('l', val=0.1*np.ones(n))
+        self.add_input('w', val=0.1*np.ones(n))
+
+        # Coupling input
+        self.add_input('theta', val=0.5*np.ones(n))
+
+        # Coupling output
+        self.add_output('F', val=3*np.ones(n))
+
+    def setup_partials(self):
+        arange = np.arange(self.options['num_nodes'])
+        self.declare_partials('F', ['l', 'w', 'theta'], rows=arange, cols=arange)
+
+    def compute(self, inputs, outputs):
+        """
+        Evaluates F
+        """
+        l = inputs['l']
+        w = inputs['w']
+        theta = inputs['theta']
+        Cd = 2.0
+        rho = 1.0
+        v = 40.0  # m/s
+        C = 0.5*rho*Cd  # constant
+        Af = l*w*np.cos(theta)
+        outputs['F'] = C*Af*v**2
+
+    def compute_partials(self, inputs, partials):
+        l = inputs['l']
+        w = inputs['w']
+        theta = inputs['theta']
+        Cd = 2.0
+        rho = 1.0
+        v = 40.0  # m/s
+        C = 0.5*rho*Cd  # constant
+
+        partials['F', 'l'] = C*w*np.cos(theta)*v**2
+        partials['F', 'w'] = C*l*np.cos(theta)*v**2
+        partials['F', 'theta'] = -C*l*w*np.sin(theta)*v**2
+
+
+# Part 3: Create group MDA
+class ProcessMDA(om.Group):
+    """
+    Group containing the vectorized MDA, objective and constraints
+    """
+    def initialize(self):
+        self.options.declare('num_nodes', types=int, default=1,
+                             desc='Number of sensor designs solved at once')
+
+    def setup(self):
+        n = self.options['num_nodes']
+
+        indeps = self.add_subsystem('indeps', om.IndepVarComp(), promotes=['*'])
+        indeps.add_output('l', 0.01*np.ones(n))
+        indeps.add_output('w', 0.01*np.ones(n))
+
+        cycle = self.add_subsystem('cycle', om.Group(), promotes=['*'])
+        cycle.add_subsystem('d1', Structures(num_nodes=n), promotes_inputs=['l', 'F'], promotes_outputs=['theta'])
+        cycle.add_subsystem('d2', Aerodynamics(num_nodes=n), promotes_inputs=['l', 'w','theta'], promotes_outputs=['F'])
+
+        # The jacobian of the cycle is block diagonal, so assemble it as a
+        # sparse matrix for the DirectSolver used by Newton.
+        cycle.options['assembled_jac_type'] = 'csc'
+        ns = cycle.nonlinear_solver = om.NewtonSolver(solve_subsystems=False)
+        ns.options['maxiter'] = 500
+        cycle.linear_solver = om.DirectSolver(assemble_jac=True)
+
+        vec = np.zeros(n)
+        self.add_subsystem('obj_cmp', om.ExecComp('obj = (theta - 0.250)**2', obj=vec, theta=vec,
+                                                  has_diag_partials=True),
+                           promotes=['theta','obj'])
+        self.add_subsystem('con_cmp1', om.ExecComp('con1 = F - 7', con1=vec, F=vec,
+                                                   has_diag_partials=True),
+                           promotes=['con1', 'F'])
+        self.add_subsystem('con_cmp2', om.ExecComp('con2 = l*w - 0.01', con2=vec, l=vec, w=vec,
+                                                   has_diag_partials=True),
+                           promotes=['con2', 'l','w'])
+
+
+def solve_designs(l, w, prob=None):
+    """
+    Solve the MDA for every (l[i], w[i]) sensor design with one Newton solve.
+
+    Returns the problem, so that theta, F, obj, con1 and con2 can be read
+    from it, and it can be passed back in for the next batch of the same size.
+    """
+    l = np.ravel(l)
+    w = np.ravel(w)
+
+    if prob is None:
+        prob = om.Problem()
+        prob.model = ProcessMDA(num_nodes=l.size)
+        prob.setup()
+        prob.set_solver_print(level=0)
+
+    prob.set_val('l', l)
+    prob.set_val('w', w)
+    prob.run_model()
+    return prob
+
+
+def run(visualize=False, n=50):
+    """
+    Solve an n x n grid of sensor designs with one vectorized Newton solve
+    and with one solve per design, and return both wall times. There is
+    nothing to visualize here.
+    """
+    # Part 4: Evaluate a grid of sensor designs
+    lv, wv = np.meshgrid(np.linspace(0.01, 1, n), np.linspace(0.01, 1, n))
+
+    t0 = time.perf_counter()
+    prob = solve_designs(lv, wv)
+    t_vec = time.perf_counter() - t0
+    theta = prob.get_val('theta').reshape(lv.shape)
+    F = prob.get_val('F').reshape(lv.shape)
+
+    # Same designs, one Newton solve per design
+    prob1 = None
+    theta_loop = np.zeros(lv.shape)
+    t0 = time.perf_counter()
+    for i in range(n):
+        for j in range(n):
+            prob1 = solve_designs(lv[i, j], wv[i, j], prob1)
+            theta_loop[i, j] = prob1.get_val('theta')[0]
+    t_loop = time.perf_counter() - t0
+
+    print('%d sensor designs' % lv.size)
+    print('one vectorized Newton solve: %.3f s' % t_vec)
+    print('one Newton solve per design: %.3f s' % t_loop)
+    print('max |theta_vec - theta_loop|:', np.max(np.abs(theta - theta_loop)))
+
+    # Part 5: Check the analytic partials against finite differences
+    prob = solve_designs([0.1, 0.5], [0.1, 0.3])
+    prob.check_partials(compact_print=True)
+
+    return {'num_designs' : lv.size, 't_vectorized' : t_vec, 't_loop' : t_loop,
+            'max_theta_error' : np.max(np.abs(theta - theta_loop))}
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed-point solver benchmark for the Sellar and analytical MDF cycles.
+
+The cycle of SellarMDA (mdo_sellar.py) and ProcessMDA (mdo_analytical_mdf.py)
+is converged by NonlinearBlockGS at every model evaluation of the optimizer
+and of its finite differences. Here both models are run at the same random
+design points with plain NonlinearBlockGS, Aitken relaxation and Anderson
+mixing with several history depths (mdao_tools/solvers.py). The solver
+iterations, discipline evaluations and wall time are compared, and the
+results are written to fixed_point_benchmark.json.
+
+The ProcessMDA couplings do not depend on each other (y21 = x1 + x2,
+y12 = x1/2 + x2), so its cycle converges in two sweeps whatever the solver;
+it is included as the baseline for the solver overhead.
+"""
+
+# Part 1: Import required packages
+import json
+import time
+
+import numpy as np
+import openmdao.api as om
+
+from mdo_analytical_mdf import ProcessMDA
+from mdo_sellar import SellarMDA
+
+
+# Part 2: Problems and solvers
+# Model class and bounds of the design variables (the optimization bounds)
+PROBLEMS = {
+    'sellar' : (SellarMDA, {'x' : (0., 10., 1), 'z' : (0., 10., 2)}),
+    'analytical_mdf' : (ProcessMDA, {'x1' : (-4., 4., 1), 'x2' : (-4., 4., 1),
+                                     'x3' : (-4., 4., 1)}),
+    }
+
+# (solver, anderson_depth)
+SOLVERS = [('nlbgs', 0), ('aitken', 0), ('anderson', 1), ('anderson', 2), ('anderson', 5)]
+
+
+def design_points(bounds, num_points, seed=0):
+    """
+    num_points uniform random values of every design variable.
+    """
+    rng = np.random.RandomState(seed)
+    return {name : rng.uniform(lower, upper, (num_points, size))
+            for name, (lower, upper, size) in bounds.items()}
+
+
+def count_evals(comp):
+    """
+    Count the compute calls of comp. Returns a one-element list holding the
+    count.
+    """
+    count = [0]
+    compute = comp.compute
+
+    def counted_compute(inputs, outputs):
+        count[0] += 1
+        compute(inputs, outputs)
+
+    comp.compute = counted_compute
+    return count
+
+
+# Part 3: Benchmark
+def run_points(problem, solver, anderson_depth, points, atol=1e-10, rtol=1e-10, maxiter=200):
+    """
+    Run the model of problem at every design point with one solver.
+
+    Returns a record with the total and maximum solver iterations, the
+    number of discipline evaluations, the wall time, the number of points
+    where the cycle did not converge and the objective at every point.
+    """
+    model_class, bounds = PROBLEMS[problem]
+
+    prob = om.Problem()
+    prob.model = model_class(solver=solver, anderson_depth=anderson_depth)
+    prob.setup()
+    prob.set_solver_print(level=0)
+    prob.final_setup()
+
+    nl_solver = prob.model._get_subsystem('cycle').nonlinear_solver
+    nl_solver.options['atol'] = atol
+    nl_solver.options['rtol'] = rtol
+    nl_solver.options['maxiter'] = maxiter
+
+    counts = [count_evals(prob.model._get_subsystem('cycle.%s' % name)) for name in ('d1', 'd2')]
+
+    num_points = len(next(iter(points.values())))
+    iterations = np.zeros(num_points, dtype=int)
+    obj = np.zeros(num_points)
+
+    t0 = time.perf_counter()
+    for k in range(num_points):
+        for name, vals in points.items():
+            prob.set_val(name, vals[k])
+        prob.run_model()
+        iterations[k] = nl_solver._iter_count
+        obj[k] = prob.get_val('obj')[0]
+    wall_time = time.perf_counter() - t0
+
+    return {'problem' : problem,
+            'solver' : solver,
+            'anderson_depth' : anderson_depth,
+            'points' : num_points,
+            'iterations' : int(iterations.sum()),
+            'max_iterations' : int(iterations.max()),
+            'not_converged' : int(np.sum(iterations >= maxiter)),
+            'discipline_evals' : sum(count[0] for count in counts),
+            'wall_time' : wall_time,
+            'obj' : obj}
+
+
+def benchmark(num_points=500, filename='fixed_point_benchmark.json', seed=0):
+    """
+    Compare the solvers of SOLVERS on num_points random design points of
+    every problem and write the records to filename.
+    """
+    report = []
+    print('%-15s %-9s %5s %12s %8s %8s %10s %10s %12s'
+          % ('problem', 'solver', 'depth', 'iterations', 'max', 'failed', 'evals',
+             'time [s]', 'max |dobj|'))
+    for problem, (model_class, bounds) in PROBLEMS.items():
+        points = design_points(bounds, num_points, seed)
+
+        ref = None
+        for solver, depth in SOLVERS:
+            record = run_points(problem, solver, depth, points)
+            obj = record.pop('obj')
+            if ref is None:
+                # Plain NonlinearBlockGS is the reference solution
+                ref = obj
+            record['max_obj_difference'] = float(np.max(np.abs(obj - ref)))
+            report.append(record)
+
+            print('%-15s %-9s %5s %12d %8d %8d %10d %10.3f %12.2e'
+                  % (problem, solver, depth if solver == 'anderson' else '-',
+                     record['iterations'], record['max_iterations'], record['not_converged'],
+                     record['discipline_evals'], record['wall_time'],
+                     record['max_obj_difference']))
+
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    return report
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -89,54 +89,66 @@ class ProcessMDA(om.Group):
         self.add_subsystem('con_cmp1', om.ExecComp('con1 = F - 7'), promotes=['con1', 'F'])
         self.add_subsystem('con_cmp2', om.ExecComp('con2 = l*w - 0.01'), promotes=['con2', 'l','w'])
         
-# Part 4: Build the model and problem for optimization
-prob = om.Problem()
-prob.model = ProcessMDA()
-
-# Part 5: Setup optimizer
-prob.driver = om.ScipyOptimizeDriver()
-prob.driver.options['optimizer'] ='SLSQP'  #'COBYLA' 'SLSQP'
-prob.driver.options['maxiter'] = 100
-prob.driver.options['tol'] = 1e-5
-# prob.driver.options['disp'] = True
-
-# Part 6: Provide bounds and objective function
-prob.model.add_design_var('l', lower=0.01, upper=1)
-prob.model.add_design_var('w', lower=0.01, upper=1)
-prob.model.add_objective('obj')
-prob.model.add_constraint('con1', lower=-1e-5, upper=0)
-prob.model.add_constraint('con2', equals=0)
-
-prob.setup()
-prob.set_solver_print(level=0)
-
-
-# Part 7: Run model with initial values
-print('\nSingle evaluation')
-prob['l'] = 0.1
-prob['w'] = 0.1
-prob.run_model()
-print('l=',prob['l'])
-print('w=',prob['w'])
-print('theta=',prob['theta'])
-print('F=',prob['F'])
-print('f=',prob['obj'])
-print('\n')
-
-# Part 8: Run optimization and print outputs
-prob.model.approx_totals()
-prob.run_driver()
-# ---------------------------
-print('minimum found at')
-print('l=',prob['l'])
-print('w=',prob['w'])
-print('theta=',prob['theta'])
-print('F=',prob['F'])
-print('con1=',prob['con1'])
-print('con2=',prob['con2'])
-print('minumum objective')
-print('f=',prob['obj'])
-
-# Part 9: Generate N2 diagram
-from openmdao.api import n2
-n2(prob)
\ No newline at end of file
+def run(visualize=False):
+    """
+    Evaluate the sensor at l=w=0.1, then optimize l and w with SLSQP and
+    return the optimum. visualize=True opens the N2 diagram.
+    """
+    # Part 4: Build the model and problem for optimization
+    prob = om.Problem()
+    prob.model = ProcessMDA()
+
+    # Part 5: Setup optimizer
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options['optimizer'] ='SLSQP'  #'COBYLA' 'SLSQP'
+    prob.driver.options['maxiter'] = 100
+    prob.driver.options['tol'] = 1e-5
+    # prob.driver.options['disp'] = True
+
+    # Part 6: Provide bounds and objective function
+    prob.model.add_design_var('l', lower=0.01, upper=1)
+    prob.model.add_design_var('w', lower=0.01, upper=1)
+    prob.model.add_objective('obj')
+    prob.model.add_constraint('con1', lower=-1e-5, upper=0)
+    prob.model.add_constraint('con2', equals=0)
+
+    prob.setup()
+    prob.set_solver_print(level=0)
+
+
+    # Part 7: Run model with initial values
+    print('\nSingle evaluation')
+    prob['l'] = 0.1
+    prob['w'] = 0.1
+    prob.run_model()
+    print('l=',prob['l'])
+    print('w=',prob['w'])
+    print('theta=',prob['theta'])
+    print('F=',prob['F'])
+    print('f=',prob['obj'])
+    print('\n')
+
+    # Part 8: Run optimization and print outputs
+    prob.model.approx_totals()
+    prob.run_driver()
+    # ---------------------------
+    print('minimum found at')
+    print('l=',prob['l'])
+    print('w=',prob['w'])
+    print('theta=',prob['theta'])
+    print('F=',prob['F'])
+    print('con1=',prob['con1'])
+    print('con2=',prob['con2'])
+    print('minumum objective')
+    print('f=',prob['obj'])
+
+    if visualize:
+        # Part 9: Generate N2 diagram
+        from openmdao.api import n2
+        n2(prob)
+
+    return {name : prob.get_val(name)[0] for name in ('l', 'w', 'theta', 'F', 'obj', 'con1', 'con2')}
+
+
+if __name__ == "__main__":
+    run(visualize=True)
@@ -5,8 +5,15 @@ Created on Mon Sep 16 19:21:01 2019
 @author: raulv
 """
 # Part 1: Import required packages
+import os
+import sys
+
 import openmdao.api as om
 
+# mdao_tools lives in the root of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.solvers import FIXED_POINT_METHODS, fixed_point_solver
+
 # Part 2: Create new components for Analysis1 and 2
 class Analysis1(om.ExplicitComponent):
     """
@@ -75,6 +82,13 @@ class ProcessMDA(om.Group):
     """
     Group containing MDA
     """
+    def initialize(self):
+        # 'nlbgs', 'aitken' or 'anderson', see mdao_tools/solvers.py
+        self.options.declare('solver', default='nlbgs', values=FIXED_POINT_METHODS,
+                             desc='Fixed-point solver of the cycle')
+        self.options.declare('anderson_depth', types=int, default=5,
+                             desc="History depth of the 'anderson' solver")
+
     def setup(self):
         indeps = self.add_subsystem('indeps', om.IndepVarComp(), promotes=['*'])
         indeps.add_output('x1', 1.0)
@@ -85,8 +99,10 @@ class ProcessMDA(om.Group):
         cycle.add_subsystem('d1', Analysis1(), promotes_inputs=['x1','x2','y12'],promotes_outputs=['y21','g1'])
         cycle.add_subsystem('d2', Analysis2(), promotes_inputs=['x1','x2','x3','y21'],promotes_outputs=['y12','g2'])
 
-        # Nonlinear Block Gauss Seidel is a gradient free solver
-        cycle.nonlinear_solver = om.NonlinearBlockGS()
+        # Nonlinear Block Gauss Seidel is a gradient free solver. Aitken
+        # relaxation or Anderson mixing accelerate its linear convergence.
+        cycle.nonlinear_solver = fixed_point_solver(self.options['solver'],
+                                                    self.options['anderson_depth'])
 
         self.add_subsystem('obj_cmp', om.ExecComp('obj = x1**2 + x2**2 + x3**2 ',
                                                   x1=0.0, x2=0.0, x3=0.0),
@@ -96,56 +112,69 @@ class ProcessMDA(om.Group):
         self.add_subsystem('con_cmp2', om.ExecComp('con2 = g2'), promotes=['con2', 'g2'])
         
         
-# Part 4: Build the model and problem for optimization
-prob = om.Problem()
-prob.model = ProcessMDA()
-
-# Part 5: Setup optimizer
-prob.driver = om.ScipyOptimizeDriver()
-prob.driver.options['optimizer'] = 'SLSQP'
-# prob.driver.options['maxiter'] = 100
-prob.driver.options['tol'] = 1e-8
-
-# Part 6: Provide bounds and objective function
-prob.model.add_design_var('x1', lower=-4, upper=4)
-prob.model.add_design_var('x2', lower=-4, upper=4)
-prob.model.add_design_var('x3', lower=-4, upper=4)
-prob.model.add_objective('obj')
-prob.model.add_constraint('con1', upper=0)
-prob.model.add_constraint('con2', upper=0)
-
-prob.setup()
-prob.set_solver_print(level=0)
-
-
-# Part 7: Run model with initial values
-print('\nSingle evaluation')
-prob['x1'] = 2.
-prob['x2'] = 2.
-prob['x3'] = 2.
-prob.run_model()
-print('x1 :',prob['x1'])
-print('x2 :',prob['x2'])
-print('x3 :',prob['x3'])
-print('g1 :',prob['g1'])
-print('g2 :',prob['g2'])
-print('obj :',prob['obj'][0])
-print('\n')
-
-# Part 8: Run optimization and print outputs
-# Ask OpenMDAO to finite-difference across the model to compute the gradients for the optimizer
-prob.model.approx_totals()
-prob.run_driver()
-# ---------------------------
-print('minimum found at')
-print('x1 :',prob['x1'])
-print('x2 :',prob['x2'])
-print('x3 :',prob['x3'])
-print('g1 :',prob['g1'])
-print('g2 :',prob['g2'])
-print('minumum objective')
-print('obj :',prob['obj'][0])
-
-# Part 9: Generate N2 diagram
-from openmdao.api import n2
-n2(prob)
\ No newline at end of file
+def run(visualize=False, solver='nlbgs'):
+    """
+    Evaluate the MDA at x=(2, 2, 2), then minimize obj with SLSQP and return
+    the optimum. solver selects the fixed-point solver of the cycle.
+    visualize=True opens the N2 diagram.
+    """
+    # Part 4: Build the model and problem for optimization
+    prob = om.Problem()
+    prob.model = ProcessMDA(solver=solver)
+
+    # Part 5: Setup optimizer
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options['optimizer'] = 'SLSQP'
+    # prob.driver.options['maxiter'] = 100
+    prob.driver.options['tol'] = 1e-8
+
+    # Part 6: Provide bounds and objective function
+    prob.model.add_design_var('x1', lower=-4, upper=4)
+    prob.model.add_design_var('x2', lower=-4, upper=4)
+    prob.model.add_design_var('x3', lower=-4, upper=4)
+    prob.model.add_objective('obj')
+    prob.model.add_constraint('con1', upper=0)
+    prob.model.add_constraint('con2', upper=0)
+
+    prob.setup()
+    prob.set_solver_print(level=0)
+
+
+    # Part 7: Run model with initial values
+    print('\nSingle evaluation')
+    prob['x1'] = 2.
+    prob['x2'] = 2.
+    prob['x3'] = 2.
+    prob.run_model()
+    print('x1 :',prob['x1'])
+    print('x2 :',prob['x2'])
+    print('x3 :',prob['x3'])
+    print('g1 :',prob['g1'])
+    print('g2 :',prob['g2'])
+    print('obj :',prob['obj'][0])
+    print('\n')
+
+    # Part 8: Run optimization and print outputs
+    # Ask OpenMDAO to finite-difference across the model to compute the gradients for the optimizer
+    prob.model.approx_totals()
+    prob.run_driver()
+    # ---------------------------
+    print('minimum found at')
+    print('x1 :',prob['x1'])
+    print('x2 :',prob['x2'])
+    print('x3 :',prob['x3'])
+    print('g1 :',prob['g1'])
+    print('g2 :',prob['g2'])
+    print('minumum objective')
+    print('obj :',prob['obj'][0])
+
+    if visualize:
+        # Part 9: Generate N2 diagram
+        from openmdao.api import n2
+        n2(prob)
+
+    return {name : prob.get_val(name)[0] for name in ('x1', 'x2', 'x3', 'g1', 'g2', 'obj')}
+
+
+if __name__ == "__main__":
+    run(visualize=True)
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Scalable coupled system with N disciplines.
+
+The analytical MDF problem of mdo_analytical_mdf.py has two disciplines and
+three scalar design variables. ScalableMDA generalizes it to num_disc
+disciplines with vector couplings of length vec_size:
+
+    linear:     y_i = B_i x + sum_j A_ij y_j
+    nonlinear:  y_i = B_i x + sum_j A_ij tanh(y_j)
+
+where discipline i depends on discipline j with probability density. The
+coupling matrices are random (seeded) and scaled so that the fixed-point
+iteration is a contraction, so both NonlinearBlockGS and Newton converge.
+
+Running this file benchmarks NonlinearBlockGS against Newton and forward
+against reverse total derivatives over a range of sizes and writes the results
+to scalable_mda_report.json.
+"""
+
+# Part 1: Import required packages
+import json
+import time
+
+import numpy as np
+import openmdao.api as om
+
+
+# Part 2: Create the generic discipline
+class CoupledDiscipline(om.ExplicitComponent):
+    """
+    Discipline i of the scalable problem, with analytic partials.
+    """
+    def initialize(self):
+        self.options.declare('index', types=int, desc='Index i of this discipline')
+        self.options.declare('B', types=np.ndarray, desc='vec_size x vec_size design variable matrix')
+        self.options.declare('A', types=dict, desc='Coupling matrices A_ij keyed by source index j')
+        self.options.declare('nonlinear', types=bool, default=False)
+        self.eval_count = 0
+
+    def setup(self):
+        i = self.options['index']
+        m = self.options['B'].shape[0]
+
+        self.add_input('x', val=np.zeros(m))
+        for j in self.options['A']:
+            self.add_input('y%d' % j, val=np.zeros(m))
+
+        self.add_output('y%d' % i, val=np.zeros(m))
+
+    def setup_partials(self):
+        i = self.options['index']
+
+        self.declare_partials('y%d' % i, 'x', val=self.options['B'])
+        for j, A in self.options['A'].items():
+            if self.options['nonlinear']:
+                self.declare_partials('y%d' % i, 'y%d' % j)
+            else:
+                self.declare_partials('y%d' % i, 'y%d' % j, val=A)
+
+    def compute(self, inputs, outputs):
+        self.eval_count += 1
+
+        i = self.options['index']
+        y = self.options['B'].dot(inputs['x'])
+        for j, A in self.options['A'].items():
+            if self.options['nonlinear']:
+                y += A.dot(np.tanh(inputs['y%d' % j]))
+            else:
+                y += A.dot(inputs['y%d' % j])
+
+        outputs['y%d' % i] = y
+
+    def compute_partials(self, inputs, partials):
+        if not self.options['nonlinear']:
+            return
+
+        i = self.options['index']
+        for j, A in self.options['A'].items():
+            # d/dy_j A tanh(y_j) = A diag(1 - tanh(y_j)**2)
+            partials['y%d' % i, 'y%d' % j] = A * (1. - np.tanh(inputs['y%d' % j])**2)
+
+
+class Responses(om.ExplicitComponent):
+    """
+    obj = sum(x**2) + sum_i sum(y_i**2) and con_i = mean(y_i).
+    """
+    def initialize(self):
+        self.options.declare('num_disc', types=int)
+        self.options.declare('vec_size', types=int)
+
+    def setup(self):
+        n = self.options['num_disc']
+        m = self.options['vec_size']
+
+        self.add_input('x', val=np.zeros(m))
+        for i in range(n):
+            self.add_input('y%d' % i, val=np.zeros(m))
+
+        self.add_output('obj', val=0.)
+        self.add_output('con', val=np.zeros(n))
+
+    def setup_partials(self):
+        n = self.options['num_disc']
+        m = self.options['vec_size']
+
+        self.declare_partials('obj', '*')
+        for i in range(n):
+            self.declare_partials('con', 'y%d' % i, rows=np.full(m, i), cols=np.arange(m),
+                                  val=np.full(m, 1. / m))
+
+    def compute(self, inputs, outputs):
+        n = self.options['num_disc']
+
+        outputs['obj'] = np.sum(inputs['x']**2)
+        for i in range(n):
+            y = inputs['y%d' % i]
+            outputs['obj'] += np.sum(y**2)
+            outputs['con'][i] = np.mean(y)
+
+    def compute_partials(self, inputs, partials):
+        partials['obj', 'x'] = 2. * inputs['x']
+        for i in range(self.options['num_disc']):
+            partials['obj', 'y%d' % i] = 2. * inputs['y%d' % i]
+
+
+# Part 3: Create the scalable group
+def coupling_matrices(num_disc, vec_size, density, seed=0, rho=0.5):
+    """
+    Random design variable matrices B_i and coupling matrices A_ij.
+
+    Every discipline depends on the previous one (so the system is always
+    coupled) and on every other discipline with probability density. The A_ij
+    of discipline i are scaled so that their spectral norms add up to rho < 1.
+    """
+    rng = np.random.RandomState(seed)
+
+    B = [rng.uniform(-1., 1., (vec_size, vec_size)) / vec_size for i in range(num_disc)]
+    A = []
+    for i in range(num_disc):
+        sources = [j for j in range(num_disc)
+                   if j != i and (j == (i - 1) % num_disc or rng.uniform() < density)]
+        A_i = {}
+        for j in sources:
+            R = rng.uniform(-1., 1., (vec_size, vec_size))
+            A_i[j] = R * rho / (len(sources) * np.linalg.norm(R, 2))
+        A.append(A_i)
+
+    return B, A
+
+
+class ScalableMDA(om.Group):
+    """
+    Group containing the scalable MDA.
+    """
+    def initialize(self):
+        self.options.declare('num_disc', types=int, default=2)
+        self.options.declare('vec_size', types=int, default=1)
+        self.options.declare('density', types=float, default=0.5,
+                             desc='Probability that discipline i depends on discipline j')
+        self.options.declare('nonlinear', types=bool, default=False)
+        self.options.declare('solver', default='nlbgs', values=['nlbgs', 'newton'])
+        self.options.declare('seed', types=int, default=0)
+
+    def setup(self):
+        n = self.options['num_disc']
+        m = self.options['vec_size']
+        B, A = coupling_matrices(n, m, self.options['density'], self.options['seed'])
+
+        indeps = self.add_subsystem('indeps', om.IndepVarComp(), promotes=['*'])
+        indeps.add_output('x', np.ones(m))
+
+        cycle = self.add_subsystem('cycle', om.Group(), promotes=['*'])
+        for i in range(n):
+            cycle.add_subsystem('d%d' % i,
+                                CoupledDiscipline(index=i, B=B[i], A=A[i],
+                                                  nonlinear=self.options['nonlinear']),
+                                promotes=['*'])
+
+        if self.options['solver'] == 'newton':
+            cycle.nonlinear_solver = om.NewtonSolver(solve_subsystems=False)
+            cycle.nonlinear_solver.options['maxiter'] = 50
+            cycle.linear_solver = om.DirectSolver()
+        else:
+            # Nonlinear Block Gauss Seidel is a gradient free solver
+            cycle.nonlinear_solver = om.NonlinearBlockGS()
+            cycle.nonlinear_solver.options['maxiter'] = 500
+            cycle.linear_solver = om.LinearBlockGS()
+            cycle.linear_solver.options['maxiter'] = 500
+        cycle.nonlinear_solver.options['atol'] = 1e-10
+        cycle.nonlinear_solver.options['rtol'] = 1e-10
+
+        self.add_subsystem('responses', Responses(num_disc=n, vec_size=m), promotes=['*'])
+
+
+# Part 4: Benchmark
+def build_problem(mode='rev', **options):
+    prob = om.Problem()
+    prob.model = ScalableMDA(**options)
+    prob.model.add_design_var('x', lower=-4, upper=4)
+    prob.model.add_objective('obj')
+    prob.model.add_constraint('con', upper=0)
+    prob.setup(mode=mode)
+    prob.set_solver_print(level=0)
+    return prob
+
+
+def eval_count(prob):
+    """
+    Number of discipline evaluations (compute calls) so far.
+    """
+    n = prob.model.options['num_disc']
+    return sum(prob.model._get_subsystem('cycle.d%d' % i).eval_count for i in range(n))
+
+
+def benchmark(num_discs=(2, 4, 8, 16), vec_sizes=(1, 10, 50), density=0.5,
+              filename='scalable_mda_report.json', repeats=3):
+    """
+    Time run_model for NonlinearBlockGS and Newton and compute_totals in
+    forward and reverse mode for every problem size, and write the results
+    as a list of records to filename.
+    """
+    report = []
+    for nonlinear in (False, True):
+        for n in num_discs:
+            for m in vec_sizes:
+                for solver in ('nlbgs', 'newton'):
+                    options = dict(num_disc=n, vec_size=m, density=density,
+                                   nonlinear=nonlinear, solver=solver)
+                    record = dict(options)
+
+                    # Nonlinear solve
+                    times = []
+                    for k in range(repeats):
+                        prob = build_problem('rev', **options)
+                        prob.final_setup()
+                        t0 = time.perf_counter()
+                        prob.run_model()
+                        times.append(time.perf_counter() - t0)
+                    record['run_model_time'] = min(times)
+                    record['discipline_evals'] = eval_count(prob)
+                    record['evals_per_discipline'] = record['discipline_evals'] // n
+                    record['obj'] = float(prob.get_val('obj')[0])
+
+                    # Total derivatives in both directions
+                    for mode in ('fwd', 'rev'):
+                        prob = build_problem(mode, **options)
+                        prob.run_model()
+                        times = []
+                        for k in range(repeats):
+                            t0 = time.perf_counter()
+                            prob.compute_totals()
+                            times.append(time.perf_counter() - t0)
+                        record['totals_time_%s' % mode] = min(times)
+
+                    report.append(record)
+                    print('%-9s n=%-3d m=%-3d %-6s  run_model %8.4f s (%3d evals/disc)  '
+                          'totals fwd %8.4f s  rev %8.4f s'
+                          % ('nonlinear' if nonlinear else 'linear', n, m, solver,
+                             record['run_model_time'], record['evals_per_discipline'],
+                             record['totals_time_fwd'], record['totals_time_rev']))
+
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    return report
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Sellar MDO with analytic derivatives.
+
+SellarDis1 and SellarDis2 of mdo_sellar.py finite-difference their partials,
+and the optimization finite-differences the whole model with approx_totals(),
+so every gradient is nested finite differences around the NonlinearBlockGS
+cycle. Here the disciplines provide analytic partials (or fd/cs partials for
+comparison) and the cycle gets a linear solver, so OpenMDAO can compute the
+total derivatives of the coupled system directly.
+
+Running this file benchmarks the Sellar optimization with FD, complex-step and
+analytic derivatives.
+"""
+
+# Part 1: Import required packages
+import time
+
+import numpy as np
+import openmdao.api as om
+
+
+# Part 2: Create new components for Discipline1 and 2
+class SellarDis1(om.ExplicitComponent):
+    """
+    Component containing Discipline 1 -- with derivatives.
+    """
+    def initialize(self):
+        self.options.declare('partials', default='exact', values=['exact', 'fd', 'cs'],
+                             desc="'exact' for analytic partials, 'fd' or 'cs' to approximate them")
+        self.eval_count = 0
+
+    def setup(self):
+        # Global Design Variable
+        self.add_input('z', val=np.zeros(2))
+
+        # Local Design Variable
+        self.add_input('x', val=0.)
+
+        # Coupling parameter
+        self.add_input('y2', val=1.0)
+
+        # Coupling output
+        self.add_output('y1', val=1.0)
+
+    def setup_partials(self):
+        if self.options['partials'] == 'exact':
+            self.declare_partials('*', '*')
+        else:
+            self.declare_partials('*', '*', method=self.options['partials'])
+
+    def compute(self, inputs, outputs):
+        """
+        Evaluates the equation
+        y1 = z1**2 + z2 + x1 - 0.2*y2
+        """
+        self.eval_count += 1
+
+        z1 = inputs['z'][0]
+        z2 = inputs['z'][1]
+        x1 = inputs['x']
+        y2 = inputs['y2']
+
+        outputs['y1'] = z1**2 + z2 + x1 - 0.2*y2
+
+    def compute_partials(self, inputs, partials):
+        """
+        Jacobian of y1 with respect to z, x and y2
+        """
+        if self.options['partials'] != 'exact':
+            return
+
+        partials['y1', 'y2'] = -0.2
+        partials['y1', 'z'] = np.array([[2.0 * inputs['z'][0], 1.0]])
+        partials['y1', 'x'] = 1.0
+
+
+class SellarDis2(om.ExplicitComponent):
+    """
+    Component containing Discipline 2 -- with derivatives.
+    """
+    def initialize(self):
+        self.options.declare('partials', default='exact', values=['exact', 'fd', 'cs'],
+                             desc="'exact' for analytic partials, 'fd' or 'cs' to approximate them")
+        self.eval_count = 0
+
+    def setup(self):
+        # Global Design Variable
+        self.add_input('z', val=np.zeros(2))
+
+        # Coupling parameter
+        self.add_input('y1', val=1.0)
+
+        # Coupling output
+        self.add_output('y2', val=1.0)
+
+    def setup_partials(self):
+        if self.options['partials'] == 'exact':
+            self.declare_partials('*', '*')
+        else:
+            self.declare_partials('*', '*', method=self.options['partials'])
+
+    def compute(self, inputs, outputs):
+        """
+        Evaluates the equation
+        y2 = y1**(.5) + z1 + z2
+        """
+        self.eval_count += 1
+
+        z1 = inputs['z'][0]
+        z2 = inputs['z'][1]
+        y1 = inputs['y1']
+
+        # Note: this may cause some issues. However, y1 is constrained to be
+        # above 3.16, so lets just let it converge, and the optimizer will
+        # throw it out
+        if y1.real < 0.0:
+            y1 *= -1
+
+        outputs['y2'] = y1**.5 + z1 + z2
+
+    def compute_partials(self, inputs, partials):
+        """
+        Jacobian of y2 with respect to z and y1
+        """
+        if self.options['partials'] != 'exact':
+            return
+
+        y1 = inputs['y1']
+        if y1.real < 0.0:
+            # y2 = (-y1)**.5 + z1 + z2
+            partials['y2', 'y1'] = -.5*(-y1)**-.5
+        else:
+            partials['y2', 'y1'] = .5*y1**-.5
+
+        partials['y2', 'z'] = np.array([[1.0, 1.0]])
+
+
+# Part 3: Create group SellarMDA
+class SellarMDA(om.Group):
+    """
+    Group containing the Sellar MDA.
+
+    partials selects how the disciplines compute their partials. solver
+    selects the nonlinear solver of the cycle: 'nlbgs' (NonlinearBlockGS) or
+    'newton' (NewtonSolver). In both cases the cycle uses a DirectSolver for
+    the coupled linear system of the total derivatives.
+    """
+    def initialize(self):
+        self.options.declare('partials', default='exact', values=['exact', 'fd', 'cs'])
+        self.options.declare('solver', default='nlbgs', values=['nlbgs', 'newton'])
+
+    def setup(self):
+        partials = self.options['partials']
+
+        indeps = self.add_subsystem('indeps', om.IndepVarComp(), promotes=['*'])
+        indeps.add_output('x', 1.0)
+        indeps.add_output('z', np.array([5.0, 2.0]))
+
+        cycle = self.add_subsystem('cycle', om.Group(), promotes=['*'])
+        cycle.add_subsystem('d1', SellarDis1(partials=partials), promotes_inputs=['x', 'z', 'y2'],
+                            promotes_outputs=['y1'])
+        cycle.add_subsystem('d2', SellarDis2(partials=partials), promotes_inputs=['z', 'y1'],
+                            promotes_outputs=['y2'])
+
+        if self.options['solver'] == 'newton':
+            cycle.nonlinear_solver = om.NewtonSolver(solve_subsystems=False)
+            cycle.nonlinear_solver.options['atol'] = 1e-10
+            cycle.nonlinear_solver.options['rtol'] = 1e-10
+        else:
+            # Nonlinear Block Gauss Seidel is a gradient free solver
+            cycle.nonlinear_solver = om.NonlinearBlockGS()
+        cycle.linear_solver = om.DirectSolver()
+
+        self.add_subsystem('obj_cmp', om.ExecComp('obj = x**2 + z[1] + y1 + exp(-y2)',
+                                                  z=np.array([0.0, 0.0]), x=0.0),
+                           promotes=['x', 'z', 'y1', 'y2', 'obj'])
+
+        self.add_subsystem('con_cmp1', om.ExecComp('con1 = 3.16 - y1'), promotes=['con1', 'y1'])
+        self.add_subsystem('con_cmp2', om.ExecComp('con2 = y2 - 24.0'), promotes=['con2', 'y2'])
+
+
+# Part 4: Build the Sellar MDO problem
+def build_sellar_problem(partials='exact', solver='nlbgs', approx_totals=None):
+    """
+    Sellar optimization of mdo_sellar.py.
+
+    approx_totals is None to compute the total derivatives through the
+    coupled linear system, or 'fd'/'cs' to approximate them across the model.
+    """
+    prob = om.Problem()
+    prob.model = SellarMDA(partials=partials, solver=solver)
+
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options['optimizer'] = 'SLSQP'
+    prob.driver.options['tol'] = 1e-8
+    prob.driver.options['disp'] = False
+
+    prob.model.add_design_var('x', lower=0, upper=10)
+    prob.model.add_design_var('z', lower=0, upper=10)
+    prob.model.add_objective('obj')
+    prob.model.add_constraint('con1', upper=0)
+    prob.model.add_constraint('con2', upper=0)
+
+    if approx_totals is not None:
+        prob.model.approx_totals(method=approx_totals)
+
+    prob.setup(force_alloc_complex=(partials == 'cs' or approx_totals == 'cs'))
+    prob.set_solver_print(level=0)
+    return prob
+
+
+def eval_count(prob):
+    """
+    Number of discipline evaluations (compute calls of d1 and d2) so far.
+    """
+    return (prob.model._get_subsystem('cycle.d1').eval_count +
+            prob.model._get_subsystem('cycle.d2').eval_count)
+
+
+# Part 5: Benchmark
+# name: (partials, solver, approx_totals)
+CASES = {
+    'FD totals (mdo_sellar.py)' : ('fd', 'nlbgs', 'fd'),
+    'CS totals' : ('exact', 'nlbgs', 'cs'),
+    'FD partials, DirectSolver' : ('fd', 'nlbgs', None),
+    'CS partials, DirectSolver' : ('cs', 'nlbgs', None),
+    'analytic, NLBGS + DirectSolver' : ('exact', 'nlbgs', None),
+    'analytic, Newton + DirectSolver' : ('exact', 'newton', None),
+    }
+
+OF = ['obj', 'con1', 'con2']
+WRT = ['x', 'z']
+
+
+def benchmark(cases=CASES, repeats=5):
+    """
+    Optimize the Sellar problem with every case and report wall time,
+    discipline evaluations, optimum and the accuracy of the total derivatives
+    at the initial point, relative to the analytic Newton solution.
+    """
+    ref = build_sellar_problem('exact', 'newton')
+    ref.run_model()
+    J_ref = ref.compute_totals(of=OF, wrt=WRT, return_format='array')
+
+    results = {}
+    for name, (partials, solver, approx) in cases.items():
+        # derivative accuracy at the initial point
+        prob = build_sellar_problem(partials, solver, approx)
+        prob.run_model()
+        J = prob.compute_totals(of=OF, wrt=WRT, return_format='array')
+        err = np.max(np.abs(J - J_ref) / np.maximum(np.abs(J_ref), 1e-12))
+
+        # optimization cost, best of several repeats
+        times = []
+        for i in range(repeats):
+            prob = build_sellar_problem(partials, solver, approx)
+            t0 = time.perf_counter()
+            prob.run_driver()
+            times.append(time.perf_counter() - t0)
+
+        results[name] = {'time' : min(times),
+                         'evaluations' : eval_count(prob),
+                         'obj' : prob.get_val('obj')[0],
+                         'deriv_rel_error' : err}
+
+    print('\n%-34s %10s %12s %12s %14s' % ('case', 'time [s]', 'evaluations', 'obj', 'max rel error'))
+    for name, res in results.items():
+        print('%-34s %10.4f %12d %12.6f %14.2e' % (name, res['time'], res['evaluations'],
+                                                  res['obj'], res['deriv_rel_error']))
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
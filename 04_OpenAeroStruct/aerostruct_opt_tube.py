@@ -70,104 +70,122 @@ surface = {
 
 
 #-----------------------------------------------------------------------------------#
-## Part-2: Initialize your problem and add flow and structural conditions ------------
-# Create the problem and assign the model group
-prob = om.Problem()
+def run(visualize=False):
+    """
+    Minimize the fuel burn of the tube-spar CRM wing with twist, thickness
+    and alpha and return the optimum. visualize=True opens the N2 diagram and
+    the wing plot.
+    """
+    ## Part-2: Initialize your problem and add flow and structural conditions ------------
+    # Create the problem and assign the model group
+    prob = om.Problem()
+
+    # Add problem information as an independent variables component
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output('v', val=248.136, units='m/s')
+    indep_var_comp.add_output('alpha', val=5., units='deg')
+    indep_var_comp.add_output('Mach_number', val=0.84)
+    indep_var_comp.add_output('re', val=1.e6, units='1/m')
+    indep_var_comp.add_output('rho', val=0.38, units='kg/m**3')
+    indep_var_comp.add_output('CT', val=grav_constant * 17.e-6, units='1/s')
+    indep_var_comp.add_output('R', val=11.165e6, units='m')
+    indep_var_comp.add_output('W0', val=0.4 * 3e5,  units='kg')
+    indep_var_comp.add_output('speed_of_sound', val=295.4, units='m/s')
+    indep_var_comp.add_output('load_factor', val=1.)
+    indep_var_comp.add_output('empty_cg', val=np.zeros((3)), units='m')
+
+    prob.model.add_subsystem('prob_vars', indep_var_comp, promotes=['*'])
+
+    aerostruct_group = AerostructGeometry(surface=surface)
+
+    name = 'wing'
+
+    # Add tmp_group to the problem with the name of the surface.
+    prob.model.add_subsystem(name, aerostruct_group)
+
+    point_name = 'AS_point_0'
+
+    # Create the aero point group and add it to the model
+    AS_point = AerostructPoint(surfaces=[surface])
+
+    prob.model.add_subsystem(point_name, AS_point,
+        promotes_inputs=['v', 'alpha', 'Mach_number', 're', 'rho', 'CT', 'R',
+            'W0', 'speed_of_sound', 'empty_cg', 'load_factor'])
+
+    com_name = point_name + '.' + name + '_perf'
+    prob.model.connect(name + '.local_stiff_transformed', point_name + '.coupled.' + name + '.local_stiff_transformed')
+    prob.model.connect(name + '.nodes', point_name + '.coupled.' + name + '.nodes')
+
+    # Connect aerodyamic mesh to coupled group mesh
+    prob.model.connect(name + '.mesh', point_name + '.coupled.' + name + '.mesh')
+
+    # Connect performance calculation variables
+    prob.model.connect(name + '.radius', com_name + '.radius')
+    prob.model.connect(name + '.thickness', com_name + '.thickness')
+    prob.model.connect(name + '.nodes', com_name + '.nodes')
+    prob.model.connect(name + '.cg_location', point_name + '.' + 'total_perf.' + name + '_cg_location')
+    prob.model.connect(name + '.structural_mass', point_name + '.' + 'total_perf.' + name + '_structural_mass')
+    prob.model.connect(name + '.t_over_c', com_name + '.t_over_c')
+
+
+
+    #-----------------------------------------------------------------------------------#
+    ## Part-3: Setup optimizer, Add your design variables, constraints, and objective
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options['tol'] = 1e-9
+
+    recorder = om.SqliteRecorder("aerostruct.db")
+    prob.driver.add_recorder(recorder)
+    prob.driver.recording_options['record_derivatives'] = True
+    prob.driver.recording_options['includes'] = ['*']
+
+    # Setup problem and add design variables, constraint, and objective
+    prob.model.add_design_var('wing.twist_cp', lower=-10., upper=15.)
+    prob.model.add_design_var('wing.thickness_cp', lower=0.01, upper=0.5, scaler=1e2)
+    prob.model.add_constraint('AS_point_0.wing_perf.failure', upper=0.)
+    prob.model.add_constraint('AS_point_0.wing_perf.thickness_intersects', upper=0.)
+
+    # Add design variables, constraisnt, and objective on the problem
+    prob.model.add_design_var('alpha', lower=-10., upper=10.)
+    prob.model.add_constraint('AS_point_0.L_equals_W', equals=0.)
+    prob.model.add_objective('AS_point_0.fuelburn', scaler=1e-5)
+
+
+    ## Part-4: Set up and run the optimization problem 
+    prob.setup(check=True)
+    prob.run_driver()
+
+    print('\n objective function')
+    print('AS_point_0.fuelburn',prob['AS_point_0.fuelburn'])
+
+    print('\n Constraints') 
+    print('AS_point_0.wing_perf.failure',prob['AS_point_0.wing_perf.failure'])
+    print('AS_point_0.wing_perf.thickness_intersects',prob['AS_point_0.wing_perf.thickness_intersects'])
+    print('AS_point_0.L_equals_W',prob['AS_point_0.L_equals_W'])
+
+    print('\n design variables') 
+    # design variables
+    print('wing.twist_cp',prob['wing.twist_cp'])
+    print('wing.thickness_cp',prob['wing.thickness_cp'])
+    print('alpha',prob['alpha'])
+
+    if visualize:
+        ## Part-5: Generate N2 diagram
+        from openmdao.api import n2; n2(prob)
+
+        ## Part-6: visualization 
+        from openaerostruct.utils.plot_wing import disp_plot
+        args = [[], []]
+        args[1] = 'aerostruct.db'
+        disp_plot(args=args)
 
-# Add problem information as an independent variables component
-indep_var_comp = om.IndepVarComp()
-indep_var_comp.add_output('v', val=248.136, units='m/s')
-indep_var_comp.add_output('alpha', val=5., units='deg')
-indep_var_comp.add_output('Mach_number', val=0.84)
-indep_var_comp.add_output('re', val=1.e6, units='1/m')
-indep_var_comp.add_output('rho', val=0.38, units='kg/m**3')
-indep_var_comp.add_output('CT', val=grav_constant * 17.e-6, units='1/s')
-indep_var_comp.add_output('R', val=11.165e6, units='m')
-indep_var_comp.add_output('W0', val=0.4 * 3e5,  units='kg')
-indep_var_comp.add_output('speed_of_sound', val=295.4, units='m/s')
-indep_var_comp.add_output('load_factor', val=1.)
-indep_var_comp.add_output('empty_cg', val=np.zeros((3)), units='m')
+    return {'fuelburn' : prob['AS_point_0.fuelburn'][0],
+            'failure' : prob['AS_point_0.wing_perf.failure'][0],
+            'L_equals_W' : prob['AS_point_0.L_equals_W'][0],
+            'twist_cp' : prob['wing.twist_cp'].copy(),
+            'thickness_cp' : prob['wing.thickness_cp'].copy(),
+            'alpha' : prob['alpha'][0]}
 
-prob.model.add_subsystem('prob_vars', indep_var_comp, promotes=['*'])
 
-aerostruct_group = AerostructGeometry(surface=surface)
-
-name = 'wing'
-
-# Add tmp_group to the problem with the name of the surface.
-prob.model.add_subsystem(name, aerostruct_group)
-
-point_name = 'AS_point_0'
-
-# Create the aero point group and add it to the model
-AS_point = AerostructPoint(surfaces=[surface])
-
-prob.model.add_subsystem(point_name, AS_point,
-    promotes_inputs=['v', 'alpha', 'Mach_number', 're', 'rho', 'CT', 'R',
-        'W0', 'speed_of_sound', 'empty_cg', 'load_factor'])
-
-com_name = point_name + '.' + name + '_perf'
-prob.model.connect(name + '.local_stiff_transformed', point_name + '.coupled.' + name + '.local_stiff_transformed')
-prob.model.connect(name + '.nodes', point_name + '.coupled.' + name + '.nodes')
-
-# Connect aerodyamic mesh to coupled group mesh
-prob.model.connect(name + '.mesh', point_name + '.coupled.' + name + '.mesh')
-
-# Connect performance calculation variables
-prob.model.connect(name + '.radius', com_name + '.radius')
-prob.model.connect(name + '.thickness', com_name + '.thickness')
-prob.model.connect(name + '.nodes', com_name + '.nodes')
-prob.model.connect(name + '.cg_location', point_name + '.' + 'total_perf.' + name + '_cg_location')
-prob.model.connect(name + '.structural_mass', point_name + '.' + 'total_perf.' + name + '_structural_mass')
-prob.model.connect(name + '.t_over_c', com_name + '.t_over_c')
-
-
-
-#-----------------------------------------------------------------------------------#
-## Part-3: Setup optimizer, Add your design variables, constraints, and objective
-prob.driver = om.ScipyOptimizeDriver()
-prob.driver.options['tol'] = 1e-9
-
-recorder = om.SqliteRecorder("aerostruct.db")
-prob.driver.add_recorder(recorder)
-prob.driver.recording_options['record_derivatives'] = True
-prob.driver.recording_options['includes'] = ['*']
-
-# Setup problem and add design variables, constraint, and objective
-prob.model.add_design_var('wing.twist_cp', lower=-10., upper=15.)
-prob.model.add_design_var('wing.thickness_cp', lower=0.01, upper=0.5, scaler=1e2)
-prob.model.add_constraint('AS_point_0.wing_perf.failure', upper=0.)
-prob.model.add_constraint('AS_point_0.wing_perf.thickness_intersects', upper=0.)
-
-# Add design variables, constraisnt, and objective on the problem
-prob.model.add_design_var('alpha', lower=-10., upper=10.)
-prob.model.add_constraint('AS_point_0.L_equals_W', equals=0.)
-prob.model.add_objective('AS_point_0.fuelburn', scaler=1e-5)
-
-
-## Part-4: Set up and run the optimization problem 
-prob.setup(check=True)
-prob.run_driver()
-
-print('\n objective function')
-print('AS_point_0.fuelburn',prob['AS_point_0.fuelburn'])
-
-print('\n Constraints') 
-print('AS_point_0.wing_perf.failure',prob['AS_point_0.wing_perf.failure'])
-print('AS_point_0.wing_perf.thickness_intersects',prob['AS_point_0.wing_perf.thickness_intersects'])
-print('AS_point_0.L_equals_W',prob['AS_point_0.L_equals_W'])
-
-print('\n design variables') 
-# design variables
-print('wing.twist_cp',prob['wing.twist_cp'])
-print('wing.thickness_cp',prob['wing.thickness_cp'])
-print('alpha',prob['alpha'])
-
-## Part-5: Generate N2 diagram
-from openmdao.api import n2; n2(prob)
-
-## Part-6: visualization 
-from openaerostruct.utils.plot_wing import disp_plot
-args = [[], []]
-args[1] = 'aerostruct.db'
-disp_plot(args=args)
\ No newline at end of file
+if __name__ == "__main__":
+    run(visualize=True)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Mesh fidelity benchmark for the ScanEagle aerostructural model.
+
+aerostruct_ScanEagle.py uses num_y = 21 and num_x = 3 nodes. This script
+regenerates the mesh over a grid of (num_y, num_x) values and records, for
+every fidelity level, the wall time and peak memory of run_model,
+compute_totals and run_driver, the number of iterations of the coupled
+aerostructural solver and of the optimizer, and the fuelburn of the initial
+design and of the optimum. The error is measured against the finest mesh, so
+the cost-vs-accuracy plot shows the cheapest mesh that is accurate enough.
+
+tracemalloc slows allocation-heavy code by a large, mesh-dependent factor, so
+the wall times are measured in a pass without tracing and the peak memory in
+a second pass on a new problem.
+"""
+
+## Part-0: Import required packages
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# mdao_tools lives in the root of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.scaneagle import build_scaneagle_problem, scaneagle_surface
+
+
+## Part-1: Timing and memory measurement
+def measure(func, trace_memory=False):
+    """
+    Call func() and return its result and its wall time [s], or with
+    trace_memory its peak traced memory [MB] instead.
+    """
+    if not trace_memory:
+        t0 = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - t0
+
+    tracemalloc.start()
+    try:
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak / 2**20
+
+
+def coupled_iterations(prob):
+    """
+    Iterations of the aerostructural (coupled) solver in its last solve.
+    """
+    return prob.model._get_subsystem('AS_point_0.coupled').nonlinear_solver._iter_count
+
+
+## Part-2: One fidelity level
+def _run_pass(num_y, num_x, optimize, maxiter, trace_memory):
+    """
+    Set up, analyse, differentiate and optimize the ScanEagle problem on a
+    num_y x num_x mesh, recording the wall times (keys ending in '_time') or
+    the peak memory (keys ending in '_memory') of every step.
+    """
+    suffix = '_memory' if trace_memory else '_time'
+    record = {}
+
+    def setup():
+        prob = build_scaneagle_problem(scaneagle_surface(num_y, num_x), maxiter=maxiter,
+                                       setup=False)
+        prob.driver.options['disp'] = False
+        prob.setup()
+        prob.set_solver_print(level=0)
+        prob.final_setup()
+        return prob
+
+    prob, record['setup' + suffix] = measure(setup, trace_memory)
+
+    _, record['run_model' + suffix] = measure(prob.run_model, trace_memory)
+    record['coupled_iterations'] = coupled_iterations(prob)
+    record['fuelburn_initial'] = float(prob.get_val('AS_point_0.fuelburn')[0])
+
+    _, record['totals' + suffix] = measure(prob.compute_totals, trace_memory)
+
+    if optimize:
+        failed, record['driver' + suffix] = measure(prob.run_driver, trace_memory)
+        record['driver_failed'] = bool(failed)
+        record['driver_iterations'] = prob.driver.iter_count
+        record['fuelburn_optimum'] = float(prob.get_val('AS_point_0.fuelburn')[0])
+
+    return record
+
+
+def run_level(num_y, num_x, optimize=True, maxiter=200, memory=True):
+    """
+    Wall times and results of one fidelity level, from a pass without memory
+    tracing. With memory=True the same steps are repeated on a new problem
+    under tracemalloc for the peak memory of every step.
+    """
+    record = {'num_y' : num_y, 'num_x' : num_x}
+    record.update(_run_pass(num_y, num_x, optimize, maxiter, trace_memory=False))
+
+    if memory:
+        traced = _run_pass(num_y, num_x, optimize, maxiter, trace_memory=True)
+        record.update({key : val for key, val in traced.items() if key.endswith('_memory')})
+
+    return record
+
+
+## Part-3: Fidelity sweep
+def fidelity_sweep(num_ys=(7, 11, 15, 21, 31, 41), num_xs=(2, 3, 5), optimize=True,
+                   filename='mesh_fidelity_report.json', memory=True):
+    """
+    Run every (num_y, num_x) level and add the relative fuelburn error with
+    respect to the finest level. num_y must be odd (symmetric mesh).
+    """
+    records = []
+    for num_x in num_xs:
+        for num_y in num_ys:
+            record = run_level(num_y, num_x, optimize, memory=memory)
+            records.append(record)
+            print('num_y=%3d num_x=%2d  run_model %7.3f s (%3d coupled its)  totals %7.3f s  '
+                  'driver %8.2f s  fuelburn %.5f'
+                  % (num_y, num_x, record['run_model_time'], record['coupled_iterations'],
+                     record['totals_time'], record.get('driver_time', np.nan),
+                     record.get('fuelburn_optimum', record['fuelburn_initial'])))
+
+    ref = max(records, key=lambda r: r['num_y'] * r['num_x'])
+    for record in records:
+        for key in ('fuelburn_initial', 'fuelburn_optimum'):
+            if key in record:
+                record[key.replace('fuelburn', 'error')] = abs(record[key] / ref[key] - 1.)
+
+    with open(filename, 'w') as f:
+        json.dump(records, f, indent=2)
+
+    return records
+
+
+## Part-4: Cost vs accuracy
+def plot_cost_accuracy(records, cost=None, error=None, filename='mesh_fidelity.png'):
+    """
+    Plot the relative fuelburn error against the wall time of every level.
+    By default the optimization (driver_time, error_optimum) is plotted, or
+    the analysis and derivatives (totals_time, error_initial) for records of
+    fidelity_sweep(optimize=False).
+    """
+    import matplotlib.pyplot as plt
+
+    optimized = any('error_optimum' in r for r in records)
+    if cost is None:
+        cost = 'driver_time' if optimized else 'totals_time'
+    if error is None:
+        error = 'error_optimum' if optimized else 'error_initial'
+    records = [r for r in records if cost in r and error in r]
+
+    csfont = {'fontname':'times new roman','fontsize':20}
+    fig = plt.figure(figsize=(7,6),dpi=150)
+    for num_x in sorted(set(r['num_x'] for r in records)):
+        level = [r for r in records if r['num_x'] == num_x and r[error] > 0]
+        plt.loglog([r[cost] for r in level], [r[error] for r in level], 'o-',
+                   label='num_x = %d' % num_x)
+        for r in level:
+            plt.annotate('%d' % r['num_y'], (r[cost], r[error]), fontsize=10)
+    plt.xlabel('Wall time [s]',**csfont)
+    plt.ylabel('Relative fuelburn error',**csfont)
+    plt.legend()
+    fig.tight_layout()
+    fig.savefig(filename, dpi=400)
+    return fig
+
+
+if __name__ == "__main__":
+    records = fidelity_sweep()
+
+    import matplotlib.pyplot as plt
+    plot_cost_accuracy(records)
+    plt.show()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Recording overhead of the ScanEagle optimization.
+
+Runs the optimization of aerostruct_ScanEagle.py (taper=0.8 and a taper
+upper bound of 0.8) without a recorder, with
+the SqliteRecorder (includes=['*'] and derivatives, as in the course
+scripts), with CompressedRecorder and with AsyncCompressedRecorder, and
+prints the wall time, the recording overhead and the size of the file.
+"""
+
+## Part-0: Import required packages
+import os
+import sys
+import time
+
+import openmdao.api as om
+
+# mdao_tools lives in the root of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.recording import AsyncCompressedRecorder, CompressedRecorder
+from mdao_tools.scaneagle import DESIGN_VARS, build_scaneagle_problem, scaneagle_surface
+
+
+# Mesh-sized arrays that are only needed every few iterations
+DECIMATION = {'*def_mesh' : 5, '*mesh' : 5, '*loads' : 5, '*vonmises' : 5}
+
+# The configuration of aerostruct_ScanEagle.py
+DESIGN_VARS_TAPER = dict(DESIGN_VARS)
+DESIGN_VARS_TAPER['wing.taper'] = dict(lower=0.5, upper=0.8)
+
+
+def run(recorder=None, filename=None):
+    # No coloring cache, so that every case runs the same optimization
+    surface = scaneagle_surface(21, 3, taper=0.8)
+    prob = build_scaneagle_problem(surface, DESIGN_VARS_TAPER, tol=1e-7, recorder=recorder,
+                                   setup=False)
+    if recorder is not None:
+        prob.driver.recording_options['record_derivatives'] = True
+        prob.driver.recording_options['includes'] = ['*']
+    prob.driver.options['disp'] = False
+    prob.setup()
+    prob.set_solver_print(level=0)
+
+    t0 = time.perf_counter()
+    prob.run_driver()
+    prob.cleanup()
+    wall_time = time.perf_counter() - t0
+
+    size = os.path.getsize(filename) if filename else 0
+    return wall_time, size, prob.driver.iter_count
+
+
+if __name__ == "__main__":
+    cases = [('no recorder', lambda: (None, None)),
+             ('SqliteRecorder', lambda: (om.SqliteRecorder('rec_sqlite.db'), 'rec_sqlite.db')),
+             ('CompressedRecorder', lambda: (CompressedRecorder('rec_compressed.db', DECIMATION),
+                                             'rec_compressed.db')),
+             ('AsyncCompressedRecorder', lambda: (AsyncCompressedRecorder('rec_async.db', DECIMATION),
+                                                  'rec_async.db'))]
+
+    results = {}
+    for name, make in cases:
+        recorder, filename = make()
+        results[name] = run(recorder, filename)
+        if isinstance(recorder, CompressedRecorder):
+            recorder.report()
+
+    base = results['no recorder'][0]
+    print('\n%-26s %10s %12s %12s %12s' % ('recorder', 'time [s]', 'overhead [s]', 'file [kB]',
+                                          'iterations'))
+    for name, (wall_time, size, iterations) in results.items():
+        print('%-26s %10.2f %12.2f %12.1f %12d' % (name, wall_time, wall_time - base,
+                                                   size / 1024., iterations))
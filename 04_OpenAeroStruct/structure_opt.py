@@ -46,63 +46,77 @@ surf_dict = {
             }
 
 
-## Part-2: Initialize your problem and add flow conditions ------------
-# Create the problem and assign the model group
-prob = om.Problem()
+def run(visualize=False):
+    """
+    Minimize the structural mass of the CRM spar under fixed loads with the
+    thickness and return the optimum. visualize=True opens the N2 diagram and
+    the wing plot.
+    """
+    ## Part-2: Initialize your problem and add flow conditions ------------
+    # Create the problem and assign the model group
+    prob = om.Problem()
 
-ny = surf_dict['mesh'].shape[1]
-indep_var_comp = om.IndepVarComp()
-indep_var_comp.add_output('loads', val=np.ones((ny, 6)) * 2e5, units='N')
-indep_var_comp.add_output('load_factor', val=1.)
+    ny = surf_dict['mesh'].shape[1]
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output('loads', val=np.ones((ny, 6)) * 2e5, units='N')
+    indep_var_comp.add_output('load_factor', val=1.)
 
-struct_group = SpatialBeamAlone(surface=surf_dict)
+    struct_group = SpatialBeamAlone(surface=surf_dict)
 
-# Add indep_vars to the structural group
-struct_group.add_subsystem('indep_vars',indep_var_comp,promotes=['*'])
+    # Add indep_vars to the structural group
+    struct_group.add_subsystem('indep_vars',indep_var_comp,promotes=['*'])
 
-prob.model.add_subsystem(surf_dict['name'], struct_group)
+    prob.model.add_subsystem(surf_dict['name'], struct_group)
 
 
-## Part-3: Add your design variables, constraints, and objective
-# Import the Scipy Optimizer and set the driver of the problem to use
-# it, which defaults to an SLSQP optimization method
-prob.driver = om.ScipyOptimizeDriver()
-prob.driver.options['disp'] = True
-prob.driver.options['tol'] = 1e-9
+    ## Part-3: Add your design variables, constraints, and objective
+    # Import the Scipy Optimizer and set the driver of the problem to use
+    # it, which defaults to an SLSQP optimization method
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options['disp'] = True
+    prob.driver.options['tol'] = 1e-9
 
-recorder = om.SqliteRecorder('struct.db')
-prob.driver.add_recorder(recorder)
-prob.driver.recording_options['record_derivatives'] = True
-prob.driver.recording_options['includes'] = ['*']
+    recorder = om.SqliteRecorder('struct.db')
+    prob.driver.add_recorder(recorder)
+    prob.driver.recording_options['record_derivatives'] = True
+    prob.driver.recording_options['includes'] = ['*']
 
-# Setup problem and add design variables, constraint, and objective
-prob.model.add_design_var('wing.thickness_cp', lower=0.01, upper=0.5, ref=1e-1)
-prob.model.add_constraint('wing.failure', upper=0.)
-prob.model.add_constraint('wing.thickness_intersects', upper=0.)
+    # Setup problem and add design variables, constraint, and objective
+    prob.model.add_design_var('wing.thickness_cp', lower=0.01, upper=0.5, ref=1e-1)
+    prob.model.add_constraint('wing.failure', upper=0.)
+    prob.model.add_constraint('wing.thickness_intersects', upper=0.)
 
-# Add design variables, constraisnt, and objective on the problem
-prob.model.add_objective('wing.structural_mass', scaler=1e-5)
+    # Add design variables, constraisnt, and objective on the problem
+    prob.model.add_objective('wing.structural_mass', scaler=1e-5)
 
 
-## Part-4: Set up and run the optimization problem 
-# Set up the problem
-prob.setup(force_alloc_complex=False)
+    ## Part-4: Set up and run the optimization problem 
+    # Set up the problem
+    prob.setup(force_alloc_complex=False)
 
-# prob.run_model()
-# prob.check_partials(compact_print=False, method='fd')
-# exit()
-prob.run_driver()
+    # prob.run_model()
+    # prob.check_partials(compact_print=False, method='fd')
+    # exit()
+    prob.run_driver()
 
-print('wing.radius:',prob['wing.radius'])
-print('Structural_mass (obj):',prob['wing.structural_mass'][0])
-print('Thickness_cp (x):',prob['wing.thickness_cp'])
+    print('wing.radius:',prob['wing.radius'])
+    print('Structural_mass (obj):',prob['wing.structural_mass'][0])
+    print('Thickness_cp (x):',prob['wing.thickness_cp'])
 
 
-# Part-5: Generate N2 diagram
-from openmdao.api import n2; n2(prob)
+    if visualize:
+        # Part-5: Generate N2 diagram
+        from openmdao.api import n2; n2(prob)
 
-# Part-6: visualization 
-from openaerostruct.utils.plot_wing import disp_plot
-args = [[], []]
-args[1] = 'struct.db'
-disp_plot(args=args)
\ No newline at end of file
+        # Part-6: visualization 
+        from openaerostruct.utils.plot_wing import disp_plot
+        args = [[], []]
+        args[1] = 'struct.db'
+        disp_plot(args=args)
+
+    return {'structural_mass' : prob['wing.structural_mass'][0],
+            'thickness_cp' : prob['wing.thickness_cp'].copy()}
+
+
+if __name__ == "__main__":
+    run(visualize=True)
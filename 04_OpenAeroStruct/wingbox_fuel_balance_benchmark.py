@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the two fuel-mass formulations of the uCRM wingbox problem.
+
+In aerostruct_wingbox.py fuel_mass is a design variable and
+fuel_diff = (fuel_mass - fuelburn) / fuelburn an equality constraint, so SLSQP
+has to enforce a pure consistency condition. With fuel_balance=True a
+BalanceComp keeps fuel_mass equal to the fuel burn at every model evaluation
+(see mdao_tools/wingbox.py), which removes one design variable and one
+equality constraint. The balance and the cruise point AS_point_0 are in the
+group fuel_cycle with its own Newton and DirectSolver, so only the Jacobian of
+that group is factorized and the maneuver points run once per evaluation. Both
+are optimized from the same starting point and the optimizer iterations, wall
+times and optima compared.
+"""
+
+## Part-0: Import required packages
+import os
+import sys
+import time
+
+# mdao_tools lives in the root of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.wingbox import build_wingbox_problem
+
+
+## Part-1: One optimization
+def run(fuel_balance=False, tol=1e-2):
+    """
+    Optimize the wingbox problem with one of the formulations.
+
+    Returns a dict with the setup and run_driver wall times, the number of
+    driver iterations, whether the driver failed, and the fuel burn, fuel
+    mass and fuel_diff at the optimum.
+    """
+    t0 = time.perf_counter()
+    prob = build_wingbox_problem(tol=tol, fuel_balance=fuel_balance)
+    prob.set_solver_print(level=0)
+    prob.driver.options['disp'] = False
+    prob.final_setup()
+    setup_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    failed = prob.run_driver()
+    run_time = time.perf_counter() - t0
+
+    return {'setup_time' : setup_time,
+            'run_time' : run_time,
+            'iterations' : prob.driver.iter_count,
+            'failed' : bool(failed),
+            'fuelburn' : prob.get_val('AS_point_0.fuelburn')[0],
+            'fuel_mass' : prob.get_val('fuel_mass')[0],
+            'fuel_diff' : prob.get_val('fuel_diff')[0]}
+
+
+## Part-2: Comparison
+def benchmark(tol=1e-2):
+    cases = [('design variable + fuel_diff constraint', False),
+             ('BalanceComp + Newton (fuel_cycle)', True)]
+
+    print('%-40s %10s %10s %10s %8s %14s %12s'
+          % ('formulation', 'setup [s]', 'run [s]', 'iterations', 'failed', 'fuelburn [kg]',
+             'fuel_diff'))
+    results = {}
+    for label, fuel_balance in cases:
+        res = run(fuel_balance, tol)
+        results[label] = res
+        print('%-40s %10.2f %10.2f %10d %8s %14.1f %12.2e'
+              % (label, res['setup_time'], res['run_time'], res['iterations'],
+                 res['failed'], res['fuelburn'], res['fuel_diff']))
+
+    ref, bal = [results[label] for label, fuel_balance in cases]
+    print('\nspeedup of run_driver: %.2f, relative fuel burn difference: %.2e'
+          % (ref['run_time'] / bal['run_time'],
+             (bal['fuelburn'] - ref['fuelburn']) / ref['fuelburn']))
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Multipoint benchmark for the uCRM wingbox model.
+
+The AerostructPoint groups only depend on the wing geometry, not on each
+other, so they can be evaluated concurrently:
+
+    - under MPI (mpirun -n 4 python wingbox_multipoint_benchmark.py) the
+      points are put in a ParallelGroup and distributed over the ranks;
+    - without MPI every point is evaluated in its own single-point model in
+      a local process pool. This is an analysis-only mode: the points are
+      independent models, so there are no coupled total derivatives.
+
+Both are compared with the sequential model for 2, 4 and 8 flight points.
+setup_scaling times the model construction, setup and final_setup for up to
+40 flight points.
+"""
+
+## Part-0: Import required packages
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from openmdao.utils.mpi import MPI
+
+# mdao_tools lives in the root of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.wingbox import build_wingbox_problem, flight_points
+
+
+# Outputs compared for every flight point
+OUTPUTS = ('CL', 'CD', 'L_equals_W', 'wing_perf.failure')
+
+
+## Part-1: Multipoint model
+def run_multipoint(conditions, parallel=False, alpha_maneuver=2.):
+    """
+    Set up and run the model with all flight points.
+
+    Returns the setup and run_model wall times and the OUTPUTS of every
+    point as an array of shape (num_points, len(OUTPUTS)).
+    """
+    num_points = len(conditions['Mach_number'])
+
+    t0 = time.perf_counter()
+    prob = build_wingbox_problem(conditions=conditions, parallel=parallel)
+    prob.set_solver_print(level=0)
+    prob.final_setup()
+    setup_time = time.perf_counter() - t0
+
+    prob.set_val('alpha_maneuver', alpha_maneuver * np.ones(num_points - 1))
+
+    t0 = time.perf_counter()
+    prob.run_model()
+    run_time = time.perf_counter() - t0
+
+    # get_val gathers the outputs of points that live on other ranks
+    values = np.array([[prob.get_val('AS_point_%d.%s' % (i, name), get_remote=True)[0]
+                        for name in OUTPUTS] for i in range(num_points)])
+    return setup_time, run_time, values
+
+
+## Part-2: Local process pool
+def _run_single_point(args):
+    """
+    Evaluate one flight point in its own single-point model.
+    """
+    conditions, alpha = args
+
+    prob = build_wingbox_problem(conditions=conditions)
+    prob.set_solver_print(level=0)
+    prob.set_val('alpha', alpha)
+    prob.run_model()
+    return [prob.get_val('AS_point_0.%s' % name)[0] for name in OUTPUTS]
+
+
+def run_points_pool(conditions, num_workers=None, alpha=0., alpha_maneuver=2.):
+    """
+    Evaluate every flight point in a separate process.
+
+    Returns the wall time (including the setup in every worker) and the
+    OUTPUTS of every point.
+    """
+    num_points = len(conditions['Mach_number'])
+    tasks = []
+    for i in range(num_points):
+        point = {key : val[i:i + 1] for key, val in conditions.items()}
+        tasks.append((point, alpha if i == 0 else alpha_maneuver))
+
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(num_workers, num_points)) as pool:
+        values = np.array(list(pool.map(_run_single_point, tasks)))
+    return time.perf_counter() - t0, values
+
+
+## Part-3: Benchmark
+def benchmark(point_counts=(2, 4, 8)):
+    use_mpi = MPI is not None and MPI.COMM_WORLD.size > 1
+    rank = MPI.COMM_WORLD.rank if use_mpi else 0
+
+    for num_points in point_counts:
+        conditions = flight_points(num_points)
+        setup_seq, run_seq, values_seq = run_multipoint(conditions)
+
+        if use_mpi:
+            setup_par, run_par, values_par = run_multipoint(conditions, parallel=True)
+            label = 'ParallelGroup, %d ranks' % MPI.COMM_WORLD.size
+            time_seq, time_par = run_seq, run_par
+        else:
+            time_par, values_par = run_points_pool(conditions)
+            label = 'process pool, %d workers' % min(os.cpu_count() or 1, num_points)
+            # The pool time includes the setup of the models in the workers
+            time_seq = setup_seq + run_seq
+
+        if rank == 0:
+            print('%d flight points: sequential %.2f s, %s %.2f s, speedup %.2f, '
+                  'max difference %.2e'
+                  % (num_points, time_seq, label, time_par, time_seq / time_par,
+                     np.max(np.abs(values_par - values_seq))))
+
+
+## Part-4: Setup time vs number of flight points
+def setup_scaling(point_counts=(2, 5, 10, 20, 40)):
+    print('\n%8s %12s %12s %16s' % ('points', 'build [s]', 'setup [s]', 'final_setup [s]'))
+    for num_points in point_counts:
+        t0 = time.perf_counter()
+        prob = build_wingbox_problem(conditions=flight_points(num_points), setup=False)
+        t1 = time.perf_counter()
+        prob.setup()
+        t2 = time.perf_counter()
+        prob.final_setup()
+        t3 = time.perf_counter()
+        print('%8d %12.3f %12.3f %16.3f' % (num_points, t1 - t0, t2 - t1, t3 - t2))
+
+
+if __name__ == "__main__":
+    benchmark()
+    setup_scaling()
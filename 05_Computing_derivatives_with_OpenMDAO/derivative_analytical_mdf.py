@@ -96,110 +96,125 @@ class ProcessMDA(om.Group):
         self.add_subsystem('con_cmp2', om.ExecComp('con2 = g2'), promotes=['con2', 'g2'])
         
         
-# Part 4: Build the model and problem for optimization
-prob = om.Problem()
-prob.model = ProcessMDA()
-
-# Part 5: Setup optimizer
-prob.driver = om.ScipyOptimizeDriver()
-prob.driver.options['optimizer'] = 'SLSQP'
-# prob.driver.options['maxiter'] = 100
-prob.driver.options['tol'] = 1e-8
-
-# Part 6: Provide bounds and objective function
-prob.model.add_design_var('x1', lower=-4, upper=4)
-prob.model.add_design_var('x2', lower=-4, upper=4)
-prob.model.add_design_var('x3', lower=-4, upper=4)
-prob.model.add_objective('obj')
-prob.model.add_constraint('con1', upper=0)
-prob.model.add_constraint('con2', upper=0)
-
-prob.setup()
-prob.set_solver_print(level=0)
-
-
-# Part 7: Run model with initial values
-print('\nSingle evaluation')
-prob['x1'] = 2.
-prob['x2'] = 2.
-prob['x3'] = 2.
-prob.run_model()
-print('x1 :',prob['x1'])
-print('x2 :',prob['x2'])
-print('x3 :',prob['x3'])
-print('y21 :',prob['y21'])
-print('y12 :',prob['y12'])
-print('g1 :',prob['g1'])
-print('g2 :',prob['g2'])
-print('obj :',prob['obj'][0])
-print('\n')
-
-
-# Part 10: Compute derivatives
-totals = prob.compute_totals(of=['obj', 'y21', 'y12', 'g1', 'g2'], wrt=['x1', 'x2', 'x3'])
-print('  df/dx1 :', totals['obj', 'x1'][0][0])
-print('  df/dx2 :', totals['obj', 'x2'][0][0])
-print('  df/dx3 :', totals['obj', 'x3'][0][0])
-print('dy21/dx1 :', totals['y21', 'x1'][0][0])
-print('dy21/dx2 :', totals['y21', 'x2'][0][0])
-print('dy21/dx3 :', totals['y21', 'x3'][0][0])
-print('dy12/dx1 :', totals['y12', 'x1'][0][0])
-print('dy12/dx2 :', totals['y12', 'x2'][0][0])
-print('dy12/dx3 :', totals['y12', 'x3'][0][0])
-print(' dg1/dx1 :', totals['g1', 'x1'][0][0])
-print(' dg1/dx2 :', totals['g1', 'x2'][0][0])
-print(' dg1/dx3 :', totals['g1', 'x3'][0][0])
-print(' dg2/dx1 :', totals['g2', 'x1'][0][0])
-print(' dg2/dx2 :', totals['g2', 'x2'][0][0])
-print(' dg2/dx3 :', totals['g2', 'x3'][0][0])
-
-
-# Part 8: Run optimization and print outputs
-# Ask OpenMDAO to finite-difference across the model to compute the gradients for the optimizer
-prob.model.approx_totals()
-prob.run_driver()
-# ---------------------------
-print('minimum found at')
-print('x1 :',prob['x1'])
-print('x2 :',prob['x2'])
-print('x3 :',prob['x3'])
-print('y21 :',prob['y21'])
-print('y12 :',prob['y12'])
-print('g1 :',prob['g1'])
-print('g2 :',prob['g2'])
-print('minumum objective')
-print('obj :',prob['obj'][0])
-print('\n')
-
-
-# Part 9: Generate N2 diagram
-from openmdao.api import n2
-n2(prob)
-
-
-# Part 10: Compute derivatives
-totals = prob.compute_totals(of=['obj', 'y21', 'y12', 'g1', 'g2'], wrt=['x1', 'x2', 'x3'])
-print('  df/dx1 :', totals['obj', 'x1'][0][0])
-print('  df/dx2 :', totals['obj', 'x2'][0][0])
-print('  df/dx3 :', totals['obj', 'x3'][0][0])
-print('dy21/dx1 :', totals['y21', 'x1'][0][0])
-print('dy21/dx2 :', totals['y21', 'x2'][0][0])
-print('dy21/dx3 :', totals['y21', 'x3'][0][0])
-print('dy12/dx1 :', totals['y12', 'x1'][0][0])
-print('dy12/dx2 :', totals['y12', 'x2'][0][0])
-print('dy12/dx3 :', totals['y12', 'x3'][0][0])
-print(' dg1/dx1 :', totals['g1', 'x1'][0][0])
-print(' dg1/dx2 :', totals['g1', 'x2'][0][0])
-print(' dg1/dx3 :', totals['g1', 'x3'][0][0])
-print(' dg2/dx1 :', totals['g2', 'x1'][0][0])
-print(' dg2/dx2 :', totals['g2', 'x2'][0][0])
-print(' dg2/dx3 :', totals['g2', 'x3'][0][0])
-## Alternative print options
-# totals = prob.compute_totals(of=['obj', 'y21', 'y12', 'g1', 'g2'], wrt=['x1', 'x2', 'x3'], return_format='dict')
-# print(totals['obj'])
-# print(totals['y21'])
-# print(totals['y12'])
-# print(totals['g1'])
-# print(totals['g2'])
-# totals = prob.compute_totals(of=['obj', 'y21', 'y12', 'g1', 'g2'], wrt=['x1', 'x2', 'x3'], return_format='array')
-# print(totals)
\ No newline at end of file
+def run(visualize=False):
+    """
+    Evaluate the MDA and its total derivatives at x=(2, 2, 2), minimize obj
+    with SLSQP and return the optimum and the total derivatives there.
+    visualize=True opens the N2 diagram.
+    """
+    # Part 4: Build the model and problem for optimization
+    prob = om.Problem()
+    prob.model = ProcessMDA()
+
+    # Part 5: Setup optimizer
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options['optimizer'] = 'SLSQP'
+    # prob.driver.options['maxiter'] = 100
+    prob.driver.options['tol'] = 1e-8
+
+    # Part 6: Provide bounds and objective function
+    prob.model.add_design_var('x1', lower=-4, upper=4)
+    prob.model.add_design_var('x2', lower=-4, upper=4)
+    prob.model.add_design_var('x3', lower=-4, upper=4)
+    prob.model.add_objective('obj')
+    prob.model.add_constraint('con1', upper=0)
+    prob.model.add_constraint('con2', upper=0)
+
+    prob.setup()
+    prob.set_solver_print(level=0)
+
+
+    # Part 7: Run model with initial values
+    print('\nSingle evaluation')
+    prob['x1'] = 2.
+    prob['x2'] = 2.
+    prob['x3'] = 2.
+    prob.run_model()
+    print('x1 :',prob['x1'])
+    print('x2 :',prob['x2'])
+    print('x3 :',prob['x3'])
+    print('y21 :',prob['y21'])
+    print('y12 :',prob['y12'])
+    print('g1 :',prob['g1'])
+    print('g2 :',prob['g2'])
+    print('obj :',prob['obj'][0])
+    print('\n')
+
+
+    # Part 10: Compute derivatives
+    totals = prob.compute_totals(of=['obj', 'y21', 'y12', 'g1', 'g2'], wrt=['x1', 'x2', 'x3'])
+    print('  df/dx1 :', totals['obj', 'x1'][0][0])
+    print('  df/dx2 :', totals['obj', 'x2'][0][0])
+    print('  df/dx3 :', totals['obj', 'x3'][0][0])
+    print('dy21/dx1 :', totals['y21', 'x1'][0][0])
+    print('dy21/dx2 :', totals['y21', 'x2'][0][0])
+    print('dy21/dx3 :', totals['y21', 'x3'][0][0])
+    print('dy12/dx1 :', totals['y12', 'x1'][0][0])
+    print('dy12/dx2 :', totals['y12', 'x2'][0][0])
+    print('dy12/dx3 :', totals['y12', 'x3'][0][0])
+    print(' dg1/dx1 :', totals['g1', 'x1'][0][0])
+    print(' dg1/dx2 :', totals['g1', 'x2'][0][0])
+    print(' dg1/dx3 :', totals['g1', 'x3'][0][0])
+    print(' dg2/dx1 :', totals['g2', 'x1'][0][0])
+    print(' dg2/dx2 :', totals['g2', 'x2'][0][0])
+    print(' dg2/dx3 :', totals['g2', 'x3'][0][0])
+
+
+    # Part 8: Run optimization and print outputs
+    # Ask OpenMDAO to finite-difference across the model to compute the gradients for the optimizer
+    prob.model.approx_totals()
+    prob.run_driver()
+    # ---------------------------
+    print('minimum found at')
+    print('x1 :',prob['x1'])
+    print('x2 :',prob['x2'])
+    print('x3 :',prob['x3'])
+    print('y21 :',prob['y21'])
+    print('y12 :',prob['y12'])
+    print('g1 :',prob['g1'])
+    print('g2 :',prob['g2'])
+    print('minumum objective')
+    print('obj :',prob['obj'][0])
+    print('\n')
+
+
+    if visualize:
+        # Part 9: Generate N2 diagram
+        from openmdao.api import n2
+        n2(prob)
+
+
+    # Part 10: Compute derivatives
+    totals = prob.compute_totals(of=['obj', 'y21', 'y12', 'g1', 'g2'], wrt=['x1', 'x2', 'x3'])
+    print('  df/dx1 :', totals['obj', 'x1'][0][0])
+    print('  df/dx2 :', totals['obj', 'x2'][0][0])
+    print('  df/dx3 :', totals['obj', 'x3'][0][0])
+    print('dy21/dx1 :', totals['y21', 'x1'][0][0])
+    print('dy21/dx2 :', totals['y21', 'x2'][0][0])
+    print('dy21/dx3 :', totals['y21', 'x3'][0][0])
+    print('dy12/dx1 :', totals['y12', 'x1'][0][0])
+    print('dy12/dx2 :', totals['y12', 'x2'][0][0])
+    print('dy12/dx3 :', totals['y12', 'x3'][0][0])
+    print(' dg1/dx1 :', totals['g1', 'x1'][0][0])
+    print(' dg1/dx2 :', totals['g1', 'x2'][0][0])
+    print(' dg1/dx3 :', totals['g1', 'x3'][0][0])
+    print(' dg2/dx1 :', totals['g2', 'x1'][0][0])
+    print(' dg2/dx2 :', totals['g2', 'x2'][0][0])
+    print(' dg2/dx3 :', totals['g2', 'x3'][0][0])
+    ## Alternative print options
+    # totals = prob.compute_totals(of=['obj', 'y21', 'y12', 'g1', 'g2'], wrt=['x1', 'x2', 'x3'], return_format='dict')
+    # print(totals['obj'])
+    # print(totals['y21'])
+    # print(totals['y12'])
+    # print(totals['g1'])
+    # print(totals['g2'])
+    # totals = prob.compute_totals(of=['obj', 'y21', 'y12', 'g1', 'g2'], wrt=['x1', 'x2', 'x3'], return_format='array')
+    # print(totals)
+
+    return {'x' : [prob['x1'][0], prob['x2'][0], prob['x3'][0]],
+            'obj' : prob['obj'][0],
+            'totals' : {'%s/%s' % key : val[0][0] for key, val in totals.items()}}
+
+
+if __name__ == "__main__":
+    run(visualize=True)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Analytical MDF problem with analytic partials and adjoint (reverse) totals.
+
+derivative_analytical_mdf.py finite-differences Analysis1 and Analysis2 inside
+the NonlinearBlockGS cycle and then approximates the totals across the whole
+model. Here both analyses provide analytic partials and the cycle gets a
+LinearBlockGS or DirectSolver linear solver, so compute_totals solves the
+coupled linear system in reverse (adjoint) mode: one solve per output,
+independent of the number of design variables.
+
+To study the cost scaling the design variables are a vector x = [x1, x2, x3,
+x4, ..., xN]. The extra variables x4..xN enter both couplings with weight 1/N
+and the objective as x_k**2; for N = 3 the problem is the original one.
+"""
+# Part 1: Import required packages
+import time
+
+import numpy as np
+import openmdao.api as om
+
+
+# Part 2: Create new components for Analysis1 and 2
+class Analysis1(om.ExplicitComponent):
+    """
+    Component containing Discipline1 and Constraint1 -- with derivatives
+    """
+    def initialize(self):
+        self.options.declare('num_x', types=int, default=3, desc='Number of design variables (>= 3)')
+
+    def setup(self):
+        n = self.options['num_x']
+
+        # Global Design Variable
+        self.add_input('x', val=np.zeros(n))
+
+        # Coupling parameter
+        self.add_input('y12', val=1.0)
+
+        # Coupling output
+        self.add_output('y21', val=1.0)
+        self.add_output('g1', val=1.0)
+
+    def setup_partials(self):
+        n = self.options['num_x']
+
+        # These partials are constant, so they are given once here.
+        dy21_dx = np.zeros((1, n))
+        dy21_dx[0, :2] = 1.
+        dy21_dx[0, 3:] = 1. / n
+        self.declare_partials('y21', 'x', val=dy21_dx)
+
+        dg1_dx = np.zeros((1, n))
+        dg1_dx[0, 0] = 3./4
+        self.declare_partials('g1', 'x', val=dg1_dx)
+        self.declare_partials('g1', 'y12', val=1./2)
+
+    def compute(self, inputs, outputs):
+        """
+        Evaluate y21, g1
+        """
+        x = inputs['x']
+        n = self.options['num_x']
+        y12 = inputs['y12']
+
+        outputs['y21'] = x[0] + x[1] + np.sum(x[3:]) / n
+        outputs['g1']  = y12/2 + 3*x[0]/4  +1
+
+
+class Analysis2(om.ExplicitComponent):
+    """
+    Component containing Discipline2 and Constraint2 -- with derivatives
+    """
+    def initialize(self):
+        self.options.declare('num_x', types=int, default=3, desc='Number of design variables (>= 3)')
+
+    def setup(self):
+        n = self.options['num_x']
+
+        # Global Design Variable
+        self.add_input('x', val=np.zeros(n))
+
+        # Coupling parameter
+        self.add_input('y21', val=1.0)
+
+        # Coupling output
+        self.add_output('y12', val=1.0)
+        self.add_output('g2',  val=1.0)
+
+    def setup_partials(self):
+        n = self.options['num_x']
+
+        dy12_dx = np.zeros((1, n))
+        dy12_dx[0, 0] = 1./2
+        dy12_dx[0, 1] = 1.
+        dy12_dx[0, 3:] = 1. / n
+        self.declare_partials('y12', 'x', val=dy12_dx)
+
+        dg2_dx = np.zeros((1, n))
+        dg2_dx[0, 0] = -1.
+        dg2_dx[0, 2] = 1.
+        self.declare_partials('g2', 'x', val=dg2_dx)
+        self.declare_partials('g2', 'y21', val=-1.)
+
+    def compute(self, inputs, outputs):
+        """
+        Evaluate y12, g2
+        """
+        x = inputs['x']
+        n = self.options['num_x']
+        y21 = inputs['y21']
+
+        outputs['y12'] = x[0]/2 + x[1] + np.sum(x[3:]) / n
+        outputs['g2'] = -y21 -x[0] + x[2]
+
+
+# Part 3: Create group MDA
+class ProcessMDA(om.Group):
+    """
+    Group containing MDA
+    """
+    def initialize(self):
+        self.options.declare('num_x', types=int, default=3, desc='Number of design variables (>= 3)')
+        self.options.declare('linear_solver', default='direct', values=['direct', 'lbgs'],
+                             desc='Linear solver of the cycle for the total derivatives')
+
+    def setup(self):
+        n = self.options['num_x']
+
+        indeps = self.add_subsystem('indeps', om.IndepVarComp(), promotes=['*'])
+        indeps.add_output('x', np.ones(n))
+
+        cycle = self.add_subsystem('cycle', om.Group(), promotes=['*'])
+        cycle.add_subsystem('d1', Analysis1(num_x=n), promotes_inputs=['x','y12'],promotes_outputs=['y21','g1'])
+        cycle.add_subsystem('d2', Analysis2(num_x=n), promotes_inputs=['x','y21'],promotes_outputs=['y12','g2'])
+
+        # Nonlinear Block Gauss Seidel is a gradient free solver
+        cycle.nonlinear_solver = om.NonlinearBlockGS()
+
+        # The linear solver converges the coupled derivatives of the cycle
+        if self.options['linear_solver'] == 'direct':
+            cycle.linear_solver = om.DirectSolver()
+        else:
+            cycle.linear_solver = om.LinearBlockGS()
+
+        self.add_subsystem('obj_cmp', om.ExecComp('obj = sum(x**2)', x=np.zeros(n)),
+                           promotes=['x','obj'])
+
+        self.add_subsystem('con_cmp1', om.ExecComp('con1 = g1'), promotes=['con1', 'g1'])
+        self.add_subsystem('con_cmp2', om.ExecComp('con2 = g2'), promotes=['con2', 'g2'])
+
+
+# Part 4: Build the model and problem
+def build_problem(num_x=3, mode='rev', linear_solver='direct', approx=False):
+    """
+    Optimization problem of derivative_analytical_mdf.py with num_x design
+    variables. mode is the derivative direction of prob.setup; with approx=True
+    the totals are finite-differenced across the model as in the original.
+    """
+    prob = om.Problem()
+    prob.model = ProcessMDA(num_x=num_x, linear_solver=linear_solver)
+
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options['optimizer'] = 'SLSQP'
+    prob.driver.options['tol'] = 1e-8
+    prob.driver.options['disp'] = False
+
+    prob.model.add_design_var('x', lower=-4, upper=4)
+    prob.model.add_objective('obj')
+    prob.model.add_constraint('con1', upper=0)
+    prob.model.add_constraint('con2', upper=0)
+
+    if approx:
+        prob.model.approx_totals()
+
+    prob.setup(mode=mode)
+    prob.set_solver_print(level=0)
+    return prob
+
+
+# Part 5: Timing harness
+def time_totals(prob, repeats=20):
+    """
+    Best wall time of compute_totals for the objective and constraints.
+    """
+    times = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        prob.compute_totals()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def scaling_study(sizes=(3, 10, 30, 100, 300, 1000), repeats=20):
+    """
+    Time compute_totals against the number of design variables for
+    finite differences, forward mode and reverse (adjoint) mode.
+    """
+    cases = [('FD approx_totals', dict(mode='fwd', approx=True)),
+             ('fwd, DirectSolver', dict(mode='fwd', linear_solver='direct')),
+             ('rev, DirectSolver', dict(mode='rev', linear_solver='direct')),
+             ('rev, LinearBlockGS', dict(mode='rev', linear_solver='lbgs'))]
+
+    results = {name : [] for name, kwargs in cases}
+    for n in sizes:
+        for name, kwargs in cases:
+            prob = build_problem(n, **kwargs)
+            prob.set_val('x', 2.*np.ones(n))
+            prob.run_model()
+            results[name].append(time_totals(prob, repeats))
+
+    print('\ncompute_totals wall time [ms] vs number of design variables')
+    print('%-20s' % 'N' + ''.join('%12d' % n for n in sizes))
+    for name, times in results.items():
+        print('%-20s' % name + ''.join('%12.3f' % (1e3 * t) for t in times))
+
+    return sizes, results
+
+
+def run(visualize=False, sizes=(3, 10, 30, 100, 300, 1000)):
+    """
+    Adjoint derivatives and optimization of the original problem, then the
+    compute_totals cost scaling for the given numbers of design variables.
+    There is nothing to visualize here.
+    """
+    # Part 6: Single evaluation and adjoint derivatives of the original problem
+    prob = build_problem(3, mode='rev')
+    prob.set_val('x', [2., 2., 2.])
+    prob.run_model()
+    print('\nSingle evaluation')
+    print('x :',prob['x'])
+    print('y21 :',prob['y21'])
+    print('y12 :',prob['y12'])
+    print('g1 :',prob['g1'])
+    print('g2 :',prob['g2'])
+    print('obj :',prob['obj'][0])
+
+    totals = prob.compute_totals(of=['obj', 'y21', 'y12', 'g1', 'g2'], wrt=['x'])
+    for of in ['obj', 'y21', 'y12', 'g1', 'g2']:
+        print('d%s/dx :' % of, totals[of, 'x'][0])
+
+    # Compare the analytic partials with finite differences
+    prob.check_partials(compact_print=True)
+
+    # Part 7: Optimization with adjoint derivatives
+    prob.run_driver()
+    print('\nminimum found at')
+    print('x :',prob['x'])
+    print('obj :',prob['obj'][0])
+
+    # Part 8: Cost scaling with the number of design variables
+    sizes, times = scaling_study(sizes)
+
+    return {'x' : prob['x'].copy(), 'obj' : prob['obj'][0], 'sizes' : sizes, 'totals_time' : times}
+
+
+if __name__ == "__main__":
+    run()
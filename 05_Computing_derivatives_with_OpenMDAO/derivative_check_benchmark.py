@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Derivative check benchmark for the OpenAeroStruct models of the course.
+
+For the ScanEagle tube model and the uCRM wingbox model this script
+
+    - runs check_partials and check_totals with forward finite differences,
+      central finite differences and complex step, and times each check,
+    - times the linearize of every component and flags the components that
+      dominate the linearize cost,
+    - writes everything to derivative_check_report.json, so that reports
+      from different OpenMDAO/OpenAeroStruct versions can be diffed.
+"""
+
+# Part 1: Import required packages
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import openmdao
+import openaerostruct
+from openmdao.core.component import Component
+
+# mdao_tools lives in the root of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.scaneagle import build_scaneagle_problem
+from mdao_tools.wingbox import build_wingbox_problem
+
+
+# Part 2: Models and check modes
+MODELS = {
+    'scaneagle_tube' : build_scaneagle_problem,
+    'ucrm_wingbox' : build_wingbox_problem,
+    }
+
+# name: (method, form)
+CHECKS = {
+    'fd_forward' : ('fd', 'forward'),
+    'fd_central' : ('fd', 'central'),
+    'cs' : ('cs', None),
+    }
+
+
+def build_model(name):
+    """
+    Set up a model of MODELS with complex step support and run it.
+    """
+    prob = MODELS[name](setup=False)
+    prob.setup(force_alloc_complex=True)
+    prob.set_solver_print(level=0)
+    prob.run_model()
+    return prob
+
+
+def _rel_error(meta):
+    """
+    Forward relative error of one check entry, or None if it is undefined
+    (zero reference derivative).
+    """
+    err = meta['rel error'][0]
+    return float(err) if np.isfinite(err) else None
+
+
+def _max(values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def _fmt(err):
+    return '-' if err is None else '%.2e' % err
+
+
+# Part 3: Derivative checks
+def time_check_partials(prob, method, form):
+    """
+    Run check_partials and return its wall time and the largest relative
+    error of every component.
+    """
+    kwargs = dict(method=method, compact_print=True, out_stream=None)
+    if form is not None:
+        kwargs['form'] = form
+
+    t0 = time.perf_counter()
+    data = prob.check_partials(**kwargs)
+    wall_time = time.perf_counter() - t0
+
+    errors = {comp : _max(_rel_error(meta) for meta in subjacs.values())
+              for comp, subjacs in data.items()}
+    return wall_time, errors
+
+
+def time_check_totals(prob, method, form):
+    """
+    Run check_totals and return its wall time and the relative error of
+    every (of, wrt) pair.
+    """
+    kwargs = dict(method=method, out_stream=None)
+    if form is not None:
+        kwargs['form'] = form
+
+    t0 = time.perf_counter()
+    data = prob.check_totals(**kwargs)
+    wall_time = time.perf_counter() - t0
+
+    errors = {'%s wrt %s' % key : _rel_error(meta) for key, meta in data.items()}
+    return wall_time, errors
+
+
+# Part 4: Linearize cost per component
+def linearize_profile(prob, repeats=3, threshold=0.1):
+    """
+    Best wall time of run_linearize for every component.
+
+    Components that take more than threshold of the total linearize time are
+    flagged as dominant.
+    """
+    times = {}
+    for comp in prob.model.system_iter(recurse=True, typ=Component):
+        best = np.inf
+        for i in range(repeats):
+            t0 = time.perf_counter()
+            comp.run_linearize()
+            best = min(best, time.perf_counter() - t0)
+        times[comp.pathname] = best
+
+    total = sum(times.values())
+    profile = sorted(times.items(), key=lambda item: item[1], reverse=True)
+    dominant = [name for name, t in profile if t > threshold * total]
+
+    return {'total_time' : total,
+            'times' : dict(profile),
+            'dominant' : dominant}
+
+
+# Part 5: Report
+def benchmark(models=MODELS, checks=CHECKS, filename='derivative_check_report.json'):
+    report = {'versions' : {'openmdao' : openmdao.__version__,
+                            'openaerostruct' : getattr(openaerostruct, '__version__', None),
+                            'numpy' : np.__version__},
+              'models' : {}}
+
+    for name in models:
+        prob = build_model(name)
+        result = {'linearize' : linearize_profile(prob),
+                  'check_partials' : {},
+                  'check_totals' : {}}
+
+        for check, (method, form) in checks.items():
+            wall_time, errors = time_check_partials(prob, method, form)
+            result['check_partials'][check] = {'time' : wall_time,
+                                               'max_rel_error' : _max(errors.values()),
+                                               'components' : errors}
+
+            wall_time, errors = time_check_totals(prob, method, form)
+            result['check_totals'][check] = {'time' : wall_time,
+                                             'max_rel_error' : _max(errors.values()),
+                                             'totals' : errors}
+
+        report['models'][name] = result
+
+        print('\n%s' % name)
+        print('  linearize: %.3f s, dominant components:' % result['linearize']['total_time'])
+        for comp in result['linearize']['dominant']:
+            print('    %-60s %.4f s' % (comp, result['linearize']['times'][comp]))
+        print('  %-12s %16s %16s %16s %16s' % ('check', 'partials [s]', 'max rel error',
+                                               'totals [s]', 'max rel error'))
+        for check in checks:
+            partials = result['check_partials'][check]
+            totals = result['check_totals'][check]
+            print('  %-12s %16.3f %16s %16.3f %16s'
+                  % (check, partials['time'], _fmt(partials['max_rel_error']),
+                     totals['time'], _fmt(totals['max_rel_error'])))
+
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    return report
+
+
+if __name__ == "__main__":
+    benchmark()
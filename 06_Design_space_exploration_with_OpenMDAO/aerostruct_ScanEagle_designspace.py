@@ -17,273 +17,148 @@ Created on Tue Oct 20 19:21:19 2020
 ################################################################################
 
 ## Part- 0: Import required packages
+import os
+import sys
+
 import numpy as np
-from openaerostruct.geometry.utils import generate_mesh
-from openaerostruct.integration.aerostruct_groups import AerostructGeometry, AerostructPoint
 import openmdao.api as om
-from openaerostruct.utils.constants import grav_constant
 
+# mdao_tools lives in the root of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.scaneagle import DESIGN_VARS, build_scaneagle_problem, scaneagle_surface
 
-## Part- 1: Define mesh and surface
 # Total number of nodes to use in the spanwise (num_y) and
 # chordwise (num_x) directions. Vary these to change the level of fidelity.
 num_y = 21
 num_x = 3
 
-# Create a mesh dictionary to feed to generate_mesh to actually create
-# the mesh array.
-mesh_dict = {'num_y' : num_y,
-             'num_x' : num_x,
-             'wing_type' : 'rect',
-             'symmetry' : True,
-             'span_cos_spacing' : 0.5,
-             'span' : 3.11,
-             'root_chord' : 0.3,
-             }
-
-mesh = generate_mesh(mesh_dict)
-
-# Apply camber to the mesh
-camber = 1 - np.linspace(-1, 1, num_x) ** 2
-camber *= 0.3 * 0.05
-for ind_x in range(num_x):
-    mesh[ind_x, :, 2] = camber[ind_x]
-
-
-
-# Introduce geometry manipulation variables to define the ScanEagle shape
-zshear_cp = np.zeros(10)
-zshear_cp[0] = .3
-
-xshear_cp = np.zeros(10)
-xshear_cp[0] = .15
-
-chord_cp = np.ones(10)
-chord_cp[0] = .5
-chord_cp[-1] = 1.5
-chord_cp[-2] = 1.3
-
-radius_cp = 0.01  * np.ones(10)
-
-# Define wing parameters
-surface = {
-            # Wing definition
-            'name' : 'wing',        # name of the surface
-            'symmetry' : True,     # if true, model one half of wing
-                                    # reflected across the plane y = 0
-            'S_ref_type' : 'wetted', # how we compute the wing area,
-                                     # can be 'wetted' or 'projected'
-            'fem_model_type' : 'tube',
-
-            'taper' : 0.9,
-            'zshear_cp' : zshear_cp,
-            'xshear_cp' : xshear_cp,
-            'chord_cp' : chord_cp,
-            'sweep' : 20.,
-            'twist_cp' : np.array([6.08538593, 10., 5.]),  # twist control points(cp)
-            'thickness_cp' : np.ones((3))*.001,            # thickness control points(cp)
-
-            # Give OAS the radius and mesh from before
-            'radius_cp' : radius_cp,
-            'mesh' : mesh,
-
-            # Aerodynamic performance of the lifting surface at
-            # an angle of attack of 0 (alpha=0).
-            # These CL0 and CD0 values are added to the CL and CD
-            # obtained from aerodynamic analysis of the surface to get
-            # the total CL and CD.
-            # These CL0 and CD0 values do not vary wrt alpha.
-            'CL0' : 0.0,            # CL of the surface at alpha=0
-            'CD0' : 0.015,            # CD of the surface at alpha=0
-
-            # Airfoil properties for viscous drag calculation
-            'k_lam' : 0.05,         # percentage of chord with laminar
-                                    # flow, used for viscous drag
-            't_over_c_cp' : np.array([0.12]),      # thickness over chord ratio
-            'c_max_t' : .303,       # chordwise location of maximum (NACA0015)
-                                    # thickness
-            'with_viscous' : True,
-            'with_wave' : False,     # if true, compute wave drag
-
-            # Material properties taken from http://www.performance-composites.com/carbonfibre/mechanicalproperties_2.asp
-            'E' : 85.e9,
-            'G' : 25.e9,
-            'yield' : 350.e6,
-            'mrho' : 1.6e3,
-
-            'fem_origin' : 0.35,    # normalized chordwise location of the spar
-            'wing_weight_ratio' : 1., # multiplicative factor on the computed structural weight
-            'struct_weight_relief' : True,    # True to add the weight of the structure to the loads on the structure
-            'distributed_fuel_weight' : False,
-            # Constraints
-            'exact_failure_constraint' : False, # if false, use KS function
-            }
-
-#-----------------------------------------------------------------------------------#
-## Part-2: Initialize your problem and add flow and structural conditions ------------
-# Create the problem and assign the model group
-prob = om.Problem()
-
-# Add problem information as an independent variables component
-indep_var_comp = om.IndepVarComp()
-indep_var_comp.add_output('v', val=22.876, units='m/s')
-indep_var_comp.add_output('alpha', val=5., units='deg')
-indep_var_comp.add_output('Mach_number', val=0.071)
-indep_var_comp.add_output('re', val=1.e6, units='1/m')
-indep_var_comp.add_output('rho', val=0.770816, units='kg/m**3')
-indep_var_comp.add_output('CT', val=grav_constant * 8.6e-6, units='1/s')
-indep_var_comp.add_output('R', val=1800e3, units='m')
-indep_var_comp.add_output('W0', val=10.,  units='kg')
-indep_var_comp.add_output('speed_of_sound', val=322.2, units='m/s')
-indep_var_comp.add_output('load_factor', val=1.)
-indep_var_comp.add_output('empty_cg', val=np.array([0.2, 0., 0.]), units='m')
-
-prob.model.add_subsystem('prob_vars',indep_var_comp, promotes=['*'])
-
-# Add the AerostructGeometry group, which computes all the intermediary
-# parameters for the aero and structural analyses, like the structural
-# stiffness matrix and some aerodynamic geometry arrays
-aerostruct_group = AerostructGeometry(surface=surface)
-name = 'wing'
-
-# Add the group to the problem
-prob.model.add_subsystem(name, aerostruct_group)
-
-point_name = 'AS_point_0'
-
-# Create the aerostruct point group and add it to the model.
-# This contains all the actual aerostructural analyses.
-AS_point = AerostructPoint(surfaces=[surface])
-
-prob.model.add_subsystem(point_name, AS_point,
-    promotes_inputs=['v', 'alpha', 'Mach_number', 're', 'rho', 'CT', 'R',
-        'W0', 'speed_of_sound', 'empty_cg', 'load_factor'])
-
-# Issue quite a few connections within the model to make sure all of the
-# parameters are connected correctly.
-com_name = point_name + '.' + name + '_perf'
-prob.model.connect(name + '.local_stiff_transformed', point_name + '.coupled.' + name + '.local_stiff_transformed')
-prob.model.connect(name + '.nodes', point_name + '.coupled.' + name + '.nodes')
-
-# Connect aerodynamic mesh to coupled group mesh
-prob.model.connect(name + '.mesh', point_name + '.coupled.' + name + '.mesh')
-
-# Connect performance calculation variables
-prob.model.connect(name + '.radius', com_name + '.radius')
-prob.model.connect(name + '.thickness', com_name + '.thickness')
-prob.model.connect(name + '.nodes', com_name + '.nodes')
-prob.model.connect(name + '.cg_location', point_name + '.' + 'total_perf.' + name + '_cg_location')
-prob.model.connect(name + '.structural_mass', point_name + '.' + 'total_perf.' + name + '_structural_mass')
-prob.model.connect(name + '.t_over_c', com_name + '.t_over_c')
-
-
-#-----------------------------------------------------------------------------------#
-## Part-3: Setup optimizer, Add your design variables, constraints, and objective
-# Set the optimizer type
-prob.driver = om.ScipyOptimizeDriver()
-prob.driver.options['tol'] = 1e-7
-prob.driver.options['maxiter'] = 10   # there is possibility that constraint 
-                                      # may not always satisfy
-
-# Record data from this problem so we can visualize it using plot_wing
-recorder = om.SqliteRecorder("aerostruct.db")
-prob.driver.add_recorder(recorder)
-prob.driver.recording_options['record_derivatives'] = True
-prob.driver.recording_options['includes'] = ['*']
-
-# Setup problem and add design variables.
-# Here we're varying sweep,taper and alpha.
-# prob.model.add_design_var('wing.twist_cp', lower=-5., upper=10.)   
-# prob.model.add_design_var('wing.thickness_cp', lower=0.001, upper=0.01, scaler=1e3)
-# prob.model.add_design_var('wing.sweep', lower=10., upper=30.)
-# prob.model.add_design_var('wing.taper', lower=0.5, upper=1)
-prob.model.add_design_var('alpha', lower=-10., upper=10.)
-
-# Make sure the spar doesn't fail, we meet the lift needs, and the aircraft is trimmed through CM=0.
-prob.model.add_constraint('AS_point_0.wing_perf.failure', upper=0.)
-prob.model.add_constraint('AS_point_0.wing_perf.thickness_intersects', upper=0.)
-prob.model.add_constraint('AS_point_0.L_equals_W', equals=0.)
-# Instead of using an equality constraint here, we have to give it a little
-# wiggle room to make SLSQP work correctly.
-prob.model.add_constraint('AS_point_0.CM', lower=-0.001, upper=0.001)
-prob.model.add_constraint('wing.twist_cp', lower=np.array([-1e20, -1e20, 5.]), upper=np.array([1e20, 1e20, 5.]))
-
-# We're trying to minimize fuel burn
-prob.model.add_objective('AS_point_0.fuelburn', scaler=.1)
-
-# Set up the problem
-prob.setup()
-
-#-----------------------------------------------------------------------------------#
-## Part-5: Set up and run the optimization problem 
-prob.run_driver()
-print('\n after optimization ------------')
-print('wing.twist_cp',prob['wing.twist_cp'])
-print('wing.thickness_cp',prob['wing.thickness_cp'])
-print('alpha',prob['alpha'])
-print('wing.sweep',prob['wing.sweep'])
-print('wing.taper',prob['wing.taper'])
-print('obj: AS_point_0.fuelburn',prob['AS_point_0.fuelburn'])
-
-print('const 1: AS_point_0.wing_perf.failure',prob['AS_point_0.wing_perf.failure'])
-print('const 2: AS_point_0.wing_perf.thickness_intersects',prob['AS_point_0.wing_perf.thickness_intersects'])
-print('const 3: AS_point_0.L_equals_W',prob['AS_point_0.L_equals_W'])
-print('const 4: AS_point_0.CM',prob['AS_point_0.CM'])
-print('const 5: wing.twist_cp',prob['wing.twist_cp'])
-
-
-#-----------------------------------------------------------------------------------#
-## Part-7: Generate N2 diagram
-# from openmdao.api import n2; n2(prob)
-
-# Part-8: visualization 
-# from openaerostruct.utils.plot_wing import disp_plot
-# args = [[], []]
-# args[1] = 'aerostruct.db'
-# disp_plot(args=args)
-
-
-## Part-8: Tradespace Exploration
-import numpy as np
-import matplotlib.pyplot as plt
-n = 10
-x1 = np.linspace(0.5,1, n)      # taper 
-y1 = np.linspace(10,30, n)     # sweep
-
-f= np.zeros([n,n])
-L_equal_W = np.zeros([n,n])
-Cm = np.zeros([n,n])
-
-xv, yv = np.meshgrid(x1, y1)
-
-
-for i in range(n):
-    for j in range(n):        
-        prob.set_val('wing.taper',  xv[i,j])
-        prob.set_val('wing.sweep', yv[i,j])
-        
-        # optimize problem for L=W constraint
-        prob.run_driver()                   
-        
-        f[i,j] = prob.get_val('AS_point_0.fuelburn')
-        L_equal_W[i,j] = prob.get_val('AS_point_0.L_equals_W')
-        Cm[i,j] = prob.get_val('AS_point_0.CM')[1]
-
-
-## Part-9: Plotting
-csfont = {'fontname':'times new roman','fontsize':20}
-fig1 = plt.figure(figsize=(7,6),dpi=150)
-cs = plt.contour(xv, yv, f, 20)
-plt.clabel(cs, inline=True, fontsize=10,fmt='%1.1f')
-contours = plt.contour(xv, yv, Cm, [-0.2,-0.1, 0, 0.1,0.2], colors='r',alpha=0.8)
-plt.clabel(contours, inline=True, fontsize=14,fmt='$C_m=$%1.2f')
-plt.xlabel('Taper',**csfont)
-plt.ylabel('Sweep',**csfont)
-plt.xticks(fontsize=16 )
-plt.yticks(fontsize=16 )
-fig1.tight_layout()
-fig1.savefig('ScanE_trade_anlyt.png', dpi=400)
-plt.show()
-
-
 
+def run(visualize=False, n=10, trim=False):
+    """
+    Trim the ScanEagle (L=W) on an n x n (taper, sweep) grid and return the
+    grids of fuel burn, L=W and CM. By default alpha is found by an alpha
+    optimization recorded in aerostruct.db; with trim=True it is solved by
+    Newton in a single run_model per cell, and nothing is recorded.
+    visualize=True plots the contours and saves ScanE_trade_anlyt.png.
+    """
+    #-----------------------------------------------------------------------------------#
+    ## Part- 1: Define mesh and surface
+    # The ScanEagle surface (cambered mesh, shape variables, aerodynamic and
+    # material properties), the flight conditions, the AerostructGeometry and
+    # AerostructPoint groups and their connections are defined in
+    # mdao_tools/scaneagle.py. Any surface entry can be overridden with a keyword
+    # argument. With cache=True the mesh is cached on disk, keyed by a hash of
+    # the configuration.
+    surface = scaneagle_surface(num_y, num_x, cache=True,
+                                twist_cp=np.array([6.08538593, 10., 5.]),  # twist control points(cp)
+                                thickness_cp=np.ones((3))*.001)            # thickness control points(cp)
+
+    #-----------------------------------------------------------------------------------#
+    ## Part-2: Initialize your problem, optimizer, design variables, constraints, and objective
+    # Sweep and taper are set by the tradespace exploration below, alpha only
+    # has to satisfy L=W.
+    if trim:
+        # A BalanceComp drives AS_point_0.L_equals_W to zero by varying alpha
+        # and the model is converged by Newton, so there is no design variable
+        # and no optimizer loop.
+        prob = build_scaneagle_problem(surface, design_vars={}, setup=False, cache=True,
+                                       trim=True)
+        solve = prob.run_model
+    else:
+        # Here we're only varying alpha. maxiter=10 as there is possibility
+        # that constraint may not always satisfy. Record data from this
+        # problem so we can visualize it using plot_wing.
+        prob = build_scaneagle_problem(surface, design_vars={'alpha' : DESIGN_VARS['alpha']},
+                                       maxiter=10, tol=1e-7, recorder_file='aerostruct.db',
+                                       setup=False, cache=True)
+        solve = prob.run_driver
+
+    # Set up the problem
+    prob.setup()
+
+    #-----------------------------------------------------------------------------------#
+    ## Part-5: Set up and run the trim (or optimization) problem
+    solve()
+    print('\n after trim ------------' if trim else '\n after optimization ------------')
+    print('wing.twist_cp',prob['wing.twist_cp'])
+    print('wing.thickness_cp',prob['wing.thickness_cp'])
+    print('alpha',prob['alpha'])
+    print('wing.sweep',prob['wing.sweep'])
+    print('wing.taper',prob['wing.taper'])
+    print('obj: AS_point_0.fuelburn',prob['AS_point_0.fuelburn'])
+
+    print('const 1: AS_point_0.wing_perf.failure',prob['AS_point_0.wing_perf.failure'])
+    print('const 2: AS_point_0.wing_perf.thickness_intersects',prob['AS_point_0.wing_perf.thickness_intersects'])
+    print('const 3: AS_point_0.L_equals_W',prob['AS_point_0.L_equals_W'])
+    print('const 4: AS_point_0.CM',prob['AS_point_0.CM'])
+    print('const 5: wing.twist_cp',prob['wing.twist_cp'])
+
+
+    #-----------------------------------------------------------------------------------#
+    ## Part-7: Generate N2 diagram
+    # from openmdao.api import n2; n2(prob)
+
+    # Part-8: visualization 
+    # from openaerostruct.utils.plot_wing import disp_plot
+    # args = [[], []]
+    # args[1] = 'aerostruct.db'
+    # disp_plot(args=args)
+
+
+    ## Part-8: Tradespace Exploration
+    # Every cell below is an independent alpha optimization (or trim). Cells
+    # where the analysis fails are left as NaN. To spread the cells
+    # over all cores use run_grid_parallel from scaneagle_grid_sweep.py instead.
+    # scaneagle_surrogate.py draws the same contours from kriging surrogates
+    # fitted to a few dozen samples.
+    x1 = np.linspace(0.5,1, n)      # taper 
+    y1 = np.linspace(10,30, n)     # sweep
+
+    f= np.zeros([n,n])
+    L_equal_W = np.zeros([n,n])
+    Cm = np.zeros([n,n])
+
+    xv, yv = np.meshgrid(x1, y1)
+
+
+    for i in range(n):
+        for j in range(n):        
+            prob.set_val('wing.taper',  xv[i,j])
+            prob.set_val('wing.sweep', yv[i,j])
+
+            # solve (or optimize) alpha for L=W
+            try:
+                solve()
+            except om.AnalysisError:
+                f[i,j] = L_equal_W[i,j] = Cm[i,j] = np.nan
+                # start the next cell from the initial alpha again
+                prob.set_val('alpha', 5.)
+                continue
+
+            f[i,j] = prob.get_val('AS_point_0.fuelburn')
+            L_equal_W[i,j] = prob.get_val('AS_point_0.L_equals_W')
+            Cm[i,j] = prob.get_val('AS_point_0.CM')[1]
+
+
+    if visualize:
+        ## Part-9: Plotting
+        import matplotlib.pyplot as plt
+        csfont = {'fontname':'times new roman','fontsize':20}
+        fig1 = plt.figure(figsize=(7,6),dpi=150)
+        cs = plt.contour(xv, yv, f, 20)
+        plt.clabel(cs, inline=True, fontsize=10,fmt='%1.1f')
+        contours = plt.contour(xv, yv, Cm, [-0.2,-0.1, 0, 0.1,0.2], colors='r',alpha=0.8)
+        plt.clabel(contours, inline=True, fontsize=14,fmt='$C_m=$%1.2f')
+        plt.xlabel('Taper',**csfont)
+        plt.ylabel('Sweep',**csfont)
+        plt.xticks(fontsize=16 )
+        plt.yticks(fontsize=16 )
+        fig1.tight_layout()
+        fig1.savefig('ScanE_trade_anlyt.png', dpi=400)
+        plt.show()
+
+    return {'xv' : xv, 'yv' : yv, 'f' : f, 'L_equals_W' : L_equal_W, 'Cm' : Cm}
+
+
+if __name__ == "__main__":
+    run(visualize=True)
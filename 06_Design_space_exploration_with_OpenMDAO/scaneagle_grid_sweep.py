@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel and warm-started (taper, sweep) grid sweeps for the ScanEagle design
+space.
+
+Every cell of the grid is an alpha optimization that satisfies L = W (see
+Part-8 of aerostruct_ScanEagle_designspace.py). run_grid_parallel distributes
+the cells over a pool of worker processes; each worker builds its own Problem
+once and reuses it for all the cells it receives. run_grid_warm visits the
+cells along a serpentine path and starts every optimization from alpha and the
+coupled aerostructural states of the closest cell that already converged.
+
+With trim=True every cell is a single run_model instead: alpha is solved for
+L = W by the Newton solver of the trimmed model (see mdao_tools/scaneagle.py)
+and 'iterations' counts Newton iterations instead of driver iterations.
+"""
+
+## Part-0: Import required packages
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import openmdao.api as om
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.scaneagle import DESIGN_VARS, build_scaneagle_problem, scaneagle_surface
+
+
+## Part-1: Problem used for every grid cell
+def build_sweep_problem(maxiter=10, trim=False):
+    """
+    ScanEagle problem of aerostruct_ScanEagle_designspace.py: alpha is the only
+    design variable (or, with trim=True, solved for L = W in the model), taper
+    and sweep are set per grid cell.
+    """
+    surface = scaneagle_surface(twist_cp=np.array([6.08538593, 10., 5.]),
+                                thickness_cp=np.ones((3))*.001)
+
+    if trim:
+        prob = build_scaneagle_problem(surface, design_vars={}, trim=True)
+    else:
+        prob = build_scaneagle_problem(surface, design_vars={'alpha' : DESIGN_VARS['alpha']},
+                                       maxiter=maxiter)
+    prob.driver.options['disp'] = False
+    prob.set_solver_print(level=0)
+    return prob
+
+
+def run_cell(prob, taper, sweep, lw_tol=1e-4):
+    """
+    Optimize alpha for one (taper, sweep) cell, or trim it with a single
+    run_model if prob was built with trim=True.
+
+    Returns fuelburn, L_equals_W, CM, whether the cell failed and the number
+    of driver (or Newton) iterations. A cell fails when the driver reports a
+    failure, Newton does not converge or L_equals_W is not satisfied to
+    within lw_tol.
+    """
+    prob.set_val('wing.taper', taper)
+    prob.set_val('wing.sweep', sweep)
+
+    newton = prob.model.nonlinear_solver
+    if isinstance(newton, om.NewtonSolver):
+        # solve alpha for L=W
+        try:
+            prob.run_model()
+            failed = False
+        except om.AnalysisError:
+            failed = True
+        iterations = newton._iter_count
+    else:
+        # optimize problem for L=W constraint
+        failed = prob.run_driver()
+        iterations = prob.driver.iter_count
+    L_equals_W = prob.get_val('AS_point_0.L_equals_W')[0]
+
+    return (prob.get_val('AS_point_0.fuelburn')[0],
+            L_equals_W,
+            prob.get_val('AS_point_0.CM')[1],
+            bool(failed) or abs(L_equals_W) > lw_tol,
+            iterations)
+
+
+## Part-2: Warm starts
+def get_state(prob):
+    """
+    Snapshot alpha and the coupled aerostructural states of AS_point_0.
+
+    OpenMDAO has no public accessor for all outputs of a group at once, so the
+    output vector of the coupled group is copied directly. The nonlinear
+    solver of the coupled group starts from these values on the next run.
+    """
+    coupled = prob.model._get_subsystem('AS_point_0.coupled')
+    return (prob.get_val('alpha').copy(), coupled._outputs.asarray(copy=True))
+
+
+def set_state(prob, state):
+    """
+    Restore a snapshot taken by get_state as the starting point of the next run.
+    """
+    alpha, coupled_outputs = state
+    prob.set_val('alpha', alpha)
+    coupled = prob.model._get_subsystem('AS_point_0.coupled')
+    coupled._outputs.set_val(coupled_outputs)
+
+
+def serpentine_order(n_y, n_x):
+    """
+    Grid indices (i, j) ordered row by row, reversing every other row so
+    that consecutive cells are always neighbors.
+    """
+    order = []
+    for i in range(n_y):
+        cols = range(n_x) if i % 2 == 0 else range(n_x - 1, -1, -1)
+        order.extend((i, j) for j in cols)
+    return order
+
+
+def run_path(prob, cells, scale=(1., 1.)):
+    """
+    Run the cells in the given order, seeding each one from the closest cell
+    (in (taper, sweep) space normalized by scale) that already converged.
+    """
+    scale = np.asarray(scale, dtype=float)
+    converged_points = []
+    converged_states = []
+    results = []
+
+    for i, j, taper, sweep in cells:
+        point = np.array([taper, sweep]) / scale
+        if converged_points:
+            dist = np.sum((np.array(converged_points) - point)**2, axis=1)
+            set_state(prob, converged_states[int(np.argmin(dist))])
+
+        res = run_cell(prob, taper, sweep)
+        if not res[3]:
+            converged_points.append(point)
+            converged_states.append(get_state(prob))
+
+        results.append((i, j) + res)
+
+    return results
+
+
+## Part-3: Worker process functions
+# One Problem per worker process, built once by the pool initializer.
+_worker_prob = None
+
+
+def _init_worker(maxiter, trim=False):
+    global _worker_prob
+    _worker_prob = build_sweep_problem(maxiter, trim)
+
+
+def _run_worker_cell(cell):
+    i, j, taper, sweep = cell
+    return (i, j) + run_cell(_worker_prob, taper, sweep)
+
+
+def _run_worker_path(args):
+    cells, scale = args
+    return run_path(_worker_prob, cells, scale)
+
+
+def _collect(xv, yv, results):
+    n_y, n_x = xv.shape
+    res = {'xv' : xv, 'yv' : yv,
+           'f' : np.zeros([n_y, n_x]),
+           'L_equal_W' : np.zeros([n_y, n_x]),
+           'Cm' : np.zeros([n_y, n_x]),
+           'failed' : np.zeros([n_y, n_x], dtype=bool),
+           'iterations' : np.zeros([n_y, n_x], dtype=int)}
+
+    for i, j, fb, lw, cm, fail, nit in results:
+        res['f'][i, j] = fb
+        res['L_equal_W'][i, j] = lw
+        res['Cm'][i, j] = cm
+        res['failed'][i, j] = fail
+        res['iterations'][i, j] = nit
+
+    return res
+
+
+## Part-4: Parallel grid sweep
+def run_grid_parallel(taper, sweep, num_workers=None, maxiter=10, trim=False):
+    """
+    Run the alpha optimization for every cell of the (taper, sweep) grid.
+
+    Parameters
+    ----------
+    taper, sweep : ndarray
+        1-D arrays of taper and sweep values.
+    num_workers : int or None
+        Number of worker processes, os.cpu_count() when None.
+    maxiter : int
+        Maximum number of SLSQP iterations per cell.
+    trim : bool
+        Trim every cell with a single Newton-converged run_model instead of
+        an alpha optimization.
+
+    Returns
+    -------
+    dict
+        'xv', 'yv' meshgrids and the 'f', 'L_equal_W', 'Cm', 'failed' and
+        'iterations' arrays, indexed like the meshgrids.
+    """
+    xv, yv = np.meshgrid(taper, sweep)
+    n_y, n_x = xv.shape
+
+    cells = [(i, j, xv[i, j], yv[i, j]) for i in range(n_y) for j in range(n_x)]
+    results = _run_cells(cells, num_workers, maxiter, trim)
+
+    return _collect(xv, yv, results)
+
+
+def run_points(points, num_workers=None, maxiter=10, trim=False):
+    """
+    Run the alpha optimization at arbitrary (taper, sweep) points, e.g. the
+    samples of a design of experiments.
+
+    Parameters
+    ----------
+    points : ndarray
+        Array of shape (n, 2) with the taper and sweep of every point.
+
+    Returns
+    -------
+    dict
+        'points' and the 'f', 'L_equal_W', 'Cm', 'failed' and 'iterations'
+        arrays of length n.
+    """
+    points = np.atleast_2d(points)
+    cells = [(k, 0, taper, sweep) for k, (taper, sweep) in enumerate(points)]
+    results = _run_cells(cells, num_workers, maxiter, trim)
+
+    res = _collect(points[:, :1], points[:, 1:], results)
+    res = {key : val[:, 0] for key, val in res.items()}
+    res['points'] = points
+    return res
+
+
+def _run_cells(cells, num_workers=None, maxiter=10, trim=False):
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    num_workers = min(num_workers, len(cells))
+
+    if num_workers == 1:
+        _init_worker(maxiter, trim)
+        return [_run_worker_cell(cell) for cell in cells]
+
+    # Hand out the cells in small chunks so that slow cells do not leave
+    # the other workers idle at the end of the sweep.
+    chunksize = max(1, len(cells) // (4 * num_workers))
+
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                             initargs=(maxiter, trim)) as pool:
+        return list(pool.map(_run_worker_cell, cells, chunksize=chunksize))
+
+
+## Part-5: Warm-started grid sweep
+def run_grid_warm(taper, sweep, num_workers=1, maxiter=10, trim=False):
+    """
+    Run the grid along a serpentine path with warm starts.
+
+    With num_workers > 1 the rows of the grid are split into contiguous
+    blocks, one per worker, and every block is swept along its own
+    serpentine path. The returned dict is the same as for run_grid_parallel;
+    'iterations' holds the driver (or Newton) iterations of every cell.
+    """
+    xv, yv = np.meshgrid(taper, sweep)
+    n_y, n_x = xv.shape
+    scale = (max(np.ptp(taper), 1e-12), max(np.ptp(sweep), 1e-12))
+
+    num_workers = max(1, min(num_workers, n_y))
+    row_blocks = np.array_split(np.arange(n_y), num_workers)
+
+    paths = []
+    for rows in row_blocks:
+        order = serpentine_order(len(rows), n_x)
+        paths.append([(rows[i], j, xv[rows[i], j], yv[rows[i], j]) for i, j in order])
+
+    if num_workers == 1:
+        results = run_path(build_sweep_problem(maxiter, trim), paths[0], scale)
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                 initargs=(maxiter, trim)) as pool:
+            for block in pool.map(_run_worker_path, [(path, scale) for path in paths]):
+                results.extend(block)
+
+    return _collect(xv, yv, results)
+
+
+## Part-6: Plotting
+def plot_sweep(res, filename='ScanE_trade_anlyt.png'):
+    import matplotlib.pyplot as plt
+
+    xv, yv = res['xv'], res['yv']
+
+    csfont = {'fontname':'times new roman','fontsize':20}
+    fig1 = plt.figure(figsize=(7,6),dpi=150)
+    cs = plt.contour(xv, yv, res['f'], 20)
+    plt.clabel(cs, inline=True, fontsize=10,fmt='%1.1f')
+    contours = plt.contour(xv, yv, res['Cm'], [-0.2,-0.1, 0, 0.1,0.2], colors='r',alpha=0.8)
+    plt.clabel(contours, inline=True, fontsize=14,fmt='$C_m=$%1.2f')
+    plt.xlabel('Taper',**csfont)
+    plt.ylabel('Sweep',**csfont)
+    plt.xticks(fontsize=16 )
+    plt.yticks(fontsize=16 )
+    fig1.tight_layout()
+    fig1.savefig(filename, dpi=400)
+    return fig1
+
+
+if __name__ == "__main__":
+    n = 10
+    x1 = np.linspace(0.5,1, n)      # taper
+    y1 = np.linspace(10,30, n)     # sweep
+
+    # 'parallel': independent cells over a process pool
+    # 'warm'    : serpentine path with warm starts (optionally split over workers)
+    mode = 'warm'
+    # True : one Newton-trimmed run_model per cell instead of an alpha optimization
+    trim = True
+
+    t0 = time.perf_counter()
+    if mode == 'parallel':
+        res = run_grid_parallel(x1, y1, trim=trim)
+    else:
+        res = run_grid_warm(x1, y1, trim=trim)
+    label = 'Newton' if trim else 'driver'
+    print('grid sweep: %d cells in %.1f s' % (n * n, time.perf_counter() - t0))
+    print('total %s iterations:' % label, int(res['iterations'].sum()))
+    print('failed cells:', int(res['failed'].sum()))
+    print('%s iterations per cell (rows: sweep, columns: taper)' % label)
+    print(res['iterations'])
+
+    import matplotlib.pyplot as plt
+    plot_sweep(res)
+    plt.show()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-fidelity optimization of the ScanEagle aerostructural problem.
+
+aerostruct_ScanEagle_opt.py runs SLSQP on the num_y = 21 mesh from the
+initial design. multifidelity_optimize first optimizes on a coarse mesh and
+then uses the optimum as the starting point on progressively finer meshes,
+so most of the iterations are spent on the cheap meshes and only a few on
+the finest one.
+
+twist_cp and thickness_cp are B-spline control points, so their number does
+not depend on the mesh. They are still resampled with np.interp when two
+levels use a different number of control points.
+"""
+
+## Part-0: Import required packages
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.scaneagle import DESIGN_VARS, build_scaneagle_problem, scaneagle_surface
+
+
+## Part-1: Transfer of the design between meshes
+def get_design(prob):
+    return {name : prob.get_val(name).copy() for name in DESIGN_VARS}
+
+
+def resample_cp(values, n):
+    """
+    Resample control point values (root to tip) to n control points.
+    """
+    values = np.atleast_1d(values)
+    if values.size == n:
+        return values
+    return np.interp(np.linspace(0., 1., n), np.linspace(0., 1., values.size), values)
+
+
+def set_design(prob, design):
+    for name, values in design.items():
+        prob.set_val(name, resample_cp(values, prob.get_val(name).size))
+
+
+## Part-2: Optimization on one mesh
+def optimize_level(num_y, num_x=3, initial_design=None, tol=1e-7, maxiter=200):
+    """
+    Optimize the ScanEagle problem on a num_y x num_x mesh, starting from
+    initial_design if given.
+
+    Returns the problem and a record with the wall time, the number of
+    driver iterations and the optimum.
+    """
+    prob = build_scaneagle_problem(scaneagle_surface(num_y, num_x), tol=tol, maxiter=maxiter)
+    prob.driver.options['disp'] = False
+    prob.set_solver_print(level=0)
+    if initial_design is not None:
+        set_design(prob, initial_design)
+
+    t0 = time.perf_counter()
+    failed = prob.run_driver()
+    record = {'num_y' : num_y,
+              'num_x' : num_x,
+              'time' : time.perf_counter() - t0,
+              'iterations' : prob.driver.iter_count,
+              'failed' : bool(failed),
+              'fuelburn' : prob.get_val('AS_point_0.fuelburn')[0],
+              'design' : get_design(prob)}
+    return prob, record
+
+
+## Part-3: Coarse-to-fine sequence
+def multifidelity_optimize(levels=(7, 13, 21), num_x=3, coarse_tol=1e-4, tol=1e-7):
+    """
+    Optimize on every num_y of levels in turn, each level starting from the
+    optimum of the previous one. The coarse levels only need to get close to
+    the optimum, so they use the looser tolerance coarse_tol.
+
+    Returns the problem of the finest level and the records of all levels.
+    """
+    design = None
+    records = []
+    for i, num_y in enumerate(levels):
+        level_tol = tol if i == len(levels) - 1 else coarse_tol
+        prob, record = optimize_level(num_y, num_x, design, tol=level_tol)
+        design = record['design']
+        records.append(record)
+    return prob, records
+
+
+if __name__ == "__main__":
+    levels = (7, 13, 21)
+
+    # Reference: cold start on the finest mesh
+    prob_cold, cold = optimize_level(levels[-1])
+
+    prob_mf, records = multifidelity_optimize(levels)
+
+    print('\n%-24s %6s %12s %10s %14s' % ('run', 'num_y', 'iterations', 'time [s]', 'fuelburn'))
+    print('%-24s %6d %12d %10.2f %14.6f' % ('cold start', cold['num_y'], cold['iterations'],
+                                            cold['time'], cold['fuelburn']))
+    for record in records:
+        print('%-24s %6d %12d %10.2f %14.6f' % ('multi-fidelity', record['num_y'],
+                                                record['iterations'], record['time'],
+                                                record['fuelburn']))
+    print('\nfinest-mesh iterations: cold %d, multi-fidelity %d'
+          % (cold['iterations'], records[-1]['iterations']))
+    print('total time: cold %.2f s, multi-fidelity %.2f s'
+          % (cold['time'], sum(record['time'] for record in records)))
+    print('relative fuelburn difference: %.2e' % (records[-1]['fuelburn'] / cold['fuelburn'] - 1.))
+
+    print('\n Optimum design variables ------------')
+    for name, values in records[-1]['design'].items():
+        print(name, values)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Kriging surrogate of the ScanEagle (taper, sweep) design space.
+
+Part-8 of aerostruct_ScanEagle_designspace.py runs one alpha optimization per
+grid cell to draw the fuelburn and CM contours. Here the optimizations are
+only run at the samples of a Latin hypercube design of experiments. Kriging
+surrogates of fuelburn and CM are fitted to the samples, their accuracy is
+estimated by leave-one-out cross-validation, and new samples are added where
+the predicted kriging error is largest. The contours are then evaluated on
+the surrogates with a vectorized MetaModelUnStructuredComp, at any resolution.
+"""
+
+## Part-0: Import required packages
+import numpy as np
+import openmdao.api as om
+
+from scaneagle_grid_sweep import plot_sweep, run_points
+
+
+# (taper, sweep) bounds of the design space
+BOUNDS = np.array([[0.5, 1.],
+                   [10., 30.]])
+
+# Outputs of run_points modelled by the surrogates
+OUTPUTS = ('f', 'Cm')
+
+
+## Part-1: Design of experiments
+def latin_hypercube(n, bounds=BOUNDS, seed=0):
+    """
+    n samples of a Latin hypercube: every dimension is split into n equal
+    intervals and every interval holds exactly one sample.
+    """
+    rng = np.random.RandomState(seed)
+    dim = len(bounds)
+    u = (np.array([rng.permutation(n) for k in range(dim)]).T + rng.uniform(size=(n, dim))) / n
+    return bounds[:, 0] + u * (bounds[:, 1] - bounds[:, 0])
+
+
+## Part-2: Surrogate fit and cross-validation
+def fit_surrogate(x, y):
+    surrogate = om.KrigingSurrogate(eval_rmse=True)
+    surrogate.train(x, np.reshape(y, (-1, 1)))
+    return surrogate
+
+
+def predict(surrogate, x):
+    """
+    Kriging mean and rmse at every row of x.
+    """
+    mean = np.zeros(len(x))
+    rmse = np.zeros(len(x))
+    for k, xk in enumerate(x):
+        m, r = surrogate.predict(xk)
+        mean[k] = np.ravel(m)[0]
+        rmse[k] = np.ravel(r)[0]
+    return mean, rmse
+
+
+def loo_errors(x, y):
+    """
+    Leave-one-out cross-validation: the error at every sample of the
+    surrogate trained on all the other samples.
+    """
+    errors = np.zeros(len(x))
+    for k in range(len(x)):
+        mask = np.arange(len(x)) != k
+        surrogate = fit_surrogate(x[mask], y[mask])
+        errors[k] = predict(surrogate, x[k:k + 1])[0][0] - y[k]
+    return errors
+
+
+class SampleSet(object):
+    """
+    Evaluated samples and the surrogates fitted to them. Failed samples are
+    kept in points/failed but not used for training.
+    """
+    def __init__(self, num_workers=None, maxiter=10, trim=False):
+        self.num_workers = num_workers
+        self.maxiter = maxiter
+        self.trim = trim
+        self.points = np.zeros((0, 2))
+        self.values = {name : np.zeros(0) for name in OUTPUTS}
+        self.failed = np.zeros(0, dtype=bool)
+        self.surrogates = {}
+
+    def add(self, points):
+        res = run_points(points, self.num_workers, self.maxiter, self.trim)
+        self.points = np.vstack([self.points, res['points']])
+        self.failed = np.concatenate([self.failed, res['failed']])
+        for name in OUTPUTS:
+            self.values[name] = np.concatenate([self.values[name], res[name]])
+
+    def training_data(self, name):
+        ok = ~self.failed
+        return self.points[ok], self.values[name][ok]
+
+    def fit(self):
+        for name in OUTPUTS:
+            self.surrogates[name] = fit_surrogate(*self.training_data(name))
+
+    def cv_error(self):
+        """
+        Leave-one-out RMS error of every surrogate, normalized by the range
+        of the training values.
+        """
+        errors = {}
+        for name in OUTPUTS:
+            x, y = self.training_data(name)
+            errors[name] = np.sqrt(np.mean(loo_errors(x, y)**2)) / max(np.ptp(y), 1e-12)
+        return errors
+
+    def predicted_error(self, x):
+        """
+        Kriging rmse at the points x of every surrogate, normalized by the
+        range of the training values, summed over the surrogates.
+        """
+        err = np.zeros(len(x))
+        for name in OUTPUTS:
+            y = self.training_data(name)[1]
+            mean, rmse = predict(self.surrogates[name], x)
+            err += rmse / max(np.ptp(y), 1e-12)
+        return err
+
+
+## Part-3: Adaptive sampling
+def select_points(samples, batch_size, num_candidates=1000, seed=0, min_dist=0.05):
+    """
+    Pick batch_size candidates with the largest predicted error, at least
+    min_dist apart (in the design space normalized to [0, 1]) from each
+    other so that one batch does not cluster around a single maximum.
+    """
+    candidates = latin_hypercube(num_candidates, seed=seed)
+    err = samples.predicted_error(candidates)
+    scale = BOUNDS[:, 1] - BOUNDS[:, 0]
+
+    selected = []
+    for k in np.argsort(err)[::-1]:
+        if all(np.linalg.norm((candidates[k] - candidates[s]) / scale) > min_dist
+               for s in selected):
+            selected.append(k)
+        if len(selected) == batch_size:
+            break
+    return candidates[selected]
+
+
+def build_surrogate(num_initial=20, batch_size=4, max_samples=60, cv_tol=0.02,
+                    num_workers=None, maxiter=10, seed=0, trim=False):
+    """
+    Sample a Latin hypercube of num_initial points, then add batches of
+    batch_size points at the largest predicted error until the leave-one-out
+    error of every surrogate is below cv_tol or max_samples is reached.
+    With trim=True the samples are Newton-trimmed analyses instead of alpha
+    optimizations.
+    """
+    samples = SampleSet(num_workers, maxiter, trim)
+    samples.add(latin_hypercube(num_initial, seed=seed))
+    samples.fit()
+
+    it = 0
+    while True:
+        cv = samples.cv_error()
+        print('%3d samples, leave-one-out error: %s'
+              % (len(samples.points), ', '.join('%s %.2e' % item for item in cv.items())))
+        if max(cv.values()) < cv_tol or len(samples.points) >= max_samples:
+            break
+
+        it += 1
+        samples.add(select_points(samples, batch_size, seed=seed + it))
+        samples.fit()
+
+    return samples
+
+
+## Part-4: Contours from the surrogate
+def surrogate_grid(samples, taper, sweep):
+    """
+    Evaluate the surrogates on the (taper, sweep) grid with a vectorized
+    MetaModelUnStructuredComp and return a dict for plot_sweep.
+    """
+    xv, yv = np.meshgrid(taper, sweep)
+    n = xv.size
+
+    mm = om.MetaModelUnStructuredComp(vec_size=n)
+    x = samples.training_data(OUTPUTS[0])[0]
+    mm.add_input('taper', val=np.zeros(n), training_data=x[:, 0])
+    mm.add_input('sweep', val=np.zeros(n), training_data=x[:, 1])
+    for name in OUTPUTS:
+        mm.add_output(name, val=np.zeros(n), training_data=samples.training_data(name)[1],
+                      surrogate=om.KrigingSurrogate())
+
+    prob = om.Problem()
+    prob.model.add_subsystem('mm', mm, promotes=['*'])
+    prob.setup()
+    prob.set_val('taper', xv.ravel())
+    prob.set_val('sweep', yv.ravel())
+    prob.run_model()
+
+    res = {'xv' : xv, 'yv' : yv}
+    for name in OUTPUTS:
+        res[name] = prob.get_val(name).reshape(xv.shape)
+    return res
+
+
+if __name__ == "__main__":
+    samples = build_surrogate()
+    print('failed samples:', int(samples.failed.sum()))
+
+    res = surrogate_grid(samples, np.linspace(0.5, 1, 100), np.linspace(10, 30, 100))
+
+    import matplotlib.pyplot as plt
+    fig = plot_sweep(res, 'ScanE_trade_surrogate.png')
+    x = samples.points
+    plt.scatter(x[:, 0], x[:, 1], s=10, c=np.where(samples.failed, 'r', 'k'))
+    plt.show()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized (batch) evaluation of the Paraboloid design space.
+
+Instead of calling set_val/run_model once per grid point, the Paraboloid and
+the constraint g = x + y are evaluated for a whole grid of N points in a single
+run_model call. The inputs and outputs are arrays of length N, and because
+every point is independent the partials are diagonal.
+"""
+
+# Part 0: OpenMDAO and component imports
+import time
+
+import numpy as np
+import openmdao.api as om
+
+
+# Part 1: Create a vectorized explicit component for f_xy
+class ParaboloidVec(om.ExplicitComponent):
+    """
+    Evaluates f(x,y) = (x-3)^2 + xy + (y+4)^2 - 3 for vec_size points at once.
+    """
+
+    def initialize(self):
+        self.options.declare('vec_size', types=int, default=1,
+                             desc='Number of (x, y) points evaluated at once')
+
+    def setup(self):
+        n = self.options['vec_size']
+
+        self.add_input('x', val=np.zeros(n))
+        self.add_input('y', val=np.zeros(n))
+
+        self.add_output('f_xy', val=np.zeros(n))
+
+    def setup_partials(self):
+        # Each f_xy[i] only depends on x[i] and y[i], so the jacobian is diagonal.
+        arange = np.arange(self.options['vec_size'])
+        self.declare_partials('f_xy', ['x', 'y'], rows=arange, cols=arange)
+
+    def compute(self, inputs, outputs):
+        """
+        f(x,y) = (x-3)^2 + xy + (y+4)^2 - 3
+        Minimum at: x = 6.6667; y = -7.3333
+        """
+        x = inputs['x']
+        y = inputs['y']
+
+        outputs['f_xy'] = (x - 3.0)**2 + x * y + (y + 4.0)**2 - 3.0
+
+    def compute_partials(self, inputs, partials):
+        x = inputs['x']
+        y = inputs['y']
+
+        partials['f_xy', 'x'] = 2.0 * (x - 3.0) + y
+        partials['f_xy', 'y'] = 2.0 * (y + 4.0) + x
+
+
+# Part 2: Build a batch model for n points
+def build_batch_problem(n):
+    """
+    Create a Problem that evaluates f_xy and const.g for n points at once.
+    """
+    prob = om.Problem()
+    prob.model.add_subsystem('parab', ParaboloidVec(vec_size=n), promotes_inputs=['x', 'y'])
+    prob.model.add_subsystem('const', om.ExecComp('g = x + y',
+                                                  g=np.zeros(n), x=np.zeros(n), y=np.zeros(n),
+                                                  has_diag_partials=True),
+                             promotes_inputs=['x', 'y'])
+
+    prob.model.set_input_defaults('x', np.zeros(n))
+    prob.model.set_input_defaults('y', np.zeros(n))
+
+    prob.setup()
+    return prob
+
+
+# Part 3: Batch sweep entry point
+def batch_sweep(xv, yv, prob=None):
+    """
+    Evaluate f_xy and g over a whole meshgrid with a single run_model call.
+
+    Parameters
+    ----------
+    xv, yv : ndarray
+        Arrays of the same shape, e.g. from np.meshgrid.
+    prob : Problem or None
+        A problem previously returned by build_batch_problem(xv.size). Pass it
+        in to reuse the setup when sweeping several grids of the same size.
+
+    Returns
+    -------
+    f, c : ndarray
+        f_xy and g with the same shape as xv.
+    """
+    shape = np.shape(xv)
+    n = int(np.prod(shape))
+
+    if prob is None:
+        prob = build_batch_problem(n)
+
+    prob.set_val('x', np.ravel(xv))
+    prob.set_val('y', np.ravel(yv))
+    prob.run_model()
+
+    f = prob.get_val('parab.f_xy').reshape(shape)
+    c = prob.get_val('const.g').reshape(shape)
+    return f, c
+
+
+if __name__ == "__main__":
+    # Part 4: Compare the batch sweep with the point-by-point loop
+    n = 100
+    x1 = np.linspace(-10, 10, n)
+    y1 = np.linspace(-10, 10, n)
+    xv, yv = np.meshgrid(x1, y1)
+
+    # vec_size=1 gives the scalar model used in single_disp_designspace.py
+    prob = build_batch_problem(1)
+    f_loop = np.zeros([n, n])
+    c_loop = np.zeros([n, n])
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        for j in range(n):
+            prob.set_val('x', xv[i, j])
+            prob.set_val('y', yv[i, j])
+            prob.run_model()
+
+            f_loop[i, j] = prob.get_val('parab.f_xy')
+            c_loop[i, j] = prob.get_val('const.g')
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    f, c = batch_sweep(xv, yv)
+    t_batch = time.perf_counter() - t0
+
+    print('grid: %d x %d' % (n, n))
+    print('loop  sweep time: %.3f s' % t_loop)
+    print('batch sweep time: %.3f s' % t_batch)
+    print('max |f_loop - f_batch|:', np.max(np.abs(f_loop - f)))
+    print('max |c_loop - c_batch|:', np.max(np.abs(c_loop - c)))
+
+    # Part 5: A 1000 x 1000 grid is still a single run_model call
+    n = 1000
+    xv, yv = np.meshgrid(np.linspace(-10, 10, n), np.linspace(-10, 10, n))
+    t0 = time.perf_counter()
+    f, c = batch_sweep(xv, yv)
+    print('batch sweep time (%d x %d): %.3f s' % (n, n, time.perf_counter() - t0))
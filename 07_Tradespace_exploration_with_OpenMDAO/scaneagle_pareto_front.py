@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""
+Pareto front of drag coefficient vs structural mass for the ScanEagle.
+
+Each point of the front is one optimization of the weighted objective
+f = beta*(Cd/0.04294) + (1-beta)*(Ws/0.06638) of
+aerostruct_ScanEagle_tradespace.py, or of the epsilon-constraint problem
+min Cd subject to Ws <= ws_max. The optimizations run concurrently in separate
+worker processes, and every converged (beta, Cd, Ws, design variables) record
+is appended to a JSON-lines file as soon as it finishes, so an interrupted
+sweep keeps its results and can be resumed.
+
+run_front optimizes a fixed list of beta values. refine_front builds the front
+adaptively: it keeps adding points where neighboring points are farthest
+apart in normalized (Cd, Ws) space, bisecting beta and switching to the
+epsilon-constraint formulation where bisecting beta no longer fills the gap.
+"""
+
+## Part-0: Import required packages
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import openmdao.api as om
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mdao_tools.scaneagle import build_scaneagle_problem, scaneagle_surface
+
+
+# Design variables and bounds of the tradespace optimization
+TRADESPACE_DESIGN_VARS = {
+    'wing.twist_cp' : dict(lower=-5., upper=10.),
+    'wing.thickness_cp' : dict(lower=0.00005, upper=0.01, scaler=1e3),
+    'wing.sweep' : dict(lower=10., upper=30.),
+    'wing.taper' : dict(lower=0.25, upper=1.2),
+    'alpha' : dict(lower=-10., upper= 15.),
+    }
+
+
+## Part-1: Problems for one point of the front
+def build_front_problem(formulation='weighted'):
+    """
+    ScanEagle problem of aerostruct_ScanEagle_tradespace.py.
+
+    formulation='weighted' minimizes the weighted Cd/Ws objective f for the
+    value of 'beta'. formulation='epsilon' minimizes Cd with the constraint
+    Ws <= 'ws_max'. Both beta and ws_max are independent variables, so one
+    Problem serves every point of the front.
+    """
+    surface = scaneagle_surface(root_chord=1.)
+
+    if formulation == 'weighted':
+        prob = build_scaneagle_problem(surface, design_vars=TRADESPACE_DESIGN_VARS,
+                                       objective='beta', setup=False)
+    elif formulation == 'epsilon':
+        prob = build_scaneagle_problem(surface, design_vars=TRADESPACE_DESIGN_VARS,
+                                       objective='CD', setup=False)
+
+        indep_var_eps = om.IndepVarComp()
+        indep_var_eps.add_output('ws_max', val=0.07)
+        prob.model.add_subsystem('prob_eps', indep_var_eps, promotes=['*'])
+        prob.model.add_subsystem('eps_con', om.ExecComp('ws_margin = (Ws - ws_max)/0.06638'),
+                                 promotes_inputs=['ws_max'])
+        prob.model.connect('wing.structural_mass', 'eps_con.Ws')
+        prob.model.add_constraint('eps_con.ws_margin', upper=0.)
+    else:
+        raise ValueError("formulation must be 'weighted' or 'epsilon', not %r" % formulation)
+
+    prob.driver.options['disp'] = False
+    prob.setup()
+    prob.set_solver_print(level=0)
+    prob.final_setup()
+    return prob
+
+
+def run_point(prob, formulation, value, initial_design=None):
+    """
+    Optimize one point of the front and return its record.
+
+    value is beta for the weighted formulation and ws_max for the
+    epsilon-constraint formulation. initial_design maps design variable names
+    to starting values, so that every point starts from the same design
+    regardless of what ran before it.
+    """
+    if initial_design is not None:
+        for name, val in initial_design.items():
+            prob.set_val(name, val)
+    if formulation == 'weighted':
+        prob.set_val('beta', value)
+    else:
+        prob.set_val('ws_max', value)
+
+    t0 = time.perf_counter()
+    failed = prob.run_driver()
+
+    record = {
+        'formulation' : formulation,
+        'beta' : float(value) if formulation == 'weighted' else None,
+        'ws_max' : float(value) if formulation == 'epsilon' else None,
+        'Cd' : float(prob.get_val('AS_point_0.CD')[0]),
+        'Ws' : float(prob.get_val('wing.structural_mass')[0]),
+        'fuelburn' : float(prob.get_val('AS_point_0.fuelburn')[0]),
+        'failed' : bool(failed),
+        'iterations' : int(prob.driver.iter_count),
+        'time' : time.perf_counter() - t0,
+        'design_vars' : {name : prob.get_val(name).tolist() for name in TRADESPACE_DESIGN_VARS},
+        }
+    return record
+
+
+## Part-2: Worker process functions
+# Problems are built once per worker process, on first use of each formulation.
+_worker_probs = {}
+_worker_initial_design = {}
+
+
+def _run_worker_task(task):
+    formulation, value = task
+    if formulation not in _worker_probs:
+        prob = build_front_problem(formulation)
+        _worker_probs[formulation] = prob
+        _worker_initial_design[formulation] = {name : prob.get_val(name).copy()
+                                               for name in TRADESPACE_DESIGN_VARS}
+
+    return run_point(_worker_probs[formulation], formulation, value,
+                     _worker_initial_design[formulation])
+
+
+def _error_record(task, err):
+    """
+    Failed record of a task whose worker raised err, so that a resumed or
+    refined run tries it again.
+    """
+    formulation, value = task
+    return {
+        'formulation' : formulation,
+        'beta' : float(value) if formulation == 'weighted' else None,
+        'ws_max' : float(value) if formulation == 'epsilon' else None,
+        'Cd' : None,
+        'Ws' : None,
+        'fuelburn' : None,
+        'failed' : True,
+        'iterations' : 0,
+        'time' : 0.,
+        'design_vars' : None,
+        'error' : '%s: %s' % (type(err).__name__, err),
+        }
+
+
+## Part-3: Front generators
+def load_front(filename):
+    """
+    Read the records of a front file, sorted by structural mass. Records of
+    tasks whose worker raised an error have no Ws and come last.
+    """
+    records = []
+    if os.path.exists(filename):
+        with open(filename) as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+    return sorted(records, key=lambda rec: (rec['Ws'] is None, rec['Ws'] or 0.))
+
+
+def _task_key(formulation, value):
+    return (formulation, round(float(value), 12))
+
+
+def _done_tasks(records):
+    """
+    Keys of the tasks that have a converged record. Failed tasks are not
+    included, so a resumed or refined run tries them again.
+    """
+    keys = set()
+    for rec in records:
+        if rec['failed']:
+            continue
+        formulation = rec.get('formulation', 'weighted')
+        value = rec['beta'] if formulation == 'weighted' else rec['ws_max']
+        keys.add(_task_key(formulation, value))
+    return keys
+
+
+def run_tasks(tasks, filename='pareto_front.jsonl', num_workers=None):
+    """
+    Optimize the (formulation, value) tasks concurrently, appending each
+    record to filename as soon as it finishes. Returns the new records.
+    """
+    if not tasks:
+        return []
+
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    num_workers = min(num_workers, len(tasks))
+
+    records = []
+    with ProcessPoolExecutor(max_workers=num_workers) as pool, open(filename, 'a') as out:
+        futures = {pool.submit(_run_worker_task, task) : task for task in tasks}
+        for future in as_completed(futures):
+            # An error of one point (e.g. an AnalysisError outside the driver
+            # or a broken worker) must not drop the points still running
+            try:
+                record = future.result()
+            except Exception as err:
+                record = _error_record(futures[future], err)
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            records.append(record)
+
+            if record['formulation'] == 'weighted':
+                label = 'beta = %.4f' % record['beta']
+            else:
+                label = 'ws_max = %.5f' % record['ws_max']
+            if 'error' in record:
+                print('%s  failed: %s' % (label, record['error']))
+            else:
+                print('%s  Cd = %.5f  Ws = %.5f  (%d iterations, %.1f s)'
+                      % (label, record['Cd'], record['Ws'], record['iterations'], record['time']))
+
+    return records
+
+
+def run_front(betas, filename='pareto_front.jsonl', num_workers=None, resume=True):
+    """
+    Optimize every beta in betas concurrently and stream the records to filename.
+
+    Parameters
+    ----------
+    betas : iterable of float
+        Weights of the drag term in the objective.
+    filename : str
+        JSON-lines file; one record per line, appended as each beta finishes.
+    num_workers : int or None
+        Number of worker processes, os.cpu_count() when None.
+    resume : bool
+        Skip the betas that already have a converged record in filename;
+        betas whose optimization failed are run again.
+
+    Returns
+    -------
+    list of dict
+        All records in filename, sorted by structural mass.
+    """
+    done = set()
+    if resume:
+        done = _done_tasks(load_front(filename))
+    elif os.path.exists(filename):
+        os.remove(filename)
+
+    tasks = [('weighted', float(beta)) for beta in betas
+             if _task_key('weighted', beta) not in done]
+    run_tasks(tasks, filename, num_workers)
+
+    return load_front(filename)
+
+
+def front_gaps(records):
+    """
+    Distances between neighboring points of the front in (Cd, Ws) space,
+    each normalized by its range over the front. Failed points are ignored.
+
+    Returns the points sorted by Ws and the array of gaps between them.
+    """
+    points = sorted([rec for rec in records if not rec['failed']], key=lambda rec: rec['Ws'])
+    if len(points) < 2:
+        return points, np.zeros(0)
+
+    Cd = np.array([rec['Cd'] for rec in points])
+    Ws = np.array([rec['Ws'] for rec in points])
+    Cd_n = (Cd - Cd.min()) / max(np.ptp(Cd), 1e-12)
+    Ws_n = (Ws - Ws.min()) / max(np.ptp(Ws), 1e-12)
+
+    return points, np.hypot(np.diff(Cd_n), np.diff(Ws_n))
+
+
+def refine_front(filename='pareto_front.jsonl', tol=0.05, max_points=50,
+                 initial_betas=(0., 0.5, 1.), min_dbeta=1./64, num_workers=None, resume=True):
+    """
+    Build the front adaptively until no normalized gap is larger than tol.
+
+    In every round the largest gaps (one per worker) get a new point. A gap
+    between two weighted points is split by the mean of their betas. When the
+    betas are closer than min_dbeta, or that beta was already tried, the
+    weighted sum cannot reach the part of the front inside the gap, and the
+    point is computed with the epsilon-constraint formulation instead, with
+    ws_max halfway between the two structural masses.
+
+    Parameters
+    ----------
+    filename : str
+        JSON-lines file the records are streamed to.
+    tol : float
+        Target front resolution: the largest allowed normalized gap.
+    max_points : int
+        Maximum number of optimizations, including the initial betas.
+    initial_betas : tuple of float
+        Betas optimized before the first refinement round.
+    min_dbeta : float
+        Smallest beta interval that is still bisected.
+    num_workers : int or None
+        Number of worker processes, os.cpu_count() when None.
+    resume : bool
+        Continue from the records already in filename.
+
+    Returns
+    -------
+    list of dict
+        All records in filename, sorted by structural mass.
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+
+    records = run_front(initial_betas, filename, num_workers, resume)
+
+    # Tasks run by this call: a task that fails again is not retried within
+    # the same refinement
+    tried = set()
+    while len(records) < max_points:
+        points, gaps = front_gaps(records)
+        done = _done_tasks(records) | tried
+
+        tasks = []
+        for k in np.argsort(gaps)[::-1]:
+            if gaps[k] <= tol or len(tasks) >= min(num_workers, max_points - len(records)):
+                break
+
+            left, right = points[k], points[k + 1]
+            task = None
+            if left.get('formulation') == 'weighted' and right.get('formulation') == 'weighted' \
+                    and abs(right['beta'] - left['beta']) > min_dbeta:
+                task = ('weighted', 0.5 * (left['beta'] + right['beta']))
+            if task is None or _task_key(*task) in done:
+                task = ('epsilon', 0.5 * (left['Ws'] + right['Ws']))
+            if _task_key(*task) in done:
+                continue
+
+            done.add(_task_key(*task))
+            tasks.append(task)
+
+        if not tasks:
+            break
+
+        tried.update(_task_key(*task) for task in tasks)
+        run_tasks(tasks, filename, num_workers)
+        records = load_front(filename)
+
+    points, gaps = front_gaps(records)
+    print('%d optimizations, largest normalized gap %.3f'
+          % (len(records), gaps.max() if len(gaps) else 0.))
+    return records
+
+
+## Part-4: Plotting
+def plot_front(records, filename='ScanE_tradespace.png', max_labels=10):
+    """
+    Plot Ws against Cd for the records; beta labels are only drawn for small fronts.
+    """
+    import matplotlib.pyplot as plt
+
+    records = sorted([rec for rec in records if not rec['failed']], key=lambda rec: rec['Ws'])
+    beta = [rec['beta'] for rec in records]
+    Ws = [rec['Ws'] for rec in records]
+    Cd = [rec['Cd'] for rec in records]
+
+    csfont = {'fontname':'times new roman','fontsize':20}
+    fig1 = plt.figure(figsize=(7,6),dpi=150)
+    plt.plot(Cd,Ws,'--o', color='r', ms=8 )
+
+    plt.xlabel('$C_D$',**csfont)
+    plt.ylabel('$W_s$',**csfont)
+    plt.xticks(fontsize=16 )
+    plt.yticks(fontsize=16 )
+
+    if len(records) <= max_labels:
+        from adjustText import adjust_text
+        texts = [plt.text(Cd[i],Ws[i],r'$\beta$=%s'%(round(beta[i], 3)), fontsize=14)
+                 for i in range(len(beta)) if beta[i] is not None]
+        adjust_text(texts)
+
+    fig1.tight_layout()
+    fig1.savefig(filename, dpi=400)
+    return fig1
+
+
+if __name__ == "__main__":
+    # 'uniform' : fixed list of beta values
+    # 'adaptive': insert points where the front has the largest gaps
+    mode = 'adaptive'
+
+    t0 = time.perf_counter()
+    if mode == 'uniform':
+        records = run_front(np.linspace(0., 1., 51))
+    else:
+        records = refine_front(tol=0.05)
+    print('%d points on the front in %.1f s' % (len(records), time.perf_counter() - t0))
+
+    import matplotlib.pyplot as plt
+    plot_front(records)
+    plt.show()
@@ -0,0 +1,7 @@
+"""
+Helpers shared by the course scripts.
+
+The chapter folders are not importable packages (their names start with a
+digit), so scripts that need these helpers put the repository root on sys.path
+before importing from mdao_tools.
+"""
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Headless batch runner for the course scripts.
+
+Every chapter script defines run(visualize=False), which builds and runs its
+problem and returns a dict of results; N2 diagrams, OAS plots and figures are
+only produced with visualize=True. This module imports any set of them and
+calls their run functions, optionally in parallel, and reports the wall time
+of every job:
+
+    python -m mdao_tools.batch                       # all scripts with a run()
+    python -m mdao_tools.batch 04_OpenAeroStruct/aerodynamic_opt.py -j 4
+    python -m mdao_tools.batch 03_Optimal_design_with_OpenMDAO/scalable_mda.py:benchmark
+
+A job is path[:function], function defaulting to run. Every job runs in its
+own directory under --workdir, so the recorder databases and coloring files
+of concurrent jobs do not overwrite each other, and its output goes to
+output.log there unless --verbose is given. --json writes the timings and the
+returned results, e.g. for a nightly throughput benchmark.
+"""
+
+import argparse
+import contextlib
+import glob
+import importlib.util
+import inspect
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+# Repository root: the chapter folders are next to mdao_tools
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def discover(root=ROOT):
+    """
+    Scripts of the chapter folders (02 to 07) that define a top-level
+    run(visualize=False, ...). The XDSM scripts of chapter 01 only write
+    diagrams, and the benchmark modules are run as path:function.
+    """
+    scripts = []
+    for path in sorted(glob.glob(os.path.join(root, '0[2-7]_*', '*.py'))):
+        with open(path, encoding='utf-8') as f:
+            if re.search(r'^def run\(visualize', f.read(), re.MULTILINE):
+                scripts.append(os.path.relpath(path, root))
+    return scripts
+
+
+def parse_job(job):
+    """
+    Split path[:function] into an absolute path and a function name.
+    """
+    path, sep, func = job.rpartition(':')
+    # A bare path, or a Windows drive letter such as C:\...
+    if not sep or not func.isidentifier():
+        path, func = job, 'run'
+    if not os.path.isabs(path) and not os.path.exists(path):
+        path = os.path.join(ROOT, path)
+    return os.path.abspath(path), func
+
+
+def _jsonable(val):
+    """
+    Convert numpy arrays and scalars in the returned results for json.dump.
+    """
+    if isinstance(val, dict):
+        return {str(key) : _jsonable(v) for key, v in val.items()}
+    if isinstance(val, (list, tuple)):
+        return [_jsonable(v) for v in val]
+    if hasattr(val, 'tolist'):
+        return val.tolist()
+    if val is None or isinstance(val, (bool, int, float, str)):
+        return val
+    return repr(val)
+
+
+def run_job(job, workdir, visualize=False, verbose=False):
+    """
+    Import the script of job and call its function in a job directory under
+    workdir. Returns a dict with the import and run wall times, the results
+    and the error, if any.
+    """
+    path, func = parse_job(job)
+    name = os.path.splitext(os.path.basename(path))[0]
+    jobdir = os.path.join(os.path.abspath(workdir), '%s-%s' % (name, func))
+    os.makedirs(jobdir, exist_ok=True)
+
+    record = {'job' : job, 'dir' : jobdir, 'ok' : False,
+              'import_time' : 0., 'run_time' : 0., 'results' : None, 'error' : None}
+
+    if not visualize:
+        # No windows even if a script shows a figure
+        os.environ.setdefault('MPLBACKEND', 'Agg')
+
+    # Scripts import their neighbours (e.g. scaneagle_grid_sweep) and mdao_tools.
+    # Both are undone after the job, so that a later job of a serial batch does
+    # not resolve a same-named neighbour in the directory of an earlier one.
+    script_dir = os.path.dirname(path)
+    saved_path = list(sys.path)
+    saved_modules = set(sys.modules)
+    for p in (ROOT, script_dir):
+        if p not in sys.path:
+            sys.path.insert(0, p)
+
+    cwd = os.getcwd()
+    log = None
+    spec = None
+    try:
+        os.chdir(jobdir)
+        if verbose:
+            redirect = contextlib.ExitStack()
+        else:
+            log = open('output.log', 'w')
+            redirect = contextlib.ExitStack()
+            redirect.enter_context(contextlib.redirect_stdout(log))
+            redirect.enter_context(contextlib.redirect_stderr(log))
+
+        with redirect:
+            try:
+                t0 = time.perf_counter()
+                spec = importlib.util.spec_from_file_location('batch_%s' % name, path)
+                module = importlib.util.module_from_spec(spec)
+                # Registered before it runs, so that its classes and functions
+                # can be pickled, e.g. for the ProcessPoolExecutor of a job
+                sys.modules[spec.name] = module
+                spec.loader.exec_module(module)
+                record['import_time'] = time.perf_counter() - t0
+
+                function = getattr(module, func)
+                kwargs = {}
+                if 'visualize' in inspect.signature(function).parameters:
+                    kwargs['visualize'] = visualize
+
+                t0 = time.perf_counter()
+                results = function(**kwargs)
+                record['run_time'] = time.perf_counter() - t0
+
+                record['results'] = _jsonable(results)
+                record['ok'] = True
+            except BaseException as err:
+                if isinstance(err, KeyboardInterrupt):
+                    raise
+                traceback.print_exc()
+                record['error'] = '%s: %s' % (type(err).__name__, err)
+    finally:
+        os.chdir(cwd)
+        if log is not None:
+            log.close()
+
+        sys.path[:] = saved_path
+        if spec is not None:
+            sys.modules.pop(spec.name, None)
+        for mod_name in set(sys.modules) - saved_modules:
+            mod_file = getattr(sys.modules[mod_name], '__file__', None)
+            if mod_file and os.path.dirname(os.path.abspath(mod_file)) == script_dir:
+                del sys.modules[mod_name]
+
+    record['wall_time'] = record['import_time'] + record['run_time']
+    return record
+
+
+def _run_job(args):
+    return run_job(*args)
+
+
+def run_batch(jobs, workdir='batch_runs', num_workers=1, visualize=False, verbose=False):
+    """
+    Run the jobs, in num_workers processes when num_workers > 1, and return
+    their records in the order of jobs.
+    """
+    tasks = [(job, workdir, visualize, verbose) for job in jobs]
+    if num_workers > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            return list(pool.map(_run_job, tasks))
+    return [_run_job(task) for task in tasks]
+
+
+def report(records, total_time, out=None):
+    """
+    Print the wall time of every job and the throughput of the batch.
+    """
+    width = max([len(rec['job']) for rec in records] + [3])
+    print('\n%-*s %12s %12s %12s  %s' % (width, 'job', 'import [s]', 'run [s]', 'wall [s]',
+                                         'status'), file=out)
+    for rec in records:
+        print('%-*s %12.2f %12.2f %12.2f  %s'
+              % (width, rec['job'], rec['import_time'], rec['run_time'], rec['wall_time'],
+                 'ok' if rec['ok'] else rec['error']), file=out)
+
+    num_ok = sum(rec['ok'] for rec in records)
+    print('\n%d/%d jobs succeeded, %.2f s of job time in %.2f s wall time (%.2f jobs/min)'
+          % (num_ok, len(records), sum(rec['wall_time'] for rec in records), total_time,
+             60. * len(records) / max(total_time, 1e-12)), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m mdao_tools.batch',
+                                     description='Run course scripts headless and time them.')
+    parser.add_argument('jobs', nargs='*',
+                        help='path[:function] of the jobs (default: every chapter script)')
+    parser.add_argument('-j', '--jobs-parallel', dest='num_workers', type=int, default=1,
+                        help='number of worker processes')
+    parser.add_argument('--workdir', default='batch_runs',
+                        help='directory holding one output directory per job')
+    parser.add_argument('--visualize', action='store_true',
+                        help='pass visualize=True (N2, plots and figures)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='print the output of the jobs instead of writing output.log')
+    parser.add_argument('--json', help='write the records of the jobs to this file')
+    parser.add_argument('--list', action='store_true', help='list the jobs and exit')
+    args = parser.parse_args(argv)
+
+    jobs = args.jobs or discover()
+    if args.list:
+        print('\n'.join(jobs))
+        return 0
+
+    t0 = time.perf_counter()
+    records = run_batch(jobs, args.workdir, args.num_workers, args.visualize, args.verbose)
+    total_time = time.perf_counter() - t0
+
+    report(records, total_time)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'total_time' : total_time, 'num_workers' : args.num_workers,
+                       'jobs' : records}, f, indent=1)
+
+    return 0 if all(rec['ok'] for rec in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Memoizing wrapper around Problem.run_model.
+
+Course scripts often evaluate the same point more than once: a sweep revisits
+a (taper, sweep) value, or a script calls run_model at the point it has just
+evaluated. CachedEvaluator hashes the design variables (plus any extra inputs
+that change between evaluations) and skips the model evaluation when that
+point is already in the cache.
+
+Usage::
+
+    cached = CachedEvaluator(prob, inputs=['wing.taper', 'wing.sweep'],
+                             outputs=['AS_point_0.fuelburn', 'AS_point_0.CM'])
+    for taper, sweep in points:
+        prob.set_val('wing.taper', taper)
+        prob.set_val('wing.sweep', sweep)
+        cached.run_model()
+        f = prob.get_val('AS_point_0.fuelburn')
+    cached.report()
+
+On a hit the cached outputs are written back with prob.set_val, so
+prob.get_val returns the values of that point. Only the listed outputs are
+restored; if the point is the one the model was last run at, the whole model
+is already in that state (so e.g. compute_totals is valid, see
+model_is_current), otherwise only the listed outputs are.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+class CachedEvaluator(object):
+    """
+    LRU cache of model outputs keyed by a hash of the input values.
+
+    Parameters
+    ----------
+    prob : Problem
+        A problem that has been set up.
+    inputs : list of str or None
+        Variables, in addition to the design variables, whose values define a
+        point (e.g. inputs set by a sweep that are not design variables).
+    outputs : list of str or None
+        Variables stored for every point. Defaults to the objectives and
+        constraints of the model.
+    maxsize : int
+        Maximum number of cached points.
+    max_bytes : int
+        Maximum total size of the cached output arrays.
+    """
+
+    def __init__(self, prob, inputs=None, outputs=None, maxsize=1024, max_bytes=256 * 2**20):
+        self.prob = prob
+
+        self.inputs = list(prob.model.get_design_vars(recurse=True))
+        for name in inputs or []:
+            if name not in self.inputs:
+                self.inputs.append(name)
+
+        if outputs is None:
+            outputs = list(prob.model.get_objectives(recurse=True))
+            outputs += list(prob.model.get_constraints(recurse=True))
+        self.outputs = list(outputs)
+
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+
+        self._cache = OrderedDict()
+        self._nbytes = 0
+        # Point the model was last run at, and point whose values the cached
+        # outputs currently hold (they differ after a hit is restored)
+        self._model_key = None
+        self._outputs_key = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self):
+        """
+        Hash of the current values of all inputs.
+        """
+        sha = hashlib.sha1()
+        for name in self.inputs:
+            val = np.ascontiguousarray(self.prob.get_val(name))
+            sha.update(name.encode())
+            sha.update(str(val.shape).encode())
+            sha.update(val.tobytes())
+        return sha.hexdigest()
+
+    def run_model(self):
+        """
+        Run the model unless the current point is cached.
+
+        Returns True on a cache hit and False when the model was run.
+        """
+        key = self.key()
+
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            if key != self._outputs_key:
+                for name, val in self._cache[key].items():
+                    self.prob.set_val(name, val)
+                self._outputs_key = key
+            return True
+
+        self.misses += 1
+        self.prob.run_model()
+        self._model_key = self._outputs_key = key
+        self._store(key, {name : np.array(self.prob.get_val(name), copy=True)
+                          for name in self.outputs})
+        return False
+
+    def _store(self, key, values):
+        nbytes = sum(val.nbytes for val in values.values())
+        if nbytes > self.max_bytes:
+            return
+
+        self._cache[key] = values
+        self._nbytes += nbytes
+
+        # Evict the least recently used points
+        while len(self._cache) > self.maxsize or self._nbytes > self.max_bytes:
+            old_key, old_values = self._cache.popitem(last=False)
+            self._nbytes -= sum(val.nbytes for val in old_values.values())
+            self.evictions += 1
+
+    def clear(self):
+        self._cache.clear()
+        self._nbytes = 0
+        self._model_key = None
+        self._outputs_key = None
+
+    @property
+    def model_is_current(self):
+        """
+        True if the whole model, not only the cached outputs, is in the state
+        of the current point (e.g. before calling compute_totals).
+        """
+        return self._model_key is not None and self._model_key == self.key()
+
+    @property
+    def hit_rate(self):
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def report(self, out=None):
+        """
+        Print the number of hits, misses and evictions and the hit rate.
+        """
+        print('cache: %d hits, %d misses (hit rate %.1f%%), %d evictions, %d points, %.1f kB'
+              % (self.hits, self.misses, 100. * self.hit_rate, self.evictions,
+                 len(self._cache), self._nbytes / 1024.), file=out)
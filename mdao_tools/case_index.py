@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Indexed, lazy access to recorded driver cases.
+
+om.CaseReader loads and converts every case it touches, which is slow for
+post-processing that only needs the last iteration or the history of a few
+variables. open_case_index reads the recorder file directly with sqlite3:
+
+    index = open_case_index('aerostruct.db')
+    index.counters                        # iterations, from the index
+    index.names                           # recorded variables
+    index.get('AS_point_0.fuelburn')      # one variable of the last case
+    f = index.history('AS_point_0.fuelburn')   # all iterations, memory-mapped
+
+For a SqliteRecorder database (aerostruct.db) the list of iterations and
+variables is kept in a sidecar index file next to the database and rebuilt
+only when the database changes. A history is extracted by streaming the rows
+one at a time and is cached as a .npy file that is returned memory-mapped, so
+the next call does not touch the database at all.
+
+The files of mdao_tools.recording.CompressedRecorder are read the same way;
+there every array is stored separately, so a history only reads the blobs of
+that variable.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import zlib
+from urllib.request import pathname2url
+
+import numpy as np
+
+
+def _connect(filepath):
+    """
+    Read-only connection to filepath: the readers never modify the recorder
+    file.
+    """
+    uri = 'file:%s?mode=ro' % pathname2url(os.path.abspath(filepath))
+    return sqlite3.connect(uri, uri=True)
+
+
+def open_case_index(filepath, cache_dir=None):
+    """
+    Return a SqliteCaseIndex or CompressedCaseIndex for filepath, depending
+    on the format of the file.
+    """
+    with contextlib.closing(_connect(filepath)) as conn:
+        tables = set(row[0] for row in
+                     conn.execute("SELECT name FROM sqlite_master WHERE type='table'"))
+    if 'arrays' in tables and 'variables' in tables:
+        return CompressedCaseIndex(filepath, cache_dir)
+    return SqliteCaseIndex(filepath, cache_dir)
+
+
+class _CaseIndex(object):
+    """
+    Common part of the readers: the history cache and name lookup.
+    """
+    def __init__(self, filepath, cache_dir=None):
+        self.filepath = filepath
+        if cache_dir is None:
+            cache_dir = filepath + '.cache'
+        self.cache_dir = cache_dir
+
+        stat = os.stat(filepath)
+        self._stamp = [stat.st_size, stat.st_mtime]
+
+        self.counters = []
+        self.names = []
+
+    def _connect(self):
+        return _connect(self.filepath)
+
+    def resolve(self, name):
+        """
+        Full recorded name of name, which may also be a unique suffix such as
+        'fuelburn' for 'AS_point_0.fuelburn'.
+        """
+        if name in self.names:
+            return name
+        matches = [n for n in self.names if n.endswith('.' + name)]
+        if not matches:
+            raise KeyError('%s is not recorded' % name)
+        if len(matches) > 1:
+            raise KeyError('%s is ambiguous, it matches %s' % (name, matches))
+        return matches[0]
+
+    def _cache_file(self, name):
+        key = hashlib.sha1(name.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, '%s.npy' % key)
+
+    def _cache_valid(self):
+        stamp_file = os.path.join(self.cache_dir, 'stamp.json')
+        if os.path.exists(stamp_file):
+            with open(stamp_file) as f:
+                if json.load(f) == self._stamp:
+                    return True
+        # The database changed: start a new cache
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        for fname in os.listdir(self.cache_dir):
+            if fname.endswith('.npy'):
+                os.remove(os.path.join(self.cache_dir, fname))
+        with open(stamp_file, 'w') as f:
+            json.dump(self._stamp, f)
+        return False
+
+    def history(self, name):
+        """
+        Values of name at every iteration, as an array of shape
+        (len(counters),) + shape, memory-mapped from the cache.
+        """
+        return self.histories([name])[self.resolve(name)]
+
+    def histories(self, names):
+        """
+        Histories of several variables, extracted in a single pass.
+        """
+        names = [self.resolve(name) for name in names]
+        valid = self._cache_valid()
+
+        missing = [name for name in names
+                   if not (valid and os.path.exists(self._cache_file(name)))]
+        if missing:
+            self._extract(missing)
+
+        return {name : np.load(self._cache_file(name), mmap_mode='r') for name in names}
+
+    def _new_history(self, name, first):
+        first = np.asarray(first)
+        return np.lib.format.open_memmap(self._cache_file(name), mode='w+', dtype=first.dtype,
+                                         shape=(len(self.counters),) + first.shape)
+
+
+class SqliteCaseIndex(_CaseIndex):
+    """
+    Lazy reader of the driver cases of a SqliteRecorder database.
+    """
+    def __init__(self, filepath, cache_dir=None, table='driver_iterations'):
+        super(SqliteCaseIndex, self).__init__(filepath, cache_dir)
+        self.table = table
+
+        index_file = filepath + '.idx.json'
+        index = None
+        if os.path.exists(index_file):
+            with open(index_file) as f:
+                index = json.load(f)
+            if index.get('stamp') != self._stamp or index.get('table') != table:
+                index = None
+
+        if index is None:
+            index = self._build_index()
+            with open(index_file, 'w') as f:
+                json.dump(index, f)
+
+        self.counters = index['counters']
+        self.coordinates = index['coordinates']
+        self.names = index['names']
+
+    def _build_index(self):
+        with contextlib.closing(self._connect()) as conn:
+            rows = conn.execute('SELECT counter, iteration_coordinate FROM %s ORDER BY counter'
+                                % self.table).fetchall()
+            names = []
+            if rows:
+                # All driver cases record the same variables
+                names = sorted(self._decode_row(conn, rows[-1][0]))
+
+        return {'stamp' : self._stamp,
+                'table' : self.table,
+                'counters' : [row[0] for row in rows],
+                'coordinates' : [row[1] for row in rows],
+                'names' : names}
+
+    @staticmethod
+    def _decode(blob):
+        """
+        Decode an inputs/outputs column: JSON text in recent OpenMDAO
+        versions, a pickled numpy structured array in older ones.
+        """
+        if blob is None:
+            return {}
+        if isinstance(blob, bytes):
+            try:
+                data = pickle.loads(blob)
+            except Exception:
+                data = json.loads(blob.decode())
+        else:
+            data = json.loads(blob)
+
+        if isinstance(data, np.ndarray) and data.dtype.names:
+            return {name : data[name][0] for name in data.dtype.names}
+        return data if isinstance(data, dict) else {}
+
+    def _decode_row(self, conn, counter):
+        outputs, inputs = conn.execute('SELECT outputs, inputs FROM %s WHERE counter=?'
+                                       % self.table, (counter,)).fetchone()
+        values = self._decode(inputs)
+        values.update(self._decode(outputs))
+        return values
+
+    def get(self, name, iteration=-1):
+        """
+        Value of name in one case (by default the last one). Only that row is
+        read and decoded.
+        """
+        name = self.resolve(name)
+        with contextlib.closing(self._connect()) as conn:
+            return np.asarray(self._decode_row(conn, self.counters[iteration])[name])
+
+    def _extract(self, names):
+        hist = {}
+        with contextlib.closing(self._connect()) as conn:
+            cursor = conn.execute('SELECT outputs, inputs FROM %s ORDER BY counter' % self.table)
+            # The cursor streams the rows, only one case is decoded at a time
+            for k, (outputs, inputs) in enumerate(cursor):
+                values = self._decode(inputs)
+                values.update(self._decode(outputs))
+                for name in names:
+                    val = np.asarray(values[name])
+                    if name not in hist:
+                        hist[name] = self._new_history(name, val)
+                    hist[name][k] = val
+
+        for arr in hist.values():
+            arr.flush()
+
+
+class CompressedCaseIndex(_CaseIndex):
+    """
+    Lazy reader of a mdao_tools.recording.CompressedRecorder file.
+
+    Arrays are only stored when they change, so the histories repeat the
+    last stored value in the iterations in between. The recorder creates the
+    arrays_name index used by get and history; files written without it are
+    still read, with a scan of the arrays table.
+    """
+    def __init__(self, filepath, cache_dir=None, source='driver'):
+        super(CompressedCaseIndex, self).__init__(filepath, cache_dir)
+        self.source = source
+
+        with contextlib.closing(self._connect()) as conn:
+            self.counters = [row[0] for row in conn.execute(
+                'SELECT counter FROM iterations WHERE source=? ORDER BY counter', (source,))]
+            self._meta = {name : (np.dtype(dtype), tuple(json.loads(shape)))
+                          for name, dtype, shape in conn.execute('SELECT * FROM variables')}
+        self.names = sorted(self._meta)
+
+    def _array(self, name, blob):
+        dtype, shape = self._meta[name]
+        return np.frombuffer(zlib.decompress(blob), dtype).reshape(shape)
+
+    def get(self, name, iteration=-1):
+        """
+        Value of name in one case (by default the last one): the last value
+        stored at or before that iteration.
+        """
+        name = self.resolve(name)
+        with contextlib.closing(self._connect()) as conn:
+            row = conn.execute('SELECT data FROM arrays WHERE name=? AND counter<=? '
+                               'ORDER BY counter DESC LIMIT 1',
+                               (name, self.counters[iteration])).fetchone()
+        return self._array(name, row[0])
+
+    def _extract(self, names):
+        counters = np.array(self.counters)
+        with contextlib.closing(self._connect()) as conn:
+            for name in names:
+                dtype, shape = self._meta[name]
+                hist = np.lib.format.open_memmap(self._cache_file(name), mode='w+', dtype=dtype,
+                                                 shape=(len(counters),) + shape)
+                rows = conn.execute('SELECT counter, data FROM arrays WHERE name=? '
+                                    'ORDER BY counter', (name,))
+                # Every stored value fills the iterations until the next one
+                start, val = 0, None
+                for counter, blob in rows:
+                    stop = np.searchsorted(counters, counter)
+                    if val is not None:
+                        hist[start:stop] = val
+                    start, val = stop, self._array(name, blob)
+                if val is not None:
+                    hist[start:] = val
+                hist.flush()
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+Compact case recording.
+
+SqliteRecorder with includes=['*'] pickles every recorded variable at every
+iteration, so a long aerostructural optimization writes the full mesh, loads
+and stresses hundreds of times even when they did not change. CompressedRecorder
+writes to a plain sqlite3 file and
+
+    - stores every array as a zlib-compressed blob of its raw bytes,
+    - only stores an array when it changed since it was last stored,
+    - records variables matching a decimation pattern only every k-th
+      iteration of their source (driver, solver, system, ...; the latest
+      value is always written on shutdown),
+    - keeps the number of bytes written per iteration (see report()).
+
+AsyncCompressedRecorder does the compression and the writing in a background
+thread, so the driver only pays for copying the recorded arrays.
+
+The file is not an OpenMDAO case recorder database, so it cannot be read with
+om.CaseReader or plot_wing. The dtype and shape of every variable are in the
+variables table; an array is np.frombuffer(zlib.decompress(data), dtype)
+reshaped to that shape. mdao_tools.case_index reads these files, and the
+SqliteRecorder databases, without loading every case.
+"""
+
+import atexit
+import fnmatch
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+from openmdao.recorders.case_recorder import CaseRecorder
+
+
+class CompressedRecorder(CaseRecorder):
+    """
+    Recorder storing compressed, changed-only arrays in a sqlite3 file.
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the sqlite3 file. An existing file is overwritten.
+    decimation : dict or None
+        Mapping of a variable name pattern (fnmatch syntax) to k: matching
+        variables are only recorded every k-th iteration, counted separately
+        for every source (driver, solver, system, ...), e.g.
+        {'*def_mesh' : 10, '*vonmises' : 5}.
+    compresslevel : int
+        zlib compression level (1 fastest, 9 smallest).
+    """
+
+    def __init__(self, filepath, decimation=None, compresslevel=6):
+        super(CompressedRecorder, self).__init__(record_viewer_data=False)
+        self._filepath = filepath
+        self.decimation = dict(decimation or {})
+        self.compresslevel = compresslevel
+
+        self._conn = None
+        self._last = {}
+        self._pending = {}
+        self._variables = set()
+        self._every = {}
+        # Number of iterations recorded so far for every source. The global
+        # counter also advances for the other sources, so decimation uses this.
+        self._source_iterations = {}
+
+        # per recorded iteration: (counter, raw bytes, bytes written)
+        self.bytes_per_iteration = []
+
+    def startup(self, recording_requester, comm=None):
+        super(CompressedRecorder, self).startup(recording_requester, comm)
+
+        # As with SqliteRecorder, only rank 0 writes.
+        if (comm is None or comm.rank == 0) and self._conn is None:
+            self._open()
+
+    def _open(self):
+        self._conn = sqlite3.connect(self._filepath)
+        with self._conn:
+            self._conn.executescript("""
+                DROP TABLE IF EXISTS iterations;
+                DROP TABLE IF EXISTS variables;
+                DROP TABLE IF EXISTS arrays;
+                CREATE TABLE iterations(counter INTEGER, source TEXT,
+                                        iteration_coordinate TEXT, timestamp REAL,
+                                        success INTEGER, msg TEXT,
+                                        PRIMARY KEY(counter, source));
+                CREATE TABLE variables(name TEXT PRIMARY KEY, dtype TEXT, shape TEXT);
+                CREATE TABLE arrays(counter INTEGER, name TEXT, data BLOB,
+                                    PRIMARY KEY(counter, name));
+                CREATE INDEX arrays_name ON arrays(name, counter);
+                """)
+
+    def _decimation_step(self, name):
+        if name not in self._every:
+            self._every[name] = 1
+            for pattern, every in self.decimation.items():
+                if fnmatch.fnmatchcase(name, pattern):
+                    self._every[name] = every
+                    break
+        return self._every[name]
+
+    def _array_rows(self, counter, values, force=False, iteration=None):
+        """
+        Rows (counter, name, blob) of the arrays that must be stored, and the
+        raw and compressed number of bytes. iteration is the iteration of the
+        source of the values, used for the decimation (counter when None).
+        """
+        if iteration is None:
+            iteration = counter
+        rows = []
+        raw_bytes = 0
+        written = 0
+        for name, val in values.items():
+            if val is None:
+                continue
+            arr = np.ascontiguousarray(val)
+
+            if not force and iteration % self._decimation_step(name) != 0:
+                self._pending[name] = arr.copy()
+                continue
+            self._pending.pop(name, None)
+
+            last = self._last.get(name)
+            if last is not None and last.shape == arr.shape and np.array_equal(last, arr):
+                continue
+            self._last[name] = arr.copy()
+
+            if name not in self._variables:
+                self._variables.add(name)
+                self._conn.execute('INSERT OR REPLACE INTO variables VALUES (?, ?, ?)',
+                                   (name, arr.dtype.str, str(list(arr.shape))))
+
+            raw = arr.tobytes()
+            blob = zlib.compress(raw, self.compresslevel)
+            rows.append((counter, name, blob))
+            raw_bytes += len(raw)
+            written += len(blob)
+
+        return rows, raw_bytes, written
+
+    def _next_iteration(self, source):
+        """
+        Iteration of source for the record being written: 0, 1, 2, ...
+        """
+        iteration = self._source_iterations.get(source, 0)
+        self._source_iterations[source] = iteration + 1
+        return iteration
+
+    def _record(self, source, values, metadata):
+        if self._conn is None:
+            return
+        self._write([(self._counter, source, self._iteration_coordinate, values, metadata,
+                      self._next_iteration(source))])
+
+    def _write(self, snapshots):
+        """
+        Write a list of (counter, source, iteration coordinate, values,
+        metadata, source iteration) snapshots in one transaction.
+        """
+        with self._conn:
+            for counter, source, coord, values, metadata, iteration in snapshots:
+                self._conn.execute('INSERT OR REPLACE INTO iterations VALUES (?, ?, ?, ?, ?, ?)',
+                                   (counter, source, coord,
+                                    metadata.get('timestamp', time.time()),
+                                    int(metadata.get('success', 1)), metadata.get('msg', '')))
+                rows, raw_bytes, written = self._array_rows(counter, values,
+                                                            iteration=iteration)
+                self._conn.executemany('INSERT OR REPLACE INTO arrays VALUES (?, ?, ?)', rows)
+                self.bytes_per_iteration.append((counter, raw_bytes, written))
+
+    @staticmethod
+    def _values(data):
+        values = {}
+        for key in ('output', 'out', 'input', 'in'):
+            if data.get(key):
+                values.update(data[key])
+        return values
+
+    def record_iteration_driver(self, recording_requester, data, metadata):
+        self._record('driver', self._values(data), metadata)
+
+    def record_iteration_system(self, recording_requester, data, metadata):
+        self._record(recording_requester.pathname or 'root', self._values(data), metadata)
+
+    def record_iteration_solver(self, recording_requester, data, metadata):
+        self._record('solver', self._values(data), metadata)
+
+    def record_iteration_problem(self, recording_requester, data, metadata):
+        self._record('problem', self._values(data), metadata)
+
+    def record_derivatives_driver(self, recording_requester, data, metadata):
+        values = {}
+        for key, val in data.items():
+            if not isinstance(key, str):
+                key = '!'.join(key)
+            values['derivs:' + key] = val
+        self._record('driver_derivatives', values, metadata)
+
+    def record_metadata_system(self, *args, **kwargs):
+        pass
+
+    def record_metadata_solver(self, *args, **kwargs):
+        pass
+
+    def record_viewer_data(self, *args, **kwargs):
+        pass
+
+    def shutdown(self):
+        if self._conn is None:
+            return
+        self._close()
+
+    def _close(self):
+        # Store the latest value of the decimated variables, so the final
+        # state is always in the file.
+        if self._pending:
+            with self._conn:
+                rows, raw_bytes, written = self._array_rows(self._counter, self._pending,
+                                                            force=True)
+                self._conn.executemany('INSERT OR REPLACE INTO arrays VALUES (?, ?, ?)', rows)
+            self._pending = {}
+
+        self._conn.close()
+        self._conn = None
+
+    def report(self, out=None):
+        """
+        Print the bytes written per iteration and the compression ratio.
+        """
+        if not self.bytes_per_iteration:
+            print('nothing recorded', file=out)
+            return
+
+        counters, raw, written = np.array(self.bytes_per_iteration).T
+        print('%d iterations recorded to %s' % (len(counters), self._filepath), file=out)
+        print('bytes written per iteration: mean %.0f, max %.0f, total %.0f'
+              % (written.mean(), written.max(), written.sum()), file=out)
+        print('uncompressed bytes of the stored arrays: %.0f (ratio %.1f)'
+              % (raw.sum(), raw.sum() / max(written.sum(), 1)), file=out)
+
+
+class AsyncCompressedRecorder(CompressedRecorder):
+    """
+    CompressedRecorder that writes from a background thread.
+
+    Every record call copies the recorded arrays and puts the snapshot in a
+    bounded queue; the writer thread owns the sqlite3 connection and writes
+    the queued snapshots in batched transactions. When the queue is full the
+    driver waits, so memory use stays bounded. The queue is flushed and the
+    file closed on shutdown (end of the driver run) and, if shutdown is never
+    reached, at interpreter exit.
+
+    Parameters
+    ----------
+    filepath, decimation, compresslevel
+        See CompressedRecorder.
+    maxsize : int
+        Maximum number of snapshots waiting in the queue.
+    batch_size : int
+        Maximum number of snapshots written in one transaction.
+    """
+
+    _STOP = object()
+
+    def __init__(self, filepath, decimation=None, compresslevel=6, maxsize=64, batch_size=16):
+        super(AsyncCompressedRecorder, self).__init__(filepath, decimation, compresslevel)
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._error = None
+
+    def startup(self, recording_requester, comm=None):
+        CaseRecorder.startup(self, recording_requester, comm)
+
+        if (comm is None or comm.rank == 0) and self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name='recorder-writer',
+                                            daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def _writer(self):
+        try:
+            self._open()
+            stop = False
+            while not stop:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if batch[-1] is self._STOP:
+                    batch.pop()
+                    stop = True
+                if batch:
+                    self._write(batch)
+        except Exception as err:
+            self._error = err
+        finally:
+            if self._conn is not None:
+                self._close()
+
+    def _put(self, item):
+        # Wait for room in the queue, unless the writer thread has died
+        while True:
+            try:
+                self._queue.put(item, timeout=1.)
+                return
+            except queue.Full:
+                if not self._thread.is_alive():
+                    raise RuntimeError('recorder writer thread failed: %s' % self._error)
+
+    def _record(self, source, values, metadata):
+        if self._thread is None:
+            return
+        if self._error is not None:
+            raise RuntimeError('recorder writer thread failed: %s' % self._error)
+
+        # Copy now: the model overwrites its vectors in the next iteration
+        values = {name : None if val is None else np.array(val, copy=True)
+                  for name, val in values.items()}
+        self._put((self._counter, source, self._iteration_coordinate, values, dict(metadata),
+                   self._next_iteration(source)))
+
+    def shutdown(self):
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            self._put(self._STOP)
+        self._thread.join()
+        self._thread = None
+        atexit.unregister(self.shutdown)
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""
+Builder for the ScanEagle aerostructural problem used in chapters 04-07.
+
+The surface definition, the IndepVarComp with the flight conditions and the
+AerostructGeometry/AerostructPoint wiring are the same as in
+04_OpenAeroStruct/aerostruct_ScanEagle.py. Results using this model were
+presented in https://arc.aiaa.org/doi/abs/10.2514/6.2018-1658
+
+With cache=True the artifacts that do not depend on the design point are
+stored in CACHE_DIR, keyed by a hash of the configuration: the mesh (.npz)
+and, only when total-derivative coloring is requested with coloring=True, the
+coloring of the driver, which is computed during the first run_driver and
+loaded by every later run or worker process with the same configuration.
+Both are written to a private file or directory first and moved into place
+with os.replace, so concurrent processes never read a partial file. A set-up
+Problem itself cannot be stored (it holds the vectors, solvers and
+jacobians), so setup is still run every time.
+
+With trim=True alpha is not an independent variable: a BalanceComp drives
+AS_point_0.L_equals_W to zero and a Newton solver at the model level solves
+for alpha, so a single run_model returns a trimmed (L = W) analysis.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+from openaerostruct.geometry.utils import generate_mesh
+from openaerostruct.integration.aerostruct_groups import AerostructGeometry, AerostructPoint
+import openmdao.api as om
+from openaerostruct.utils.constants import grav_constant
+
+
+# Directory of the cached meshes and colorings
+CACHE_DIR = os.environ.get('MDAO_TOOLS_CACHE',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'mdao_tools'))
+
+# Design variables of the ScanEagle optimization and their bounds
+DESIGN_VARS = {
+    'wing.twist_cp' : dict(lower=-5., upper=10.),
+    'wing.thickness_cp' : dict(lower=0.001, upper=0.01, scaler=1e3),
+    'wing.sweep' : dict(lower=10., upper=30.),
+    'wing.taper' : dict(lower=0.5, upper=1.),
+    'alpha' : dict(lower=-10., upper=10.),
+    }
+
+
+def config_hash(config):
+    """
+    Short hash of a configuration made of dicts, lists, numbers, strings and
+    numpy arrays, used to name the cache files.
+    """
+    def default(obj):
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+        return repr(obj)
+
+    text = json.dumps([om.__version__, config], sort_keys=True, default=default)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+class _ColoringCacheDriver(om.ScipyOptimizeDriver):
+    """
+    ScipyOptimizeDriver that moves the total coloring it computed into the
+    cache once run_driver is done.
+
+    OpenMDAO writes the coloring to the coloring_dir of the problem, which is
+    a private directory here; the finished file is then moved to
+    coloring_file, so a concurrent process never loads a partial coloring.
+    """
+    def _declare_options(self):
+        super(_ColoringCacheDriver, self)._declare_options()
+
+        self.options.declare('coloring_file', types=str, allow_none=True, default=None,
+                             desc='Cache file the computed total coloring is moved to.')
+        self.options.declare('coloring_tmp_dir', types=str, allow_none=True, default=None,
+                             desc='Private coloring directory of the problem.')
+
+    def run(self):
+        failed = super(_ColoringCacheDriver, self).run()
+
+        tmp_dir = self.options['coloring_tmp_dir']
+        if tmp_dir is not None:
+            tmp_file = os.path.join(tmp_dir, 'total_coloring.pkl')
+            if os.path.exists(tmp_file):
+                os.makedirs(os.path.dirname(self.options['coloring_file']), exist_ok=True)
+                os.replace(tmp_file, self.options['coloring_file'])
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            self.options['coloring_tmp_dir'] = None
+
+        return failed
+
+
+def scaneagle_mesh(num_y=21, num_x=3, cache=False):
+    """
+    Create the cambered rectangular ScanEagle mesh.
+
+    num_y and num_x are the number of nodes in the spanwise and chordwise
+    directions. Vary these to change the level of fidelity. With cache=True
+    the mesh is loaded from / saved to CACHE_DIR.
+    """
+    if cache:
+        fname = os.path.join(CACHE_DIR, 'scaneagle_mesh_%s.npz'
+                             % config_hash({'num_y' : num_y, 'num_x' : num_x}))
+        if os.path.exists(fname):
+            with np.load(fname) as data:
+                return data['mesh']
+
+    mesh_dict = {'num_y' : num_y,
+                 'num_x' : num_x,
+                 'wing_type' : 'rect',
+                 'symmetry' : True,
+                 'span_cos_spacing' : 0.5,
+                 'span' : 3.11,
+                 'root_chord' : 0.3,
+                 }
+
+    mesh = generate_mesh(mesh_dict)
+
+    # Apply camber to the mesh
+    camber = 1 - np.linspace(-1, 1, num_x) ** 2
+    camber *= 0.3 * 0.05
+    for ind_x in range(num_x):
+        mesh[ind_x, :, 2] = camber[ind_x]
+
+    if cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix='.npz', dir=CACHE_DIR)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, mesh=mesh)
+            os.replace(tmp, fname)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    return mesh
+
+
+def scaneagle_surface(num_y=21, num_x=3, cache=False, **kwargs):
+    """
+    Return the ScanEagle surface dictionary.
+
+    Any keyword argument overrides the corresponding surface entry, e.g.
+    scaneagle_surface(taper=0.8, thickness_cp=np.ones(3)*.001).
+    """
+    # Introduce geometry manipulation variables to define the ScanEagle shape
+    zshear_cp = np.zeros(10)
+    zshear_cp[0] = .3
+
+    xshear_cp = np.zeros(10)
+    xshear_cp[0] = .15
+
+    chord_cp = np.ones(10)
+    chord_cp[0] = .5
+    chord_cp[-1] = 1.5
+    chord_cp[-2] = 1.3
+
+    radius_cp = 0.01  * np.ones(10)
+
+    surface = {
+                # Wing definition
+                'name' : 'wing',        # name of the surface
+                'symmetry' : True,     # if true, model one half of wing
+                                        # reflected across the plane y = 0
+                'S_ref_type' : 'wetted', # how we compute the wing area,
+                                         # can be 'wetted' or 'projected'
+                'fem_model_type' : 'tube',
+
+                'taper' : 0.9,
+                'zshear_cp' : zshear_cp,
+                'xshear_cp' : xshear_cp,
+                'chord_cp' : chord_cp,
+                'sweep' : 20.,
+                'twist_cp' : np.array([2.5, 2.5, 5.]),  # twist control points(cp)
+                'thickness_cp' : np.ones((3))*.008,     # thickness control points(cp)
+
+                # Give OAS the radius and mesh from before
+                'radius_cp' : radius_cp,
+                'mesh' : scaneagle_mesh(num_y, num_x, cache),
+
+                # Aerodynamic performance of the lifting surface at
+                # an angle of attack of 0 (alpha=0).
+                # These CL0 and CD0 values are added to the CL and CD
+                # obtained from aerodynamic analysis of the surface to get
+                # the total CL and CD.
+                # These CL0 and CD0 values do not vary wrt alpha.
+                'CL0' : 0.0,            # CL of the surface at alpha=0
+                'CD0' : 0.015,            # CD of the surface at alpha=0
+
+                # Airfoil properties for viscous drag calculation
+                'k_lam' : 0.05,         # percentage of chord with laminar
+                                        # flow, used for viscous drag
+                't_over_c_cp' : np.array([0.12]),      # thickness over chord ratio
+                'c_max_t' : .303,       # chordwise location of maximum (NACA0015)
+                                        # thickness
+                'with_viscous' : True,
+                'with_wave' : False,     # if true, compute wave drag
+
+                # Material properties taken from http://www.performance-composites.com/carbonfibre/mechanicalproperties_2.asp
+                'E' : 85.e9,
+                'G' : 25.e9,
+                'yield' : 350.e6,
+                'mrho' : 1.6e3,
+
+                'fem_origin' : 0.35,    # normalized chordwise location of the spar
+                'wing_weight_ratio' : 1., # multiplicative factor on the computed structural weight
+                'struct_weight_relief' : True,    # True to add the weight of the structure to the loads on the structure
+                'distributed_fuel_weight' : False,
+                # Constraints
+                'exact_failure_constraint' : False, # if false, use KS function
+                }
+
+    surface.update(kwargs)
+    return surface
+
+
+def add_scaneagle_model(model, surface, trim=False):
+    """
+    Add the flight conditions, the AerostructGeometry group 'wing' and the
+    AerostructPoint group 'AS_point_0' to model and connect them.
+
+    With trim=True alpha is the output of the BalanceComp 'trim', which
+    drives AS_point_0.L_equals_W to zero, and model is given a Newton solver.
+    """
+    # Add problem information as an independent variables component
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output('v', val=22.876, units='m/s')
+    if not trim:
+        indep_var_comp.add_output('alpha', val=5., units='deg')
+    indep_var_comp.add_output('Mach_number', val=0.071)
+    indep_var_comp.add_output('re', val=1.e6, units='1/m')
+    indep_var_comp.add_output('rho', val=0.770816, units='kg/m**3')
+    indep_var_comp.add_output('CT', val=grav_constant * 8.6e-6, units='1/s')
+    indep_var_comp.add_output('R', val=1800e3, units='m')
+    indep_var_comp.add_output('W0', val=10.,  units='kg')
+    indep_var_comp.add_output('speed_of_sound', val=322.2, units='m/s')
+    indep_var_comp.add_output('load_factor', val=1.)
+    indep_var_comp.add_output('empty_cg', val=np.array([0.2, 0., 0.]), units='m')
+
+    model.add_subsystem('prob_vars', indep_var_comp, promotes=['*'])
+
+    # Add the AerostructGeometry group, which computes all the intermediary
+    # parameters for the aero and structural analyses, like the structural
+    # stiffness matrix and some aerodynamic geometry arrays
+    name = surface['name']
+    model.add_subsystem(name, AerostructGeometry(surface=surface))
+
+    # Create the aerostruct point group and add it to the model.
+    # This contains all the actual aerostructural analyses.
+    point_name = 'AS_point_0'
+    model.add_subsystem(point_name, AerostructPoint(surfaces=[surface]),
+        promotes_inputs=['v', 'alpha', 'Mach_number', 're', 'rho', 'CT', 'R',
+            'W0', 'speed_of_sound', 'empty_cg', 'load_factor'])
+
+    # Issue quite a few connections within the model to make sure all of the
+    # parameters are connected correctly.
+    com_name = point_name + '.' + name + '_perf'
+    model.connect(name + '.local_stiff_transformed', point_name + '.coupled.' + name + '.local_stiff_transformed')
+    model.connect(name + '.nodes', point_name + '.coupled.' + name + '.nodes')
+
+    # Connect aerodynamic mesh to coupled group mesh
+    model.connect(name + '.mesh', point_name + '.coupled.' + name + '.mesh')
+
+    # Connect performance calculation variables
+    model.connect(name + '.radius', com_name + '.radius')
+    model.connect(name + '.thickness', com_name + '.thickness')
+    model.connect(name + '.nodes', com_name + '.nodes')
+    model.connect(name + '.cg_location', point_name + '.' + 'total_perf.' + name + '_cg_location')
+    model.connect(name + '.structural_mass', point_name + '.' + 'total_perf.' + name + '_structural_mass')
+    model.connect(name + '.t_over_c', com_name + '.t_over_c')
+
+    if trim:
+        # alpha such that L = W. The balance closes a loop around AS_point_0,
+        # so the model is converged by Newton; solve_subsystems lets the
+        # coupled aerostructural solver converge its states at every step.
+        balance = om.BalanceComp()
+        balance.add_balance('alpha', val=5., units='deg', lower=-10., upper=10.,
+                            lhs_name='L_equals_W', rhs_val=0.)
+        model.add_subsystem('trim', balance, promotes_outputs=['alpha'])
+        model.connect(point_name + '.L_equals_W', 'trim.L_equals_W')
+
+        model.nonlinear_solver = om.NewtonSolver(solve_subsystems=True, maxiter=20,
+                                                 atol=1e-8, rtol=1e-10,
+                                                 err_on_non_converge=True)
+        model.linear_solver = om.DirectSolver()
+
+
+def add_beta_objective(model, Cd_ref=0.04294, Ws_ref=0.06638):
+    """
+    Add the weighted objective f = beta*(Cd/Cd_ref) + (1-beta)*(Ws/Ws_ref) of
+    the tradespace script, with beta an independent variable.
+    """
+    indep_var_beta = om.IndepVarComp()
+    indep_var_beta.add_output('beta', val=0.5)
+    model.add_subsystem('prob_beta', indep_var_beta, promotes=['*'])
+    comp = om.ExecComp('f = beta*(Cd/%s) + (1-beta)*(Ws/%s)' % (Cd_ref, Ws_ref))
+
+    model.add_subsystem('Obj', comp, promotes_outputs=['f'])
+    model.connect('AS_point_0.CD', 'Obj.Cd')
+    model.connect('wing.structural_mass', 'Obj.Ws')
+    model.connect('beta', 'Obj.beta')
+
+
+def build_scaneagle_problem(surface=None, design_vars=None, maxiter=None, tol=1e-7,
+                            recorder_file=None, objective='fuelburn', setup=True,
+                            recorder=None, cache=False, trim=False, coloring=False):
+    """
+    Build the ScanEagle fuel-burn optimization problem.
+
+    Parameters
+    ----------
+    surface : dict or None
+        Surface dictionary, scaneagle_surface() by default.
+    design_vars : dict or None
+        Mapping of design variable name to add_design_var keyword arguments.
+        Defaults to DESIGN_VARS (twist, thickness, sweep, taper and alpha,
+        without alpha when trim is True).
+    maxiter : int or None
+        Maximum number of SLSQP iterations; the driver default when None.
+    tol : float
+        SLSQP tolerance.
+    recorder_file : str or None
+        If given, attach a SqliteRecorder writing to this file.
+    objective : str
+        'fuelburn' to minimize AS_point_0.fuelburn, 'CD' to minimize
+        AS_point_0.CD, or 'beta' to minimize the weighted
+        drag/structural-mass objective f of add_beta_objective.
+    setup : bool
+        Call prob.setup() before returning.
+    recorder : CaseRecorder or None
+        Recorder to attach instead of a SqliteRecorder on recorder_file,
+        e.g. a mdao_tools.recording.CompressedRecorder.
+    cache : bool
+        Use the cached mesh for the default surface and, with coloring=True,
+        the cached total coloring of this configuration (see the module
+        docstring). With coloring, only use it when no design variables or
+        responses are added after this call, or the cached coloring will not
+        match the problem.
+    trim : bool
+        Solve alpha for L = W inside the model (see add_scaneagle_model)
+        instead of leaving it to the driver: alpha cannot be a design
+        variable and there is no L_equals_W constraint. run_model then gives
+        a trimmed analysis without an optimizer.
+    coloring : bool
+        Compute the total-derivative coloring of the driver (declare_coloring),
+        which changes how the optimizer's derivatives are computed. Off by
+        default, as in the course scripts.
+
+    Returns
+    -------
+    Problem
+    """
+    if surface is None:
+        surface = scaneagle_surface(cache=cache)
+    if design_vars is None:
+        design_vars = DESIGN_VARS
+        if trim:
+            design_vars = {name : kwargs for name, kwargs in design_vars.items()
+                           if name != 'alpha'}
+    elif trim and 'alpha' in design_vars:
+        raise ValueError('alpha is solved by the trim balance and cannot be a design variable')
+
+    prob = om.Problem()
+    if cache and coloring:
+        # The coloring is loaded from the coloring directory of this
+        # configuration, or computed in a private directory and moved there
+        key = config_hash({'surface' : surface, 'design_vars' : design_vars,
+                           'objective' : objective, 'trim' : trim})
+        coloring_file = os.path.join(CACHE_DIR, 'coloring_%s' % key, 'total_coloring.pkl')
+        coloring_tmp_dir = None
+        if not os.path.exists(coloring_file):
+            coloring_tmp_dir = os.path.join(CACHE_DIR, 'coloring_%s.%s.tmp'
+                                            % (key, uuid.uuid4().hex[:8]))
+            prob.options['coloring_dir'] = coloring_tmp_dir
+    add_scaneagle_model(prob.model, surface, trim)
+    if objective == 'beta':
+        add_beta_objective(prob.model)
+
+    # Set the optimizer type
+    prob.driver = _ColoringCacheDriver() if cache and coloring else om.ScipyOptimizeDriver()
+    prob.driver.options['tol'] = tol
+    if maxiter is not None:
+        prob.driver.options['maxiter'] = maxiter
+    if cache and coloring:
+        if coloring_tmp_dir is None:
+            prob.driver.use_fixed_coloring(coloring_file)
+        else:
+            prob.driver.options['coloring_file'] = coloring_file
+            prob.driver.options['coloring_tmp_dir'] = coloring_tmp_dir
+            prob.driver.declare_coloring()
+    elif coloring:
+        prob.driver.declare_coloring()
+
+    # Record data from this problem so we can visualize it using plot_wing
+    if recorder is None and recorder_file is not None:
+        recorder = om.SqliteRecorder(recorder_file)
+    if recorder is not None:
+        prob.driver.add_recorder(recorder)
+        prob.driver.recording_options['record_derivatives'] = True
+        prob.driver.recording_options['includes'] = ['*']
+
+    for name, kwargs in design_vars.items():
+        prob.model.add_design_var(name, **kwargs)
+
+    # Make sure the spar doesn't fail, we meet the lift needs, and the aircraft
+    # is trimmed through CM=0.
+    prob.model.add_constraint('AS_point_0.wing_perf.failure', upper=0.)
+    prob.model.add_constraint('AS_point_0.wing_perf.thickness_intersects', upper=0.)
+    if not trim:
+        prob.model.add_constraint('AS_point_0.L_equals_W', equals=0.)
+
+    # Instead of using an equality constraint here, we have to give it a little
+    # wiggle room to make SLSQP work correctly.
+    prob.model.add_constraint('AS_point_0.CM', lower=-0.001, upper=0.001)
+    prob.model.add_constraint('wing.twist_cp', lower=np.array([-1e20, -1e20, 5.]), upper=np.array([1e20, 1e20, 5.]))
+
+    if objective == 'beta':
+        prob.model.add_objective('f', scaler=.1)
+    elif objective == 'CD':
+        prob.model.add_objective('AS_point_0.CD', scaler=10.)
+    else:
+        # We're trying to minimize fuel burn
+        prob.model.add_objective('AS_point_0.fuelburn', scaler=.1)
+
+    if setup:
+        prob.setup()
+
+    return prob
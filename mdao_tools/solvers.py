@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Accelerated fixed-point solvers for the coupled groups of the course scripts.
+
+NonlinearBlockGS converges linearly, at a rate set by the strength of the
+coupling, and the cycle is solved again at every optimizer iteration and
+finite-difference step. Two accelerations are available through
+fixed_point_solver:
+
+    'nlbgs'     plain NonlinearBlockGS
+    'aitken'    NonlinearBlockGS with Aitken's dynamic relaxation (use_aitken)
+    'anderson'  AndersonBlockGS: every Gauss-Seidel sweep is followed by an
+                Anderson mixing step over the last anderson_depth sweeps
+
+The Anderson step works on the whole output vector of the group, so it is
+only meant for serial (non-distributed) groups.
+"""
+
+import numpy as np
+import openmdao.api as om
+
+
+# Methods accepted by fixed_point_solver
+FIXED_POINT_METHODS = ('nlbgs', 'aitken', 'anderson')
+
+
+class AndersonBlockGS(om.NonlinearBlockGS):
+    """
+    NonlinearBlockGS with Anderson mixing.
+
+    With x the outputs before a sweep, g = G(x) the outputs after it and
+    f = g - x, the next iterate is
+
+        x_new = x + beta f - (dX + beta dF) gamma,  gamma = argmin |f - dF gamma|
+
+    where the columns of dF and dX are the differences of f and x over the
+    last anderson_depth sweeps. beta=1 gives x_new = g - dG gamma. The
+    convergence check is that of NonlinearBlockGS.
+    """
+
+    SOLVER = 'NL: NLBGS-Anderson'
+
+    def _declare_options(self):
+        super(AndersonBlockGS, self)._declare_options()
+
+        self.options.declare('anderson_depth', types=int, default=5, lower=0,
+                             desc='Number of previous sweeps used in the mixing step; '
+                                  '0 gives plain (relaxed) Gauss-Seidel.')
+        self.options.declare('anderson_beta', default=1., lower=0., upper=1.,
+                             desc='Relaxation of the mixing step.')
+
+    def _iter_initialize(self):
+        # Every solve starts a new history
+        self._history_g = []
+        self._history_f = []
+        return super(AndersonBlockGS, self)._iter_initialize()
+
+    def _single_iteration(self):
+        outputs = self._system()._outputs
+        x = outputs.asarray(copy=True)
+
+        # One Gauss-Seidel sweep: g = G(x)
+        super(AndersonBlockGS, self)._single_iteration()
+        g = outputs.asarray(copy=True)
+        f = g - x
+
+        depth = self.options['anderson_depth']
+        beta = self.options['anderson_beta']
+
+        self._history_g.append(g)
+        self._history_f.append(f)
+        del self._history_g[:-(depth + 1)]
+        del self._history_f[:-(depth + 1)]
+
+        if len(self._history_f) > 1:
+            dG = np.diff(np.array(self._history_g), axis=0).T
+            dF = np.diff(np.array(self._history_f), axis=0).T
+            gamma = np.linalg.lstsq(dF, f, rcond=None)[0]
+            # dX + beta dF = dG - (1 - beta) dF
+            outputs.set_val(x + beta * f - (dG - (1. - beta) * dF).dot(gamma))
+        elif beta != 1.:
+            outputs.set_val(x + beta * f)
+
+
+def fixed_point_solver(method='nlbgs', anderson_depth=5, **kwargs):
+    """
+    Nonlinear solver for a coupled group.
+
+    Parameters
+    ----------
+    method : str
+        One of FIXED_POINT_METHODS.
+    anderson_depth : int
+        History depth of the 'anderson' method.
+    **kwargs
+        Options of the solver, e.g. iprint, maxiter or atol.
+
+    Returns
+    -------
+    NonlinearBlockGS
+    """
+    if method == 'nlbgs':
+        return om.NonlinearBlockGS(**kwargs)
+    if method == 'aitken':
+        return om.NonlinearBlockGS(use_aitken=True, **kwargs)
+    if method == 'anderson':
+        return AndersonBlockGS(anderson_depth=anderson_depth, **kwargs)
+    raise ValueError('method must be one of %s, not %r' % (FIXED_POINT_METHODS, method))
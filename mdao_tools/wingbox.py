@@ -0,0 +1,457 @@
+# -*- coding: utf-8 -*-
+"""
+Builder for the uCRM wingbox aerostructural problem of
+04_OpenAeroStruct/aerostruct_wingbox.py.
+
+By default the wing is analysed at two flight points: cruise (AS_point_0,
+where the fuel burn is computed) and a 2.5g maneuver (AS_point_1, where the
+structure is sized). flight_points(num_points) adds more maneuver points, and
+with parallel=True the points are put in a ParallelGroup, so that under MPI
+they are distributed over the ranks.
+
+The fuel mass carried by every point must equal the cruise fuel burn. By
+default fuel_mass is a design variable and fuel_diff = 0 an equality
+constraint of the optimizer; with fuel_balance=True a BalanceComp solves
+fuel_diff = 0 for fuel_mass inside the model, converged by a Newton solver on
+the group 'fuel_cycle' holding AS_point_0, fuel_diff and the balance.
+"""
+
+import numpy as np
+from openaerostruct.geometry.utils import generate_mesh
+from openaerostruct.integration.aerostruct_groups import AerostructGeometry, AerostructPoint
+from openaerostruct.structures.wingbox_fuel_vol_delta import WingboxFuelVolDelta
+import openmdao.api as om
+
+
+# Provide coordinates for a portion of an airfoil for the wingbox cross-section as an nparray with dtype=complex (to work with the complex-step approximation for derivatives).
+# These should be for an airfoil with the chord scaled to 1.
+# We use the 10% to 60% portion of the NASA SC2-0612 airfoil for this case
+# We use the coordinates available from airfoiltools.com. Using such a large number of coordinates is not necessary.
+# The first and last x-coordinates of the upper and lower surfaces must be the same
+upper_x = np.array([0.1, 0.11, 0.12, 0.13, 0.14, 0.15, 0.16, 0.17, 0.18, 0.19, 0.2, 0.21, 0.22, 0.23, 0.24, 0.25, 0.26, 0.27, 0.28, 0.29, 0.3, 0.31, 0.32, 0.33, 0.34, 0.35, 0.36, 0.37, 0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47, 0.48, 0.49, 0.5, 0.51, 0.52, 0.53, 0.54, 0.55, 0.56, 0.57, 0.58, 0.59, 0.6], dtype = 'complex128')
+lower_x = np.array([0.1, 0.11, 0.12, 0.13, 0.14, 0.15, 0.16, 0.17, 0.18, 0.19, 0.2, 0.21, 0.22, 0.23, 0.24, 0.25, 0.26, 0.27, 0.28, 0.29, 0.3, 0.31, 0.32, 0.33, 0.34, 0.35, 0.36, 0.37, 0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47, 0.48, 0.49, 0.5, 0.51, 0.52, 0.53, 0.54, 0.55, 0.56, 0.57, 0.58, 0.59, 0.6], dtype = 'complex128')
+upper_y = np.array([ 0.0447,  0.046,  0.0472,  0.0484,  0.0495,  0.0505,  0.0514,  0.0523,  0.0531,  0.0538, 0.0545,  0.0551,  0.0557, 0.0563,  0.0568, 0.0573,  0.0577,  0.0581,  0.0585,  0.0588,  0.0591,  0.0593,  0.0595,  0.0597,  0.0599,  0.06,    0.0601,  0.0602,  0.0602,  0.0602,  0.0602,  0.0602,  0.0601,  0.06,    0.0599,  0.0598,  0.0596,  0.0594,  0.0592,  0.0589,  0.0586,  0.0583,  0.058,   0.0576,  0.0572,  0.0568,  0.0563,  0.0558,  0.0553,  0.0547,  0.0541], dtype = 'complex128')
+lower_y = np.array([-0.0447, -0.046, -0.0473, -0.0485, -0.0496, -0.0506, -0.0515, -0.0524, -0.0532, -0.054, -0.0547, -0.0554, -0.056, -0.0565, -0.057, -0.0575, -0.0579, -0.0583, -0.0586, -0.0589, -0.0592, -0.0594, -0.0595, -0.0596, -0.0597, -0.0598, -0.0598, -0.0598, -0.0598, -0.0597, -0.0596, -0.0594, -0.0592, -0.0589, -0.0586, -0.0582, -0.0578, -0.0573, -0.0567, -0.0561, -0.0554, -0.0546, -0.0538, -0.0529, -0.0519, -0.0509, -0.0497, -0.0485, -0.0472, -0.0458, -0.0444], dtype = 'complex128')
+
+
+# Connections from the model to every flight point as (source, target,
+# indexed). '{point}' and '{name}' are replaced by the names of the point and
+# the surface; indexed sources hold one value per flight point and the point
+# gets src_indices=[i].
+POINT_CONNECTIONS = [
+    ('v', '{point}.v', True),
+    ('Mach_number', '{point}.Mach_number', True),
+    ('re', '{point}.re', True),
+    ('rho', '{point}.rho', True),
+    ('CT', '{point}.CT', False),
+    ('R', '{point}.R', False),
+    ('W0', '{point}.W0', False),
+    ('speed_of_sound', '{point}.speed_of_sound', True),
+    ('empty_cg', '{point}.empty_cg', False),
+    ('load_factor', '{point}.load_factor', True),
+    ('fuel_mass', '{point}.total_perf.L_equals_W.fuelburn', False),
+    ('fuel_mass', '{point}.total_perf.CG.fuelburn', False),
+    ]
+
+SURFACE_CONNECTIONS = [
+    ('{name}.local_stiff_transformed', '{point}.coupled.{name}.local_stiff_transformed', False),
+    ('{name}.nodes', '{point}.coupled.{name}.nodes', False),
+
+    # Connect aerodyamic mesh to coupled group mesh
+    ('{name}.mesh', '{point}.coupled.{name}.mesh', False),
+
+    # Connect performance calculation variables
+    ('{name}.nodes', '{point}.{name}_perf.nodes', False),
+    ('{name}.cg_location', '{point}.total_perf.{name}_cg_location', False),
+    ('{name}.structural_mass', '{point}.total_perf.{name}_structural_mass', False),
+
+    # Connect wingbox properties to von Mises stress calcs
+    ('{name}.Qz', '{point}.{name}_perf.Qz', False),
+    ('{name}.J', '{point}.{name}_perf.J', False),
+    ('{name}.A_enc', '{point}.{name}_perf.A_enc', False),
+    ('{name}.htop', '{point}.{name}_perf.htop', False),
+    ('{name}.hbottom', '{point}.{name}_perf.hbottom', False),
+    ('{name}.hfront', '{point}.{name}_perf.hfront', False),
+    ('{name}.hrear', '{point}.{name}_perf.hrear', False),
+    ('{name}.spar_thickness', '{point}.{name}_perf.spar_thickness', False),
+    ('{name}.t_over_c', '{point}.{name}_perf.t_over_c', False),
+
+    ('point_masses', '{point}.coupled.{name}.point_masses', False),
+    ('point_mass_locations', '{point}.coupled.{name}.point_mass_locations', False),
+    ]
+
+# Only for surfaces with struct_weight_relief
+WEIGHT_RELIEF_CONNECTIONS = [
+    ('{name}.element_mass', '{point}.coupled.{name}.element_mass', False),
+    ]
+
+# Only for surfaces with distributed_fuel_weight
+FUEL_WEIGHT_CONNECTIONS = [
+    ('load_factor', '{point}.coupled.load_factor', True),
+    ('{name}.struct_setup.fuel_vols', '{point}.coupled.{name}.struct_states.fuel_vols', False),
+    ('fuel_mass', '{point}.coupled.{name}.struct_states.fuel_mass', False),
+    ]
+
+
+def wingbox_surface(num_y=15, num_x=3, **kwargs):
+    """
+    Return the uCRM wingbox surface dictionary.
+
+    Any keyword argument overrides the corresponding surface entry.
+    """
+    # Create a dictionary to store options about the surface
+    mesh_dict = {'num_y' : num_y,
+                 'num_x' : num_x,
+                 'wing_type' : 'uCRM_based',
+                 'symmetry' : True,
+                 'chord_cos_spacing' : 0,
+                 'span_cos_spacing' : 0,
+                 'num_twist_cp' : 4
+                 }
+
+    mesh, twist_cp = generate_mesh(mesh_dict)
+
+    surf_dict = {
+                # Wing definition
+                'name' : 'wing',         # give the surface some name
+                'symmetry' : True,       # if True, model only one half of the lifting surface
+                'S_ref_type' : 'projected', # how we compute the wing area,
+                                         # can be 'wetted' or 'projected'
+                'mesh' : mesh,
+
+                'fem_model_type' : 'wingbox', # 'wingbox' or 'tube'
+                'data_x_upper' : upper_x,
+                'data_x_lower' : lower_x,
+                'data_y_upper' : upper_y,
+                'data_y_lower' : lower_y,
+
+                'twist_cp' : np.array([4., 5., 8., 9.]), # [deg]
+
+                'spar_thickness_cp' : np.array([0.004, 0.005, 0.008, 0.01]), # [m]
+                'skin_thickness_cp' : np.array([0.005, 0.01, 0.015, 0.025]), # [m]
+
+                't_over_c_cp' : np.array([0.08, 0.08, 0.10, 0.08]),
+                'original_wingbox_airfoil_t_over_c' : 0.12,
+
+                # Aerodynamic deltas.
+                # These CL0 and CD0 values are added to the CL and CD
+                # obtained from aerodynamic analysis of the surface to get
+                # the total CL and CD.
+                # These CL0 and CD0 values do not vary wrt alpha.
+                # They can be used to account for things that are not included, such as contributions from the fuselage, camber, etc.
+                'CL0' : 0.0,            # CL delta
+                'CD0' : 0.0078,         # CD delta
+
+                'with_viscous' : True,  # if true, compute viscous drag
+                'with_wave' : True,     # if true, compute wave drag
+
+                # Airfoil properties for viscous drag calculation
+                'k_lam' : 0.05,         # fraction of chord with laminar
+                                        # flow, used for viscous drag
+                'c_max_t' : .38,       # chordwise location of maximum thickness
+
+                # Structural values are based on aluminum 7075
+                'E' : 73.1e9,              # [Pa] Young's modulus
+                'G' : (73.1e9/2/1.33),     # [Pa] shear modulus (calculated using E and the Poisson's ratio here)
+                'yield' : (420.e6 / 1.5),  # [Pa] allowable yield stress
+                'mrho' : 2.78e3,           # [kg/m^3] material density
+                'strength_factor_for_upper_skin' : 1.0, # the yield stress is multiplied by this factor for the upper skin
+
+                'wing_weight_ratio' : 1.25,
+                'exact_failure_constraint' : False, # if false, use KS function
+
+                'struct_weight_relief' : True,
+                'distributed_fuel_weight' : True,
+                'n_point_masses' : 1,       # number of point masses in the system; in this case, the engine (omit option if no point masses)
+
+                'fuel_density' : 803.,      # [kg/m^3] fuel density (only needed if the fuel-in-wing volume constraint is used)
+                'Wf_reserve' : 15000.,       # [kg] reserve fuel mass
+                }
+
+    surf_dict.update(kwargs)
+    return surf_dict
+
+
+def flight_points(num_points=2):
+    """
+    Flight conditions of the cruise point followed by num_points - 1
+    sea-level maneuver points with load factors from 2.5 down to 1.5.
+
+    Returns a dict of arrays of length num_points; num_points=2 gives the
+    conditions of aerostruct_wingbox.py.
+    """
+    n_man = num_points - 1
+    load_factor = np.linspace(2.5, 1.5, n_man) if n_man > 1 else 2.5 * np.ones(n_man)
+    Mach_number = np.concatenate([[0.85], 0.64 * np.ones(n_man)])
+    speed_of_sound = np.concatenate([[295.07], 340.294 * np.ones(n_man)])
+    rho = np.concatenate([[0.348], 1.225 * np.ones(n_man)])
+    mu = np.concatenate([[1.43*1e-5], 1.81206*1e-5 * np.ones(n_man)])
+
+    return {'Mach_number' : Mach_number,
+            'v' : Mach_number * speed_of_sound,
+            're' : rho * speed_of_sound * Mach_number * 1. / mu,
+            'rho' : rho,
+            'speed_of_sound' : speed_of_sound,
+            'load_factor' : np.concatenate([[1.], load_factor])}
+
+
+def _connect_table(model, table, i, connected, **names):
+    for src, tgt, indexed in table:
+        src = src.format(**names)
+        tgt = tgt.format(**names)
+        if tgt in connected:
+            continue
+        connected.add(tgt)
+        if indexed:
+            model.connect(src, tgt, src_indices=[i])
+        else:
+            model.connect(src, tgt)
+
+
+def connect_point(model, point_name, i, surfaces):
+    """
+    Connect flight point i (the AerostructPoint point_name) to the flight
+    conditions and to the geometry groups of the surfaces.
+    """
+    connected = set()
+    _connect_table(model, POINT_CONNECTIONS, i, connected, point=point_name)
+    for surface in surfaces:
+        tables = [SURFACE_CONNECTIONS]
+        if surface['struct_weight_relief']:
+            tables.append(WEIGHT_RELIEF_CONNECTIONS)
+        if surface['distributed_fuel_weight']:
+            tables.append(FUEL_WEIGHT_CONNECTIONS)
+        for table in tables:
+            _connect_table(model, table, i, connected, point=point_name, name=surface['name'])
+
+
+def add_wingbox_model(model, surface, conditions=None, parallel=False, fuel_balance=False):
+    """
+    Add the flight conditions, the AerostructGeometry group 'wing', one
+    AerostructPoint group per flight point, the fuel volume constraint and
+    fuel_diff to model and connect them.
+
+    Parameters
+    ----------
+    model : Group
+        Group to add the subsystems to.
+    surface : dict
+        Surface dictionary.
+    conditions : dict or None
+        Flight conditions as returned by flight_points, flight_points(2) by
+        default. Point 0 is the cruise point with angle of attack 'alpha'; the
+        other points are maneuvers with angles of attack 'alpha_maneuver'.
+    parallel : bool
+        Add the points to a ParallelGroup 'multipoint'. Its variables are
+        promoted, so the points keep the names AS_point_0, AS_point_1, ...
+    fuel_balance : bool
+        Make fuel_mass the output of the BalanceComp 'fuel_balance' driving
+        fuel_diff to zero. AS_point_0, fuel_diff and the balance are put in
+        the group 'fuel_cycle' with a Newton solver; its variables are
+        promoted, so they keep their names.
+    """
+    surfaces = [surface]
+    if conditions is None:
+        conditions = flight_points(2)
+    num_points = len(conditions['Mach_number'])
+
+    # Add problem information as an independent variables component
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output('Mach_number', val=conditions['Mach_number'])
+    indep_var_comp.add_output('v', val=conditions['v'], units='m/s')
+    indep_var_comp.add_output('re',val=conditions['re'],  units='1/m')
+    indep_var_comp.add_output('rho', val=conditions['rho'], units='kg/m**3')
+    indep_var_comp.add_output('speed_of_sound', val=conditions['speed_of_sound'], units='m/s')
+
+    indep_var_comp.add_output('CT', val=0.53/3600, units='1/s')
+    indep_var_comp.add_output('R', val=14.307e6, units='m')
+    indep_var_comp.add_output('W0_without_point_masses', val=128000 + surface['Wf_reserve'],  units='kg')
+
+    indep_var_comp.add_output('load_factor', val=conditions['load_factor'])
+    indep_var_comp.add_output('alpha', val=0., units='deg')
+    if num_points > 1:
+        indep_var_comp.add_output('alpha_maneuver', val=np.zeros(num_points - 1), units='deg')
+
+    indep_var_comp.add_output('empty_cg', val=np.zeros((3)), units='m')
+
+    if not fuel_balance:
+        indep_var_comp.add_output('fuel_mass', val=10000., units='kg')
+
+    point_masses = np.array([[10.e3]])
+    point_mass_locations = np.array([[25, -10., 0.]])
+
+    indep_var_comp.add_output('point_masses', val=point_masses, units='kg')
+    indep_var_comp.add_output('point_mass_locations', val=point_mass_locations, units='m')
+
+    model.add_subsystem('prob_vars', indep_var_comp, promotes=['*'])
+
+    # Compute the actual W0 to be used within OAS based on the sum of the point mass and other W0 weight
+    model.add_subsystem('W0_comp',
+        om.ExecComp('W0 = W0_without_point_masses + 2 * sum(point_masses)', units='kg'),
+        promotes=['*'])
+
+    for surface in surfaces:
+        model.add_subsystem(surface['name'], AerostructGeometry(surface=surface))
+
+    if fuel_balance:
+        # fuel_mass such that fuel_diff = 0. This closes a loop through
+        # AS_point_0 (fuel_mass -> fuelburn -> fuel_diff), so the cruise point
+        # and the balance get their own Newton solver; solve_subsystems lets
+        # the coupled solver of the point converge its states at every step.
+        # The DirectSolver only factorizes the Jacobian of this group, not
+        # that of the whole model with the maneuver points. The maneuver
+        # points use fuel_mass, so the group runs before them.
+        cycle = model.add_subsystem('fuel_cycle', om.Group(), promotes=['*'])
+        cycle.nonlinear_solver = om.NewtonSolver(solve_subsystems=True, maxiter=20,
+                                                 atol=1e-6, rtol=1e-10)
+        cycle.linear_solver = om.DirectSolver()
+
+    # The points only depend on the geometry, not on each other
+    if parallel:
+        points = model.add_subsystem('multipoint', om.ParallelGroup(), promotes=['*'])
+    else:
+        points = model
+
+    # Add the cruise (0) and maneuver (1, 2, ...) aerostruct points
+    for i in range(num_points):
+        point_name = 'AS_point_{}'.format(i)
+
+        AS_point = AerostructPoint(surfaces=surfaces, internally_connect_fuelburn=False)
+        if fuel_balance and i == 0:
+            cycle.add_subsystem(point_name, AS_point)
+        else:
+            points.add_subsystem(point_name, AS_point)
+
+        connect_point(model, point_name, i, surfaces)
+
+    model.connect('alpha', 'AS_point_0' + '.alpha')
+    for i in range(1, num_points):
+        model.connect('alpha_maneuver', 'AS_point_{}'.format(i) + '.alpha', src_indices=[i - 1])
+
+    # Here we add the fuel volume constraint componenet to the model
+    model.add_subsystem('fuel_vol_delta', WingboxFuelVolDelta(surface=surface))
+    model.connect('wing.struct_setup.fuel_vols', 'fuel_vol_delta.fuel_vols')
+    model.connect('AS_point_0.fuelburn', 'fuel_vol_delta.fuelburn')
+
+    comp = om.ExecComp('fuel_diff = (fuel_mass - fuelburn) / fuelburn', units='kg')
+    group = cycle if fuel_balance else model
+    group.add_subsystem('fuel_diff', comp,
+        promotes_inputs=['fuel_mass'],
+        promotes_outputs=['fuel_diff'])
+    group.connect('AS_point_0.fuelburn', 'fuel_diff.fuelburn')
+
+    if fuel_balance:
+        balance = om.BalanceComp()
+        balance.add_balance('fuel_mass', val=10000., units='kg', eq_units='kg', lower=0.,
+                            lhs_name='fuel_diff', rhs_val=0.)
+        cycle.add_subsystem('fuel_balance', balance,
+            promotes_inputs=['fuel_diff'],
+            promotes_outputs=['fuel_mass'])
+
+
+def build_wingbox_problem(surface=None, tol=1e-2, recorder_file=None, setup=True,
+                          conditions=None, parallel=False, recorder=None, fuel_balance=False):
+    """
+    Build the uCRM wingbox fuel-burn optimization problem.
+
+    Parameters
+    ----------
+    surface : dict or None
+        Surface dictionary, wingbox_surface() by default.
+    tol : float
+        SLSQP tolerance.
+    recorder_file : str or None
+        If given, attach a SqliteRecorder writing the variables needed by
+        plot_wingbox to this file.
+    setup : bool
+        Call prob.setup() before returning.
+    conditions, parallel
+        Flight points, see add_wingbox_model. The L = W and failure
+        constraints are applied to every maneuver point.
+    recorder : CaseRecorder or None
+        Recorder to attach instead of a SqliteRecorder on recorder_file,
+        e.g. a mdao_tools.recording.CompressedRecorder.
+    fuel_balance : bool
+        Solve fuel_mass in the model (see add_wingbox_model) instead of
+        adding the fuel_mass design variable and the fuel_diff constraint.
+
+    Returns
+    -------
+    Problem
+    """
+    if surface is None:
+        surface = wingbox_surface()
+    if conditions is None:
+        conditions = flight_points(2)
+
+    prob = om.Problem()
+    add_wingbox_model(prob.model, surface, conditions, parallel, fuel_balance)
+
+    prob.model.add_objective('AS_point_0.fuelburn', scaler=1e-5)
+
+    prob.model.add_design_var('wing.twist_cp', lower=-15., upper=15., scaler=0.1)
+    prob.model.add_design_var('wing.spar_thickness_cp', lower=0.003, upper=0.1, scaler=1e2)
+    prob.model.add_design_var('wing.skin_thickness_cp', lower=0.003, upper=0.1, scaler=1e2)
+    prob.model.add_design_var('wing.geometry.t_over_c_cp', lower=0.07, upper=0.2, scaler=10.)
+    # A single-point (cruise only) problem has no maneuver angle of attack
+    num_points = len(conditions['Mach_number'])
+    if num_points > 1:
+        prob.model.add_design_var('alpha_maneuver', lower=-15., upper=15)
+
+    prob.model.add_constraint('AS_point_0.CL', equals=0.5)
+    for i in range(1, num_points):
+        prob.model.add_constraint('AS_point_{}.L_equals_W'.format(i), equals=0.)
+        prob.model.add_constraint('AS_point_{}.wing_perf.failure'.format(i), upper=0.)
+    prob.model.add_constraint('fuel_vol_delta.fuel_vol_delta', lower=0.)
+
+    if not fuel_balance:
+        prob.model.add_design_var('fuel_mass', lower=0., upper=2e5, scaler=1e-5)
+        prob.model.add_constraint('fuel_diff', equals=0.)
+
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options['optimizer'] = 'SLSQP'
+    prob.driver.options['tol'] = tol
+
+    if recorder is None and recorder_file is not None:
+        recorder = om.SqliteRecorder(recorder_file)
+    if recorder is not None:
+        prob.driver.add_recorder(recorder)
+
+        # For large meshes the database file becomes extremely large with
+        # includes=['*'], so we just select the variables we need.
+        prob.driver.recording_options['includes'] = [
+            'alpha', 'rho', 'v', 'cg',
+            'AS_point_1.cg', 'AS_point_0.cg',
+            'AS_point_0.coupled.wing_loads.loads',
+            'AS_point_1.coupled.wing_loads.loads',
+            'AS_point_0.coupled.wing.normals',
+            'AS_point_1.coupled.wing.normals',
+            'AS_point_0.coupled.wing.widths',
+            'AS_point_1.coupled.wing.widths',
+            'AS_point_0.coupled.aero_states.wing_sec_forces',
+            'AS_point_1.coupled.aero_states.wing_sec_forces',
+            'AS_point_0.wing_perf.CL1',
+            'AS_point_1.wing_perf.CL1',
+            'AS_point_0.coupled.wing.S_ref',
+            'AS_point_1.coupled.wing.S_ref',
+            'wing.geometry.twist',
+            'wing.mesh',
+            'wing.skin_thickness',
+            'wing.spar_thickness',
+            'wing.t_over_c',
+            'wing.structural_mass',
+            'AS_point_0.wing_perf.vonmises',
+            'AS_point_1.wing_perf.vonmises',
+            'AS_point_0.coupled.wing.def_mesh',
+            'AS_point_1.coupled.wing.def_mesh',
+            ]
+
+        prob.driver.recording_options['record_objectives'] = True
+        prob.driver.recording_options['record_constraints'] = True
+        prob.driver.recording_options['record_desvars'] = True
+        prob.driver.recording_options['record_inputs'] = True
+
+    if setup:
+        prob.setup()
+
+    return prob